@@ -0,0 +1,298 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, jsonify, request
+
+from conexion import al_terminar_stream
+
+# --- Control de admisión de requests ---
+# Antes de ejecutar una ruta de los Blueprints se decide si se admite, para que
+# un cliente que manda demasiados requests no deje sin conexiones al resto:
+#   1. Límite por cliente en cada Blueprint (cubo de tokens): 'tasa' requests por
+#      segundo con ráfagas de hasta 'rafaga'. El cliente es la cabecera X-Api-Key
+#      o, si no la envía, su dirección IP.
+#   2. Límite total de cada Blueprint, sumando todos los clientes.
+#   3. Máximo de requests a la vez en las rutas caras (listados completos, árbol
+#      de un curso, búsqueda, catálogo), contado en cada proceso.
+# Si un límite se supera se responde enseguida, sin tocar la base de datos:
+# 429 (límites 1 y 2) o 503 (límite 3), con Retry-After. Es mejor que esperar
+# a que se libere una conexión del pool mientras los requests se acumulan.
+#
+# Los cubos de tokens viven en memoria de cada proceso. Con varios procesos o
+# servidores se puede usar un backend compartido (Redis, o BackendMemoria como
+# sustituto local para desarrollo y pruebas); si el backend falla se usan los
+# cubos locales. Las rutas de monitoreo (fuera de los Blueprints) no se limitan.
+
+ADMISION_CONFIG = {
+    'activa': True,
+    'cliente': (20.0, 40),          # (tasa por segundo, ráfaga) de cada cliente en cada Blueprint
+    'total': (500.0, 1000),         # (tasa, ráfaga) de cada Blueprint sumando todos los clientes
+    'blueprints': {                 # Límites propios de algunos Blueprints: {'cliente': ..., 'total': ...}
+        'busqueda_bp': {'cliente': (5.0, 10), 'total': (100.0, 200)},
+    },
+    'concurrencia': {               # Requests a la vez por proceso en las rutas caras
+        'cursos_bp.get_cursos': 4,
+        'cursos_bp.get_curso': 8,
+        'instructores_bp.get_instructores': 4,
+        'busqueda_bp.buscar_contenido': 4,
+        'catalogo_bp.exportar_catalogo': 2,
+        'catalogo_bp.importar_catalogo': 1,
+    },
+    'cabecera_cliente': 'X-Api-Key',
+    'max_clientes': 100000,         # Cubos guardados como máximo en memoria (LRU)
+    'backend': None,                # Backend compartido opcional (ver abajo)
+}
+
+
+# --- 1. Cubos de tokens ---
+# Cualquier objeto con consumir(clave, tasa, rafaga) y devolver(clave, rafaga) sirve
+# como backend. consumir retorna 0 si había un token (request admitido) o los segundos
+# hasta el próximo token; devolver repone el token de un request que consumió en un
+# cubo pero luego fue rechazado por otro límite.
+class CubosTokens:
+    """Cubos de tokens en memoria del proceso, seguros para hilos y limitados en número (LRU)."""
+
+    def __init__(self, max_claves=100000):
+        self.max_claves = max_claves
+        self._cubos = OrderedDict()  # clave -> (tokens, ultima actualización)
+        self._lock = threading.Lock()
+
+    def consumir(self, clave, tasa, rafaga):
+        ahora = time.monotonic()
+        with self._lock:
+            tokens, ultimo = self._cubos.pop(clave, (rafaga, ahora))
+            tokens = min(rafaga, tokens + (ahora - ultimo) * tasa)
+            if tokens >= 1:
+                tokens -= 1
+                espera = 0.0
+            else:
+                espera = (1 - tokens) / tasa
+            self._cubos[clave] = (tokens, ahora)
+            # Un cubo expulsado vuelve lleno: solo pasa con clientes que llevan tiempo sin llegar
+            while len(self._cubos) > self.max_claves:
+                self._cubos.popitem(last=False)
+        return espera
+
+    def devolver(self, clave, rafaga):
+        with self._lock:
+            if clave in self._cubos:
+                tokens, ultimo = self._cubos[clave]
+                self._cubos[clave] = (min(rafaga, tokens + 1), ultimo)
+
+    def limpiar(self):
+        with self._lock:
+            self._cubos.clear()
+
+
+class BackendMemoria(CubosTokens):
+    """
+    Sustituto local de un backend compartido (mismo contrato que BackendRedis).
+    Útil en desarrollo y pruebas cuando no hay un servidor Redis disponible.
+    """
+
+
+class BackendRedis:
+    """Cubos compartidos entre procesos y servidores. Requiere el paquete 'redis'."""
+
+    # Lectura, recarga y consumo en un solo paso atómico. El reloj es el de Redis,
+    # así todos los servidores ven el mismo tiempo.
+    SCRIPT = """
+        local datos = redis.call('HMGET', KEYS[1], 'tokens', 'ultimo')
+        local tasa = tonumber(ARGV[1])
+        local rafaga = tonumber(ARGV[2])
+        local reloj = redis.call('TIME')
+        local ahora = tonumber(reloj[1]) + tonumber(reloj[2]) / 1000000
+        local tokens = tonumber(datos[1]) or rafaga
+        local ultimo = tonumber(datos[2]) or ahora
+        tokens = math.min(rafaga, tokens + (ahora - ultimo) * tasa)
+        local espera = 0
+        if tokens >= 1 then tokens = tokens - 1 else espera = (1 - tokens) / tasa end
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'ultimo', ahora)
+        redis.call('EXPIRE', KEYS[1], math.ceil(rafaga / tasa) + 1)
+        return tostring(espera)
+    """
+
+    SCRIPT_DEVOLVER = """
+        local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+        if tokens then
+            redis.call('HSET', KEYS[1], 'tokens', math.min(tonumber(ARGV[1]), tokens + 1))
+        end
+        return 0
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', prefijo='plataforma:admision:'):
+        import redis  # Solo se necesita si se usa este backend
+        self._cliente = redis.Redis.from_url(url)
+        self._prefijo = prefijo
+        self._script = self._cliente.register_script(self.SCRIPT)
+        self._script_devolver = self._cliente.register_script(self.SCRIPT_DEVOLVER)
+
+    def consumir(self, clave, tasa, rafaga):
+        return float(self._script(keys=[self._prefijo + clave], args=[tasa, rafaga]))
+
+    def devolver(self, clave, rafaga):
+        self._script_devolver(keys=[self._prefijo + clave], args=[rafaga])
+
+
+# --- 2. Controlador de admisión ---
+class ControlAdmision:
+    """Aplica los límites de ADMISION_CONFIG y cuenta los requests admitidos y rechazados."""
+
+    def __init__(self, cliente, total, blueprints, concurrencia, max_clientes=100000, backend=None):
+        self.limites_por_defecto = {'cliente': cliente, 'total': total}
+        self.blueprints = blueprints
+        self.locales = CubosTokens(max_clientes)
+        self.backend = backend
+        self.concurrencia = concurrencia
+        self._en_curso = {endpoint: 0 for endpoint in concurrencia}
+        self._stats = {'admitidas': 0, 'rechazadas_cliente': 0, 'rechazadas_total': 0,
+                       'rechazadas_concurrencia': 0, 'errores_backend': 0}
+        self._lock = threading.Lock()
+
+    def _contar(self, clave):
+        with self._lock:
+            self._stats[clave] += 1
+
+    def _limite(self, blueprint, tipo):
+        return self.blueprints.get(blueprint, {}).get(tipo, self.limites_por_defecto[tipo])
+
+    def _consumir(self, clave, limite):
+        """Retorna (segundos de espera, cubos donde se consumió)."""
+        tasa, rafaga = limite
+        if self.backend is not None:
+            try:
+                return self.backend.consumir(clave, tasa, rafaga), self.backend
+            except Exception:
+                # Sin backend seguimos limitando, aunque solo dentro de este proceso
+                self._contar('errores_backend')
+        return self.locales.consumir(clave, tasa, rafaga), self.locales
+
+    def _devolver(self, consumidos):
+        """Repone los tokens de un request rechazado por un límite posterior."""
+        for cubos, clave, rafaga in consumidos:
+            try:
+                cubos.devolver(clave, rafaga)
+            except Exception:
+                self._contar('errores_backend')
+
+    def admitir(self, blueprint, endpoint, cliente):
+        """
+        Retorna None si el request se admite, o (status, segundos de espera) si se
+        rechaza. Si se admite, hay que llamar a liberar(endpoint) al terminar.
+        Un request rechazado no gasta tokens: los que ya tomó se devuelven.
+        """
+        consumidos = []
+        for tipo, clave in (('cliente', f"cliente:{blueprint}:{cliente}"), ('total', f"total:{blueprint}")):
+            limite = self._limite(blueprint, tipo)
+            if limite is None:
+                continue
+            espera, cubos = self._consumir(clave, limite)
+            if espera > 0:
+                self._devolver(consumidos)
+                self._contar(f'rechazadas_{tipo}')
+                return 429, espera
+            consumidos.append((cubos, clave, limite[1]))
+
+        with self._lock:
+            lleno = endpoint in self._en_curso and self._en_curso[endpoint] >= self.concurrencia[endpoint]
+            if lleno:
+                self._stats['rechazadas_concurrencia'] += 1
+            else:
+                if endpoint in self._en_curso:
+                    self._en_curso[endpoint] += 1
+                self._stats['admitidas'] += 1
+        if lleno:
+            self._devolver(consumidos)
+            return 503, 1
+        return None
+
+    def liberar(self, endpoint):
+        with self._lock:
+            if endpoint in self._en_curso:
+                self._en_curso[endpoint] -= 1
+
+    def estadisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['en_curso'] = dict(self._en_curso)
+        return stats
+
+
+_control = None
+_control_lock = threading.Lock()
+
+
+def configurar_admision(**opciones):
+    """Cambia los límites (ver ADMISION_CONFIG). Los cubos y contadores vuelven a empezar."""
+    global _control
+    with _control_lock:
+        ADMISION_CONFIG.update(opciones)
+        _control = None
+
+
+def obtener_control():
+    """Retorna el controlador de admisión global, creándolo la primera vez que se usa."""
+    global _control
+    if _control is None:
+        with _control_lock:
+            if _control is None:
+                _control = ControlAdmision(
+                    ADMISION_CONFIG['cliente'], ADMISION_CONFIG['total'], ADMISION_CONFIG['blueprints'],
+                    ADMISION_CONFIG['concurrencia'], ADMISION_CONFIG['max_clientes'], ADMISION_CONFIG['backend'])
+    return _control
+
+
+def estadisticas_admision():
+    return obtener_control().estadisticas()
+
+
+# --- 3. Integración con Flask ---
+def _identificar_cliente():
+    return request.headers.get(ADMISION_CONFIG['cabecera_cliente']) or request.remote_addr or 'desconocido'
+
+
+def _admitir_request():
+    if not ADMISION_CONFIG['activa'] or request.blueprint is None:
+        return None
+    control = obtener_control()
+    rechazo = control.admitir(request.blueprint, request.endpoint, _identificar_cliente())
+    if rechazo is None:
+        g.admision = (control, request.endpoint)
+        return None
+    status, espera = rechazo
+    if status == 429:
+        mensaje = "Demasiadas solicitudes, intenta de nuevo más tarde"
+    else:
+        mensaje = "El servicio está ocupado, intenta de nuevo más tarde"
+    respuesta = jsonify({"error": mensaje})
+    respuesta.status_code = status
+    respuesta.headers['Retry-After'] = str(max(1, math.ceil(espera)))
+    return respuesta
+
+
+def _retener_hasta_cerrar(respuesta):
+    """
+    Una respuesta por partes sigue leyendo de la base de datos después de que
+    termina la ruta: su lugar se libera al terminar de enviarla.
+    """
+    if respuesta.is_streamed and 'admision' in g:
+        control, endpoint = g.pop('admision')
+        al_terminar_stream(respuesta, lambda: control.liberar(endpoint))
+    return respuesta
+
+
+def _liberar_lugar(error=None):
+    admitido = g.pop('admision', None)
+    if admitido is not None:
+        control, endpoint = admitido
+        control.liberar(endpoint)
+
+
+def init_app(app):
+    """Registra el control de admisión antes de cada request de los Blueprints."""
+    app.before_request(_admitir_request)
+    app.after_request(_retener_hasta_cerrar)
+    # Si la ruta lanza una excepción no hay after_request: el lugar se libera aquí
+    app.teardown_request(_liberar_lugar)
@@ -1,40 +1,175 @@
-from flask import Flask
+import threading
 
-# --- 1. Importación de todos los Blueprints ---
-# Importamos cada "mini-app" desde su archivo correspondiente en la carpeta 'routes'.
-from routes.instructores import instructores_bp
-from routes.cursos import cursos_bp
-from routes.modulos import modulos_bp
-from routes.lecciones import lecciones_bp
+from flask import Flask, Response, jsonify
 
-# --- 2. Creación de la Aplicación Principal ---
-# Esta es la instancia principal de nuestra aplicación Flask.
-app = Flask(__name__)
+import admision
+import cache
+import compresion
+import conexion
+import configuracion
+import indice_publicacion
+import instrumentacion
+import metricas
+import serializacion
+import trabajos
+import transacciones
 
-# --- 3. Registro de Blueprints en la Aplicación ---
-# Aquí le decimos a nuestra aplicación principal que "active" cada mini-app
-# y le asignamos un prefijo de URL a cada una.
-# Esto mantiene nuestro código organizado.
+# --- 1. Rutas de monitoreo ---
+# Métricas del pool (checkouts, esperas, tiempo de espera...), de las réplicas de
+# lectura (ver conexion.py) y de las transacciones (reintentos por deadlock, ver
+# transacciones.py) para monitoreo.
+def get_pool_stats():
+    estadisticas = conexion.estadisticas_pool()
+    estadisticas['replicas'] = conexion.estadisticas_replicas()
+    estadisticas['transacciones'] = transacciones.estadisticas_transacciones()
+    return jsonify(estadisticas)
 
-# Todas las rutas definidas en 'instructores.py' empezarán con /api/instructors
-app.register_blueprint(instructores_bp, url_prefix='/api/instructors')
+# Aciertos, fallos y expulsiones de la caché de cursos publicados (ver cache.py)
+# y del índice de estado de publicación (ver indice_publicacion.py).
+def get_cache_stats():
+    return jsonify({
+        "arboles": cache.estadisticas_cache(),
+        "indice_publicacion": indice_publicacion.obtener_indice().estadisticas(),
+    })
 
-# Todas las rutas definidas en 'cursos.py' empezarán con /api/courses
-app.register_blueprint(cursos_bp, url_prefix='/api/courses')
+# Requests admitidos y rechazados por el control de admisión (ver admision.py)
+def get_admission_stats():
+    return jsonify(admision.estadisticas_admision())
 
-# Todas las rutas definidas en 'modulos.py' empezarán con /api/modules
-app.register_blueprint(modulos_bp, url_prefix='/api/modules')
+# Trabajos en segundo plano por estado, reintentos, espera en la cola y duración (ver trabajos.py)
+def get_jobs_stats():
+    return jsonify(trabajos.estadisticas_trabajos())
 
-# Todas las rutas definidas en 'lecciones.py' empezarán con /api/lessons
-app.register_blueprint(lecciones_bp, url_prefix='/api/lessons')
+# Requests, latencias, tamaños y conexiones a la BD de todos los procesos de
+# trabajo, en el formato de texto de Prometheus (ver metricas.py)
+def get_metrics():
+    return Response(metricas.generar(), mimetype='text/plain; version=0.0.4')
 
 
-# --- 4. Punto de Entrada para Ejecutar el Servidor ---
+# --- 2. Fábrica de la Aplicación ---
+# create_app() construye una aplicación nueva con su configuración.
+# Los servidores de producción (ver servidor.py) la llaman una vez en cada
+# proceso de trabajo, después de crear el proceso, así ninguna conexión a la
+# base de datos se comparte entre procesos.
+#   config:  valores para app.config de Flask.
+#   entorno: variables como las del entorno ({'DB_POOL_SIZE': '20', ...}, ver
+#            configuracion.py) que se aplican en esta llamada, además de os.environ.
+def create_app(config=None, entorno=None):
+    # Importamos cada "mini-app" desde su archivo correspondiente en la carpeta 'routes'.
+    # Se importan aquí y no al principio del archivo: 'import app' no carga nada que
+    # no se use hasta crear la aplicación (ver la sección 3).
+    from routes.instructores import instructores_bp
+    from routes.cursos import cursos_bp
+    from routes.modulos import modulos_bp
+    from routes.lecciones import lecciones_bp
+    from routes.busqueda import busqueda_bp
+    from routes.catalogo import catalogo_bp
+    from routes.trabajos import trabajos_bp
+
+    # Las variables de entorno (DB_HOST, DB_POOL_SIZE, ...) sobrescriben los valores por
+    # defecto. Se leen una sola vez por proceso: otra create_app() no deshace lo que ya
+    # se configuró (un pool, una caché...). Para cambiar algo se pasa 'entorno'.
+    configuracion.aplicar_entorno_una_vez()
+    if entorno:
+        configuracion.aplicar_entorno(entorno)
+
+    # Esta es la instancia principal de nuestra aplicación Flask.
+    app = Flask(__name__)
+    # JSON compacto y rápido para jsonify() y las respuestas por partes (ver serializacion.py)
+    app.json = serializacion.ProveedorJSONRapido(app)
+    if config:
+        app.config.update(config)
+
+    # --- Registro de Blueprints en la Aplicación ---
+    # Aquí le decimos a nuestra aplicación principal que "active" cada mini-app
+    # y le asignamos un prefijo de URL a cada una.
+    # Esto mantiene nuestro código organizado.
+
+    # Todas las rutas definidas en 'instructores.py' empezarán con /api/instructors
+    app.register_blueprint(instructores_bp, url_prefix='/api/instructors')
+
+    # Todas las rutas definidas en 'cursos.py' empezarán con /api/courses
+    app.register_blueprint(cursos_bp, url_prefix='/api/courses')
+
+    # Todas las rutas definidas en 'modulos.py' empezarán con /api/modules
+    app.register_blueprint(modulos_bp, url_prefix='/api/modules')
+
+    # Todas las rutas definidas en 'lecciones.py' empezarán con /api/lessons
+    app.register_blueprint(lecciones_bp, url_prefix='/api/lessons')
+
+    # Búsqueda de texto completo en cursos y lecciones: /api/search
+    app.register_blueprint(busqueda_bp, url_prefix='/api/search')
+
+    # Exportación e importación del catálogo completo en NDJSON: /api/catalog
+    app.register_blueprint(catalogo_bp, url_prefix='/api/catalog')
+
+    # Estado de los trabajos en segundo plano (por ejemplo, los que encola publicar un curso): /api/jobs
+    app.register_blueprint(trabajos_bp, url_prefix='/api/jobs')
+
+    # Métricas de cada request para /metrics. Va antes que los demás: sus
+    # after_request corren en orden inverso y así mide la respuesta final (ya comprimida).
+    metricas.init_app(app)
+
+    # --- Pool de Conexiones Compartido ---
+    # Todas las rutas toman su conexión del mismo pool (ver conexion.py), o del de
+    # una réplica de lectura en los GET si hay réplicas configuradas.
+    # Al terminar cada request, la conexión se devuelve automáticamente al pool.
+    conexion.init_app(app)
+
+    # Cada request mide sus consultas: cabecera Server-Timing, log en JSON,
+    # avisos de N+1 y log de consultas lentas (ver instrumentacion.py).
+    instrumentacion.init_app(app)
+
+    # Límites por cliente y por Blueprint, y máximo de requests a la vez en las
+    # rutas caras: lo que los supera se rechaza con 429/503 (ver admision.py).
+    # Va después de la instrumentación para que los rechazos también se registren.
+    admision.init_app(app)
+
+    # Las respuestas JSON se comprimen con gzip o brotli según Accept-Encoding (ver compresion.py)
+    compresion.init_app(app)
+
+    # Hilos que ejecutan los trabajos en segundo plano en el contexto de esta aplicación (ver trabajos.py)
+    trabajos.init_app(app)
+
+    app.add_url_rule('/api/pool/stats', view_func=get_pool_stats, methods=['GET'])
+    app.add_url_rule('/api/cache/stats', view_func=get_cache_stats, methods=['GET'])
+    app.add_url_rule('/api/admission/stats', view_func=get_admission_stats, methods=['GET'])
+    app.add_url_rule('/api/jobs/stats', view_func=get_jobs_stats, methods=['GET'])
+    app.add_url_rule('/metrics', view_func=get_metrics, methods=['GET'])
+
+    # Paso opcional (DB_POOL_WARMUP): las conexiones se abren ahora y no en los primeros requests
+    if conexion.POOL_CONFIG['precalentar']:
+        conexion.precalentar_pool()
+    return app
+
+
+# --- 3. Instancia por defecto ---
+# 'app' (para 'flask run', servidor.py, pruebas y benchmarks) se crea la primera
+# vez que alguien la pide con 'from app import app', no al importar el módulo:
+# quien solo necesita create_app() no construye dos aplicaciones, y arrancar un
+# proceso no paga la configuración antes de hacer falta.
+_app_lock = threading.Lock()
+
+
+def __getattr__(nombre):
+    global app
+    if nombre != 'app':
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    with _app_lock:
+        if 'app' not in globals():
+            app = create_app()
+    return app
+
+
+# --- 4. Punto de Entrada para Ejecutar el Servidor de Desarrollo ---
 # Este bloque de código se asegura de que el servidor se inicie solo
 # cuando ejecutamos este archivo directamente (con 'python app.py').
+# Para producción usa 'python servidor.py' (varios procesos, sin debugger).
 if __name__ == "__main__":
     # app.run() inicia el servidor de desarrollo.
-    # debug=True es muy útil durante el desarrollo porque:
+    # Con APP_DEBUG=1 (valor por defecto aquí) es muy útil durante el desarrollo porque:
     #   1. Reinicia el servidor automáticamente cada vez que guardas un cambio en un archivo.
     #   2. Muestra errores detallados en el navegador si algo sale mal.
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    servidor = configuracion.SERVIDOR
+    app = create_app()
+    app.run(host=servidor['host'], port=servidor['puerto'], debug=servidor['debug'])
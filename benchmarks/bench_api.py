@@ -0,0 +1,361 @@
+"""
+Benchmark de la API REST contra una base de datos SQLite local (no necesita MySQL).
+
+Crea una base temporal, la llena con seed.py, levanta app.app en el mismo proceso
+y mide rendimiento (peticiones/s) y latencias (p50/p90/p99) de cada endpoint.
+Los resultados se guardan en JSON para compararlos entre commits.
+
+Uso:
+    python benchmarks/bench_api.py --perfil small --peticiones 300 --salida base.json
+    python benchmarks/bench_api.py --salida nuevo.json --comparar base.json
+
+Para medir un servidor real (por ejemplo servidor.py contra app.py) por HTTP:
+    python benchmarks/bench_api.py --db /tmp/bench.db --solo-preparar
+    DB_BACKEND=sqlite DB_SQLITE_PATH=/tmp/bench.db ADMISSION_ENABLED=0 python servidor.py &
+    python benchmarks/bench_api.py --db /tmp/bench.db --url http://127.0.0.1:5000 --concurrencia 8
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import admision
+import cache
+import conexion
+import conexion_sqlite
+import seed
+
+
+# --- 1. Preparación de la base de datos ---
+def preparar_base(ruta, perfil, semilla, procesos):
+    """Crea el esquema en un archivo SQLite, lo llena con seed.py y apunta el pool a él."""
+    conexion_sqlite.crear_esquema(ruta)
+    conexion.configurar_backend('sqlite', ruta=ruta)
+    seed.seed_database(perfil, semilla=semilla, procesos=procesos)
+
+
+def leer_datos(ruta):
+    """Ids que usan los escenarios (solo se escribe en cursos sin publicar)."""
+    conn = sqlite3.connect(ruta)
+    try:
+        def ids(sql):
+            return [fila[0] for fila in conn.execute(sql)]
+        return {
+            'cursos': ids("SELECT id FROM cursos"),
+            'cursos_sin_publicar': ids("SELECT id FROM cursos WHERE is_published = 0"),
+            'instructores': ids("SELECT id FROM instructores"),
+            'modulos_sin_publicar': ids("""
+                SELECT m.id FROM modulos m JOIN cursos c ON c.id = m.curso_id
+                WHERE c.is_published = 0"""),
+            'lecciones': ids("SELECT id FROM lecciones"),
+            'lecciones_sin_publicar': ids("""
+                SELECT l.id FROM lecciones l JOIN modulos m ON m.id = l.modulo_id
+                JOIN cursos c ON c.id = m.curso_id WHERE c.is_published = 0"""),
+            # Palabras de los títulos de las lecciones para los escenarios de búsqueda
+            'palabras': sorted({palabra.strip('.,:').lower()
+                                for titulo in ids("SELECT titulo FROM lecciones LIMIT 500")
+                                for palabra in titulo.split() if len(palabra) > 4}),
+        }
+    finally:
+        conn.close()
+
+
+# open() recibe un parámetro 'json' (como test_client) que tapa al módulo
+_json_dumps = json.dumps
+
+
+class ClienteHTTP:
+    """Cliente HTTP con keep-alive y la misma interfaz que app.test_client() que usa el benchmark."""
+
+    def __init__(self, url):
+        partes = urlsplit(url)
+        self._conn = http.client.HTTPConnection(partes.hostname, partes.port or 80, timeout=60)
+
+    def open(self, url, method='GET', json=None):
+        cuerpo = None
+        cabeceras = {}
+        if json is not None:
+            cuerpo = _json_dumps(json).encode('utf-8')
+            cabeceras['Content-Type'] = 'application/json'
+        self._conn.request(method, url, body=cuerpo, headers=cabeceras)
+        return RespuestaHTTP(self._conn.getresponse())
+
+    def post(self, url, json=None):
+        return self.open(url, 'POST', json)
+
+
+class RespuestaHTTP:
+    def __init__(self, respuesta):
+        self.status_code = respuesta.status
+        self._datos = respuesta.read()
+
+    def get_data(self):
+        return self._datos
+
+    def get_json(self):
+        return json.loads(self._datos)
+
+    def close(self):
+        pass
+
+
+# --- 2. Escenarios ---
+# Cada escenario retorna (método, url, cuerpo_json) para una petición.
+# 'preparar' (opcional) crea los datos que el escenario va a consumir.
+_contador = iter(range(10**9))
+_contador_lock = threading.Lock()
+
+def _siguiente():
+    with _contador_lock:
+        return next(_contador)
+
+def _publicables(cliente, datos, cantidad):
+    # Cursos nuevos para publicar (cada curso solo se puede publicar una vez)
+    ids = []
+    for n in range(cantidad):
+        respuesta = cliente.post('/api/courses/', json={
+            "titulo": f"Curso para publicar {n}", "instructor_id": datos['instructores'][0]})
+        ids.append(respuesta.get_json()['id'])
+    datos['publicables'] = ids
+
+ESCENARIOS = {
+    'cursos.listar': lambda rng, d: ('GET', '/api/courses/?limit=100', None),
+    'cursos.listar_publicados': lambda rng, d: ('GET', '/api/courses/?is_published=true&limit=100', None),
+    'cursos.obtener': lambda rng, d: ('GET', f"/api/courses/{rng.choice(d['cursos'])}", None),
+    'cursos.obtener_outline': lambda rng, d: ('GET', f"/api/courses/{rng.choice(d['cursos'])}?fields=outline", None),
+    'cursos.crear': lambda rng, d: ('POST', '/api/courses/', {
+        "titulo": "Curso de benchmark", "descripcion": "Creado por bench_api.py",
+        "instructor_id": rng.choice(d['instructores'])}),
+    'cursos.actualizar': lambda rng, d: ('PUT', f"/api/courses/{rng.choice(d['cursos_sin_publicar'])}", {
+        "titulo": "Curso actualizado", "descripcion": "Actualizado por bench_api.py",
+        "instructor_id": rng.choice(d['instructores'])}),
+    'cursos.publicar': lambda rng, d: ('POST', f"/api/courses/{d['publicables'].pop()}/publish", None),
+    'instructores.listar': lambda rng, d: ('GET', '/api/instructors/?limit=100', None),
+    'instructores.obtener': lambda rng, d: ('GET', f"/api/instructors/{rng.choice(d['instructores'])}", None),
+    'instructores.crear': lambda rng, d: ('POST', '/api/instructors/', {
+        "nombre": "Instructor de benchmark", "email": f"bench.{time.time_ns()}.{_siguiente()}@ejemplo.com"}),
+    'modulos.crear_leccion': lambda rng, d: ('POST', f"/api/modules/{rng.choice(d['modulos_sin_publicar'])}/lessons", {
+        "titulo": "Lección de benchmark", "contenido": "Contenido " * 50}),
+    'lecciones.obtener': lambda rng, d: ('GET', f"/api/lessons/{rng.choice(d['lecciones'])}", None),
+    'lecciones.actualizar': lambda rng, d: ('PUT', f"/api/lessons/{rng.choice(d['lecciones_sin_publicar'])}", {
+        "titulo": "Lección actualizada", "contenido": "Contenido " * 50}),
+    'busqueda.cursos': lambda rng, d: ('GET', f"/api/search/?q={rng.choice(d['palabras'])}", None),
+    'busqueda.lecciones': lambda rng, d: ('GET', f"/api/search/?tipo=lecciones&q={rng.choice(d['palabras'])}", None),
+}
+
+PREPARAR = {
+    'cursos.publicar': _publicables,
+}
+
+
+# --- 3. Medición ---
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return 0.0
+    indice = min(len(valores_ordenados) - 1, max(0, round(p / 100 * len(valores_ordenados)) - 1))
+    return valores_ordenados[indice]
+
+
+def medir(nuevo_cliente, nombre, datos, peticiones, concurrencia, calentamiento, semilla):
+    """Mide un escenario. 'nuevo_cliente' crea un cliente por hilo (test_client o ClienteHTTP)."""
+    escenario = ESCENARIOS[nombre]
+    if nombre in PREPARAR:
+        PREPARAR[nombre](nuevo_cliente(), datos, peticiones + calentamiento)
+
+    def hacer_peticion(cliente, rng):
+        metodo, url, cuerpo = escenario(rng, datos)
+        inicio = time.perf_counter()
+        respuesta = cliente.open(url, method=metodo, json=cuerpo)
+        respuesta.get_data()  # Consumimos todo el cuerpo (las respuestas pueden ser streams)
+        duracion = time.perf_counter() - inicio
+        respuesta.close()
+        return duracion, respuesta.status_code
+
+    cliente = nuevo_cliente()
+    rng = random.Random(f"{semilla}-{nombre}-calentamiento")
+    for _ in range(calentamiento):
+        hacer_peticion(cliente, rng)
+
+    latencias = []
+    errores = []
+    lock = threading.Lock()
+
+    def trabajador(numero, cantidad):
+        cliente = nuevo_cliente()
+        rng = random.Random(f"{semilla}-{nombre}-{numero}")
+        propias = []
+        fallos = 0
+        for _ in range(cantidad):
+            duracion, status = hacer_peticion(cliente, rng)
+            propias.append(duracion)
+            if status >= 400:
+                fallos += 1
+        with lock:
+            latencias.extend(propias)
+            errores.append(fallos)
+
+    repartos = [peticiones // concurrencia + (1 if n < peticiones % concurrencia else 0)
+                for n in range(concurrencia)]
+    hilos = [threading.Thread(target=trabajador, args=(n, cantidad)) for n, cantidad in enumerate(repartos)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    total = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        'peticiones': len(latencias),
+        'errores': sum(errores),
+        'rps': round(len(latencias) / total, 1),
+        'media_ms': round(sum(latencias) / len(latencias) * 1000, 3),
+        'p50_ms': round(percentil(latencias, 50) * 1000, 3),
+        'p90_ms': round(percentil(latencias, 90) * 1000, 3),
+        'p99_ms': round(percentil(latencias, 99) * 1000, 3),
+        'max_ms': round(latencias[-1] * 1000, 3),
+    }
+
+
+# --- 4. Reporte y comparación ---
+def commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def imprimir(resultados, base=None):
+    print(f"\n{'endpoint':28} {'rps':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'errores':>8}"
+          + ("   Δp50" if base else ""))
+    for nombre, r in resultados.items():
+        linea = f"{nombre:28} {r['rps']:9.1f} {r['p50_ms']:9.3f} {r['p90_ms']:9.3f} {r['p99_ms']:9.3f} {r['errores']:8d}"
+        if base and nombre in base:
+            cambio = (r['p50_ms'] - base[nombre]['p50_ms']) / max(base[nombre]['p50_ms'], 1e-9)
+            linea += f"  {cambio:+6.1%}"
+        print(linea)
+
+
+def regresiones(resultados, base, umbral):
+    """Endpoints cuyo p50 empeoró más que 'umbral' (0.2 = 20%) respecto a 'base'."""
+    return [nombre for nombre, r in resultados.items()
+            if nombre in base and r['p50_ms'] > base[nombre]['p50_ms'] * (1 + umbral)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la API contra una base SQLite local.")
+    parser.add_argument('--perfil', choices=sorted(seed.PERFILES), default='small', help="Tamaño de los datos (seed.py)")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--procesos', type=int, default=1, help="Procesos para generar los datos")
+    parser.add_argument('--peticiones', type=int, default=200, help="Peticiones medidas por endpoint")
+    parser.add_argument('--concurrencia', type=int, default=1, help="Hilos haciendo peticiones a la vez")
+    parser.add_argument('--calentamiento', type=int, default=10, help="Peticiones previas sin medir")
+    parser.add_argument('--endpoints', default=None, help="Lista separada por comas (por defecto, todos)")
+    parser.add_argument('--sin-cache', action='store_true', help="Desactiva la caché de cursos publicados")
+    parser.add_argument('--replicas', type=int, default=0,
+                        help="Copias de la base que sirven de réplicas de lectura (ver conexion.py)")
+    parser.add_argument('--db', default=None,
+                        help="Archivo SQLite a usar (por defecto, uno temporal). Si ya existe, no se vuelve a llenar")
+    parser.add_argument('--solo-preparar', action='store_true', help="Solo crea y llena la base de --db")
+    parser.add_argument('--url', default=None,
+                        help="Mide un servidor ya levantado (que use la misma base --db) en lugar de app.app")
+    parser.add_argument('--salida', default=None, help="Archivo JSON donde guardar los resultados")
+    parser.add_argument('--comparar', default=None, help="JSON de una ejecución anterior para comparar")
+    parser.add_argument('--umbral', type=float, default=0.2, help="Empeoramiento de p50 que cuenta como regresión")
+    args = parser.parse_args()
+
+    nombres = args.endpoints.split(',') if args.endpoints else list(ESCENARIOS)
+    desconocidos = [nombre for nombre in nombres if nombre not in ESCENARIOS]
+    if desconocidos:
+        parser.error(f"Endpoints desconocidos: {', '.join(desconocidos)}")
+
+    if (args.url or args.solo_preparar) and not args.db:
+        parser.error("--url y --solo-preparar necesitan --db")
+
+    directorio = tempfile.TemporaryDirectory()
+    ruta = args.db or os.path.join(directorio.name, 'bench.db')
+    if os.path.exists(ruta):
+        conexion.configurar_backend('sqlite', ruta=ruta)
+    else:
+        preparar_base(ruta, args.perfil, args.semilla, args.procesos)
+    if args.solo_preparar:
+        print(f"Base de datos lista en {ruta}")
+        return
+    if args.sin_cache:
+        cache.configurar_cache(max_entradas=0)
+    # Se mide el costo de cada endpoint, no los límites por cliente (ver admision.py)
+    admision.configurar_admision(activa=False)
+    if args.replicas:
+        # Copias tomadas antes de medir: las escrituras del benchmark no llegan a ellas
+        replicas = [f"{ruta}.replica{numero}" for numero in range(1, args.replicas + 1)]
+        for replica in replicas:
+            conexion_sqlite.replicar(ruta, replica)
+        conexion.configurar_replicas(replicas=replicas)
+
+    if args.url:
+        nuevo_cliente = lambda: ClienteHTTP(args.url)
+    else:
+        from app import app
+        nuevo_cliente = app.test_client
+
+    datos = leer_datos(ruta)
+    resultados = {}
+    for nombre in nombres:
+        resultados[nombre] = medir(nuevo_cliente, nombre, datos, args.peticiones, args.concurrencia,
+                                   args.calentamiento, args.semilla)
+
+    salida = {
+        'meta': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'commit': commit_actual(),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'backend': 'sqlite',
+            'servidor': args.url or 'en proceso (test_client)',
+            'perfil': args.perfil,
+            'semilla': args.semilla,
+            'peticiones': args.peticiones,
+            'concurrencia': args.concurrencia,
+            'cache': not args.sin_cache,
+            'replicas': args.replicas,
+        },
+        'resultados': resultados,
+    }
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as archivo:
+            base = json.load(archivo)['resultados']
+    imprimir(resultados, base)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(salida, archivo, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en {args.salida}")
+
+    conexion.cerrar_pool()
+    directorio.cleanup()
+
+    if base:
+        peores = regresiones(resultados, base, args.umbral)
+        if peores:
+            print(f"\nRegresiones de más de {args.umbral:.0%} en p50: {', '.join(peores)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
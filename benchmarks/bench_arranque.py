@@ -0,0 +1,206 @@
+"""
+Benchmark del arranque de un proceso de la API (no necesita MySQL).
+
+Cada medición es un proceso de Python nuevo, como un proceso de trabajo recién
+creado por servidor.py, contra una base SQLite temporal. Se mide:
+  - importar:        'import app'
+  - crear_app:       la primera vez que se pide app.app (create_app(), y el
+                     precalentamiento del pool si se pide con --precalentar)
+  - primer_request:  el primer GET (conexión a la base, primeras consultas...)
+  - segundo_request: el mismo GET otra vez, para comparar
+  - hasta_primer_request: desde que se lanza el proceso hasta tener la primera
+                     respuesta (incluye el arranque del intérprete)
+
+Uso:
+    python benchmarks/bench_arranque.py --repeticiones 10 --salida base.json
+    python benchmarks/bench_arranque.py --salida nuevo.json --comparar base.json
+    python benchmarks/bench_arranque.py --precalentar 5
+    python benchmarks/bench_arranque.py --detalle 15     # módulos que más tardan en importarse
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+METRICAS = ('importar', 'crear_app', 'primer_request', 'segundo_request', 'hasta_primer_request')
+
+# Módulos que no deberían cargarse para atender un request con SQLite
+MODULOS_PESADOS = ('mysql.connector', 'faker')
+
+
+# --- 1. Lo que corre en el proceso medido ---
+def medir_proceso(lanzado_en, ruta):
+    """Se ejecuta en el proceso nuevo: imprime sus tiempos (ms) en JSON."""
+    inicio = time.perf_counter()
+    import app
+    importado = time.perf_counter()
+    aplicacion = app.app
+    creada = time.perf_counter()
+    cliente = aplicacion.test_client()
+    cliente.get(ruta).get_data()
+    primero = time.perf_counter()
+    respondido_en = time.time()
+    cliente.get(ruta).get_data()
+    segundo = time.perf_counter()
+    print(json.dumps({
+        'importar': (importado - inicio) * 1000,
+        'crear_app': (creada - importado) * 1000,
+        'primer_request': (primero - creada) * 1000,
+        'segundo_request': (segundo - primero) * 1000,
+        'hasta_primer_request': (respondido_en - lanzado_en) * 1000,
+        'modulos_pesados': [modulo for modulo in MODULOS_PESADOS if modulo in sys.modules],
+    }))
+
+
+# --- 2. Preparación y lanzamiento ---
+def preparar_base(ruta):
+    """Esquema y un instructor: basta para un GET que consulta la base."""
+    import conexion_sqlite
+
+    conexion_sqlite.crear_esquema(ruta)
+    conn = sqlite3.connect(ruta)
+    try:
+        conn.execute("INSERT INTO instructores (nombre, email) VALUES ('Ana', 'ana@ejemplo.com')")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def lanzar(ruta_db, ruta, precalentar):
+    entorno = dict(os.environ, DB_BACKEND='sqlite', DB_SQLITE_PATH=ruta_db)
+    if precalentar:
+        entorno['DB_POOL_WARMUP'] = str(precalentar)
+    lanzado_en = time.time()
+    resultado = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--medir-proceso', repr(lanzado_en), '--ruta', ruta],
+        cwd=RAIZ, env=entorno, capture_output=True, text=True)
+    if resultado.returncode != 0:
+        sys.exit(f"El proceso medido falló:\n{resultado.stderr}")
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+
+def detalle_importacion(cantidad):
+    """Los 'cantidad' módulos con más tiempo acumulado según 'python -X importtime'."""
+    resultado = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                               cwd=RAIZ, capture_output=True, text=True)
+    modulos = []
+    for linea in resultado.stderr.splitlines():
+        partes = linea.split('|')
+        if len(partes) == 3 and partes[1].strip().isdigit():
+            modulos.append((int(partes[1]) / 1000, partes[2].strip()))
+    return sorted(modulos, reverse=True)[:cantidad]
+
+
+# --- 3. Reporte y comparación ---
+def commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def resumir(mediciones):
+    return {metrica: {
+        'p50_ms': statistics.median(m[metrica] for m in mediciones),
+        'min_ms': min(m[metrica] for m in mediciones),
+        'max_ms': max(m[metrica] for m in mediciones),
+    } for metrica in METRICAS}
+
+
+def imprimir(resultados, base=None):
+    print(f"\n{'medición':22} {'p50 ms':>9} {'min ms':>9} {'max ms':>9}" + ("   Δp50" if base else ""))
+    for nombre, r in resultados.items():
+        linea = f"{nombre:22} {r['p50_ms']:9.1f} {r['min_ms']:9.1f} {r['max_ms']:9.1f}"
+        if base and nombre in base:
+            cambio = (r['p50_ms'] - base[nombre]['p50_ms']) / max(base[nombre]['p50_ms'], 1e-9)
+            linea += f"  {cambio:+6.1%}"
+        print(linea)
+
+
+def regresiones(resultados, base, umbral):
+    """Mediciones cuyo p50 empeoró más que 'umbral' (0.2 = 20%) respecto a 'base'."""
+    return [nombre for nombre, r in resultados.items()
+            if nombre in base and r['p50_ms'] > base[nombre]['p50_ms'] * (1 + umbral)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del arranque de un proceso de la API.")
+    parser.add_argument('--repeticiones', type=int, default=5, help="Procesos lanzados (se informa la mediana)")
+    parser.add_argument('--ruta', default='/api/instructors/1', help="GET usado como primer request")
+    parser.add_argument('--precalentar', type=int, default=0,
+                        help="Conexiones abiertas al crear la app (DB_POOL_WARMUP, ver conexion.py)")
+    parser.add_argument('--detalle', type=int, default=0, metavar='N',
+                        help="Muestra los N módulos que más tardan en importarse")
+    parser.add_argument('--salida', default=None, help="Archivo JSON donde guardar los resultados")
+    parser.add_argument('--comparar', default=None, help="JSON de una ejecución anterior para comparar")
+    parser.add_argument('--umbral', type=float, default=0.2, help="Empeoramiento de p50 que cuenta como regresión")
+    parser.add_argument('--medir-proceso', type=float, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir_proceso is not None:
+        medir_proceso(args.medir_proceso, args.ruta)
+        return
+
+    directorio = tempfile.TemporaryDirectory()
+    ruta_db = os.path.join(directorio.name, 'arranque.db')
+    preparar_base(ruta_db)
+
+    # Un proceso sin medir: deja los .pyc compilados, como en un servidor ya instalado
+    lanzar(ruta_db, args.ruta, args.precalentar)
+    mediciones = [lanzar(ruta_db, args.ruta, args.precalentar) for _ in range(args.repeticiones)]
+    resultados = resumir(mediciones)
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as archivo:
+            base = json.load(archivo)['resultados']
+    imprimir(resultados, base)
+    pesados = mediciones[-1]['modulos_pesados']
+    print(f"\nMódulos pesados cargados: {', '.join(pesados) if pesados else 'ninguno'}")
+
+    if args.detalle:
+        print(f"\n{'ms acumulados':>14}  módulo")
+        for ms, modulo in detalle_importacion(args.detalle):
+            print(f"{ms:14.1f}  {modulo}")
+
+    if args.salida:
+        salida = {
+            'meta': {
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'commit': commit_actual(),
+                'python': platform.python_version(),
+                'plataforma': platform.platform(),
+                'backend': 'sqlite',
+                'repeticiones': args.repeticiones,
+                'ruta': args.ruta,
+                'precalentar': args.precalentar,
+                'modulos_pesados': pesados,
+            },
+            'resultados': resultados,
+        }
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(salida, archivo, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en {args.salida}")
+
+    directorio.cleanup()
+
+    if base:
+        peores = regresiones(resultados, base, args.umbral)
+        if peores:
+            print(f"\nRegresiones de más de {args.umbral:.0%} en p50: {', '.join(peores)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+Micro-benchmark de la serialización JSON (no necesita base de datos).
+
+Compara, con filas sintéticas parecidas a las de seed.py, el camino anterior
+(cursor con dictionary=True + proveedor JSON por defecto de Flask) con el actual
+(filas en tuplas + MapaColumnas + ProveedorJSONRapido, ver serializacion.py).
+El camino actual ejecuta el código real de las rutas con un cursor en memoria:
+  - listado:  una página de cursos (como GET /api/courses?limit=N)
+  - arbol:    el árbol completo de un curso con el contenido de sus lecciones
+  - ndjson:   el mismo listado escrito fila por fila (?stream=ndjson)
+
+Uso:
+    python benchmarks/bench_serializacion.py
+    python benchmarks/bench_serializacion.py --filas 1000 --lecciones 500 --tamano-contenido 8000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import serializacion
+from serializacion import MapaColumnas, ProveedorJSONRapido, generar_filas_json
+from routes.cursos import _generar_arbol_curso
+
+COLUMNAS_CURSO = ('id', 'titulo', 'descripcion', 'is_published', 'instructor_id', 'instructor_nombre')
+
+
+# --- 1. Datos sintéticos ---
+def _texto(azar, longitud):
+    palabras = []
+    total = 0
+    while total < longitud:
+        palabra = ''.join(azar.choices(string.ascii_lowercase, k=azar.randint(3, 10)))
+        if azar.random() < 0.1:
+            palabra += 'ión'  # Algo de texto no ASCII, como en los datos reales
+        palabras.append(palabra)
+        total += len(palabra) + 1
+    return ' '.join(palabras)[:longitud]
+
+
+def filas_cursos(azar, cantidad):
+    """Tuplas en el orden de COLUMNAS_CURSO, como las entrega un cursor normal."""
+    return [(i, _texto(azar, 40), _texto(azar, 300), azar.randint(0, 1), azar.randint(1, 500), _texto(azar, 20))
+            for i in range(1, cantidad + 1)]
+
+
+def arbol_curso(azar, modulos, lecciones, tamano_contenido):
+    """(curso, filas) con las filas de SQL_MODULOS_Y_LECCIONES: módulo, título, lección, título, contenido."""
+    curso = {'id': 1, 'titulo': _texto(azar, 40), 'descripcion': _texto(azar, 300), 'is_published': 1,
+             'instructor_id': 7, 'revision': 3, 'updated_at': datetime(2024, 1, 1) + timedelta(days=30),
+             'instructor_nombre': _texto(azar, 20)}
+    filas = []
+    for i in range(lecciones):
+        modulo_id = i * modulos // lecciones + 1
+        filas.append((modulo_id, f"Módulo {modulo_id}", i + 1, _texto(azar, 40), _texto(azar, tamano_contenido)))
+    return curso, filas
+
+
+class CursorMemoria:
+    """Cursor sin base de datos con lo que usan generar_filas_json() y _generar_arbol_curso()."""
+
+    def __init__(self, columnas, filas):
+        self.column_names = columnas
+        self._filas = filas
+        self._posicion = 0
+
+    def execute(self, sql, params=()):
+        self._posicion = 0
+
+    def fetchmany(self, size=1):
+        lote = self._filas[self._posicion:self._posicion + size]
+        self._posicion += len(lote)
+        return lote
+
+    def __iter__(self):
+        return iter(self._filas)
+
+    def close(self):
+        pass
+
+
+class ConexionMemoria:
+    def __init__(self, filas):
+        self._filas = filas
+
+    def cursor(self):
+        return CursorMemoria(('id', 'titulo', 'id', 'titulo', 'contenido'), self._filas)
+
+
+# --- 2. Cada escenario, antes y después ---
+# 'antes' reproduce el código anterior: un diccionario por fila (lo que hace el
+# cursor con dictionary=True) y el proveedor por defecto de Flask, con ordenación
+# de claves, escapes \uXXXX y un dumps() por lección del árbol.
+def listado_antes(proveedor, filas):
+    dicts = [dict(zip(COLUMNAS_CURSO, fila)) for fila in filas]
+    return proveedor.dumps(dicts, separators=(',', ':')).encode('utf-8')
+
+
+def listado_despues(proveedor, filas):
+    return serializacion.dumps_bytes(MapaColumnas(COLUMNAS_CURSO).filas(filas))
+
+
+def ndjson_antes(proveedor, filas):
+    return ''.join(proveedor.dumps(dict(zip(COLUMNAS_CURSO, fila)), separators=(',', ':')) + '\n'
+                   for fila in filas).encode('utf-8')
+
+
+def ndjson_despues(proveedor, filas):
+    return b''.join(generar_filas_json(CursorMemoria(COLUMNAS_CURSO, filas), ndjson=True))
+
+
+def _abrir_objeto(proveedor, datos, clave):
+    cuerpo = proveedor.dumps(datos, separators=(',', ':'))
+    return cuerpo[:-1] + ',' + proveedor.dumps(clave) + ':'
+
+
+def arbol_antes(proveedor, datos):
+    curso, filas = datos
+    partes = [_abrir_objeto(proveedor, curso, 'modulos'), '[']
+    modulo_actual = None
+    for modulo_id, modulo_titulo, leccion_id, leccion_titulo, contenido in filas:
+        if modulo_id != modulo_actual:
+            if modulo_actual is not None:
+                partes.append(']},')
+            modulo = {"id": modulo_id, "titulo": modulo_titulo, "curso_id": curso['id']}
+            partes.append(_abrir_objeto(proveedor, modulo, 'lecciones') + '[')
+            modulo_actual = modulo_id
+            primera = True
+        leccion = {"id": leccion_id, "titulo": leccion_titulo, "modulo_id": modulo_id, "contenido": contenido}
+        if not primera:
+            partes.append(',')
+        partes.append(proveedor.dumps(leccion, separators=(',', ':')))
+        primera = False
+    partes.append(']}]}')
+    return ''.join(partes).encode('utf-8')
+
+
+def arbol_despues(proveedor, datos):
+    curso, filas = datos
+    return b''.join(_generar_arbol_curso(ConexionMemoria(filas), curso, incluir_contenido=True))
+
+
+ESCENARIOS = {
+    'listado': (listado_antes, listado_despues),
+    'ndjson': (ndjson_antes, ndjson_despues),
+    'arbol': (arbol_antes, arbol_despues),
+}
+
+
+# --- 3. Medición ---
+def medir(funcion, proveedor, datos, repeticiones):
+    """Retorna (mejor tiempo en segundos, bytes generados) de 'repeticiones' ejecuciones."""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        cuerpo = funcion(proveedor, datos)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, len(cuerpo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara el rendimiento de la serialización JSON antes y después.")
+    parser.add_argument('--filas', type=int, default=1000, help="Cursos del listado")
+    parser.add_argument('--modulos', type=int, default=20, help="Módulos del árbol")
+    parser.add_argument('--lecciones', type=int, default=200, help="Lecciones del árbol")
+    parser.add_argument('--tamano-contenido', type=int, default=4000, help="Caracteres del contenido de cada lección")
+    parser.add_argument('--repeticiones', type=int, default=20, help="Se informa la mejor de N ejecuciones")
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    azar = random.Random(args.semilla)
+    datos = {
+        'listado': filas_cursos(azar, args.filas),
+        'arbol': arbol_curso(azar, args.modulos, args.lecciones, args.tamano_contenido),
+    }
+    datos['ndjson'] = datos['listado']
+
+    app = Flask(__name__)
+    proveedor_antes = DefaultJSONProvider(app)
+    # Igual que en create_app(): dumps() de serializacion.py usa el proveedor de current_app
+    proveedor_despues = app.json = ProveedorJSONRapido(app)
+    app.app_context().push()
+    motor = 'orjson' if serializacion.orjson is not None else 'json (biblioteca estándar)'
+    print(f"Serializador rápido: {motor}\n")
+    print(f"{'escenario':<10} {'antes ms':>10} {'después ms':>11} {'antes MB/s':>11} {'después MB/s':>13} {'mejora':>8}")
+    for nombre, (antes, despues) in ESCENARIOS.items():
+        t_antes, bytes_antes = medir(antes, proveedor_antes, datos[nombre], args.repeticiones)
+        t_despues, bytes_despues = medir(despues, proveedor_despues, datos[nombre], args.repeticiones)
+        print(f"{nombre:<10} {t_antes * 1000:>10.2f} {t_despues * 1000:>11.2f} "
+              f"{bytes_antes / t_antes / 1e6:>11.1f} {bytes_despues / t_despues / 1e6:>13.1f} "
+              f"{t_antes / t_despues:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import re
+import unicodedata
+
+import conexion
+from serializacion import MapaColumnas
+
+# --- Búsqueda de texto completo en cursos y lecciones ---
+# La búsqueda usa el índice de texto completo de la base de datos, así su costo
+# depende de cuántos documentos coinciden y no del tamaño del catálogo:
+#   - MySQL: índices FULLTEXT ft_cursos_texto y ft_lecciones_texto
+#     (ver migraciones/0001_busqueda_texto_completo.sql).
+#     La colación utf8mb4_unicode_ci ya compara sin acentos ni mayúsculas.
+#   - SQLite (sustituto local): tablas FTS5 con tokenize 'unicode61 remove_diacritics 2',
+#     mantenidas por triggers (ver migraciones/0001_busqueda_texto_completo.sqlite.sql).
+#
+# La consulta del usuario se prepara aquí igual para los dos motores: se pasa a
+# minúsculas, se le quitan los acentos, se descartan las palabras vacías del
+# español y cada término se busca como prefijo ("program" encuentra "programación"
+# y "programas"). Una fila debe contener todos los términos.
+
+# Longitud mínima de un término: innodb_ft_min_token_size es 3 por defecto,
+# así que MySQL no indexa palabras más cortas.
+MIN_LONGITUD = 3
+MAX_TERMINOS = 8
+TIPOS = ('cursos', 'lecciones')
+
+# Palabras vacías del español (ya sin acentos). El índice de InnoDB usa por defecto
+# una lista en inglés, así que las quitamos de la consulta antes de enviarla.
+PALABRAS_VACIAS = frozenset("""
+    algo algun alguna algunas alguno algunos ante antes aqui asi aun cada como con
+    contra cual cuales cuando del desde donde dos durante ella ellas ello ellos entre
+    era eran eres esa esas ese eso esos esta estaba estan estar estas este esto estos
+    fue fueron hay hasta las les los mas mis mucho muy nada nos nosotros otra otras
+    otro otros para pero poco por porque que quien quienes sea segun ser sin sobre
+    sois somos son sus suya suyo tal tambien tan tanto tener tiene tienen todo todos
+    tras tus una uno unos unas usted ustedes vez vosotros
+""".split())
+
+_PALABRA = re.compile(r'\w+')
+
+
+def normalizar(texto):
+    """Texto en minúsculas y sin acentos ('Programación' -> 'programacion')."""
+    descompuesto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def terminos_de_busqueda(texto):
+    """Términos útiles de la consulta, sin repetir y en el orden en que aparecen."""
+    terminos = []
+    for palabra in _PALABRA.findall(normalizar(texto)):
+        if len(palabra) < MIN_LONGITUD or palabra in PALABRAS_VACIAS or palabra in terminos:
+            continue
+        terminos.append(palabra)
+    return terminos[:MAX_TERMINOS]
+
+
+# --- Consultas de cada motor ---
+# Cada consulta recibe (expresión, [is_published], limite, desplazamiento) y
+# retorna las filas ordenadas por 'puntaje' (mayor = más relevante).
+def _expresion_mysql(terminos):
+    # Modo booleano: '+' exige el término y '*' lo busca como prefijo
+    return ' '.join(f'+{termino}*' for termino in terminos)
+
+
+def _expresion_sqlite(terminos):
+    return ' AND '.join(f'"{termino}"*' for termino in terminos)
+
+
+SQL_MYSQL = {
+    'cursos': """
+        SELECT c.id, c.titulo, c.descripcion, c.is_published, c.instructor_id,
+               MATCH (c.titulo, c.descripcion) AGAINST (%s IN BOOLEAN MODE) AS puntaje
+        FROM cursos c
+        WHERE MATCH (c.titulo, c.descripcion) AGAINST (%s IN BOOLEAN MODE) {filtro}
+        ORDER BY puntaje DESC, c.id ASC
+        LIMIT %s OFFSET %s
+    """,
+    'lecciones': """
+        SELECT l.id, l.titulo, l.modulo_id, m.curso_id, c.titulo AS curso_titulo,
+               MATCH (l.titulo, l.contenido) AGAINST (%s IN BOOLEAN MODE) AS puntaje
+        FROM lecciones l
+        JOIN modulos m ON m.id = l.modulo_id
+        JOIN cursos c ON c.id = m.curso_id
+        WHERE MATCH (l.titulo, l.contenido) AGAINST (%s IN BOOLEAN MODE) {filtro}
+        ORDER BY puntaje DESC, l.id ASC
+        LIMIT %s OFFSET %s
+    """,
+}
+
+# bm25() retorna valores negativos (más negativo = más relevante), por eso se invierte
+SQL_SQLITE = {
+    'cursos': """
+        SELECT c.id, c.titulo, c.descripcion, c.is_published, c.instructor_id,
+               -bm25(cursos_fts) AS puntaje
+        FROM cursos_fts
+        JOIN cursos c ON c.id = cursos_fts.rowid
+        WHERE cursos_fts MATCH %s {filtro}
+        ORDER BY puntaje DESC, c.id ASC
+        LIMIT %s OFFSET %s
+    """,
+    'lecciones': """
+        SELECT l.id, l.titulo, l.modulo_id, m.curso_id, c.titulo AS curso_titulo,
+               -bm25(lecciones_fts) AS puntaje
+        FROM lecciones_fts
+        JOIN lecciones l ON l.id = lecciones_fts.rowid
+        JOIN modulos m ON m.id = l.modulo_id
+        JOIN cursos c ON c.id = m.curso_id
+        WHERE lecciones_fts MATCH %s {filtro}
+        ORDER BY puntaje DESC, l.id ASC
+        LIMIT %s OFFSET %s
+    """,
+}
+
+
+def buscar(conn, tipo, terminos, limite, desplazamiento=0, is_published=None):
+    """
+    Busca 'terminos' en cursos o lecciones y retorna una página de filas
+    (diccionarios) ordenadas por relevancia.
+    """
+    filtro = "" if is_published is None else "AND c.is_published = %s"
+    if conexion.BACKEND_CONFIG['tipo'] == 'sqlite':
+        sql = SQL_SQLITE[tipo]
+        params = [_expresion_sqlite(terminos)]
+    else:
+        sql = SQL_MYSQL[tipo]
+        expresion = _expresion_mysql(terminos)
+        params = [expresion, expresion]
+    if is_published is not None:
+        params.append(is_published)
+    params += [limite, desplazamiento]
+
+    cursor = conn.cursor()
+    cursor.execute(sql.format(filtro=filtro), tuple(params))
+    filas = MapaColumnas.de_cursor(cursor).filas(cursor.fetchall())
+    cursor.close()
+    for fila in filas:
+        fila['puntaje'] = round(float(fila['puntaje']), 6)
+    return filas
@@ -0,0 +1,288 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from versiones import FORMATO_RESPUESTAS
+
+# --- Caché de árboles de cursos publicados ---
+# Un curso publicado ya no se puede editar, borrar ni ampliar, así que su
+# árbol (curso + módulos + lecciones) serializado es prácticamente inmutable.
+# Lo único que cambia es el nombre del instructor, y eso sube la revisión del
+# curso; importar un catálogo cambia la generación (ver versiones.py). Cada
+# entrada guarda la versión (generación + revisión) con la que se armó y
+# get_curso solo la usa si sigue siendo la actual, así un proceso no entrega un
+# árbol que otro proceso ya dejó viejo.
+# Lo guardamos en dos niveles:
+#   1. Un LRU en memoria del proceso, limitado por número de entradas, bytes y TTL.
+#   2. Opcionalmente un backend compartido entre procesos (Redis, o BackendMemoria
+#      como sustituto local para desarrollo y pruebas).
+
+CACHE_CONFIG = {
+    'max_entradas': 1000,               # Árboles guardados como máximo en el LRU local
+    'max_bytes': 64 * 1024 * 1024,      # Tamaño total máximo del LRU local
+    'max_bytes_entrada': 4 * 1024 * 1024,  # Árboles más grandes no se guardan
+    'ttl': 3600,                        # Segundos que vive una entrada
+    'backend': None,                    # Backend compartido opcional (ver abajo)
+}
+
+# Variantes de un mismo curso que se guardan por separado (ver ?fields= en get_curso).
+VARIANTES = ('full', 'outline')
+
+
+# --- 1. LRU local con límites de tamaño y TTL ---
+class CacheLRU:
+    """LRU seguro para hilos. Guarda valores bytes y cuenta aciertos, fallos y expulsiones."""
+
+    def __init__(self, max_entradas=1000, max_bytes=64 * 1024 * 1024, ttl=3600):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._datos = OrderedDict()  # clave -> (valor, expira_en)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expiradas': 0, 'invalidaciones': 0}
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self._stats['misses'] += 1
+                return None
+            valor, expira_en = entrada
+            if expira_en < time.monotonic():
+                self._quitar(clave)
+                self._stats['expiradas'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._datos.move_to_end(clave)
+            self._stats['hits'] += 1
+            return valor
+
+    def guardar(self, clave, valor, ttl=None):
+        expira_en = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            if clave in self._datos:
+                self._quitar(clave)
+            self._datos[clave] = (valor, expira_en)
+            self._bytes += len(valor)
+            # Expulsamos las entradas usadas hace más tiempo hasta volver a los límites
+            while len(self._datos) > self.max_entradas or self._bytes > self.max_bytes:
+                clave_vieja = next(iter(self._datos))
+                self._quitar(clave_vieja)
+                self._stats['evictions'] += 1
+
+    def eliminar(self, clave):
+        with self._lock:
+            if clave in self._datos:
+                self._quitar(clave)
+                self._stats['invalidaciones'] += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._stats['invalidaciones'] += len(self._datos)
+            self._datos.clear()
+            self._bytes = 0
+
+    def estadisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entradas'] = len(self._datos)
+            stats['bytes'] = self._bytes
+        return stats
+
+    def _quitar(self, clave):
+        valor, _ = self._datos.pop(clave)
+        self._bytes -= len(valor)
+
+
+# --- 2. Backends compartidos ---
+# Cualquier objeto con obtener(clave), guardar(clave, valor, ttl), eliminar(clave)
+# y limpiar() sirve como backend compartido.
+class BackendMemoria:
+    """
+    Sustituto local de un backend compartido (mismo contrato que BackendRedis).
+    Útil en desarrollo y pruebas cuando no hay un servidor Redis disponible.
+    """
+
+    def __init__(self):
+        self._datos = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            valor, expira_en = entrada
+            if expira_en < time.monotonic():
+                del self._datos[clave]
+                return None
+            return valor
+
+    def guardar(self, clave, valor, ttl):
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + ttl)
+
+    def eliminar(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+
+class BackendRedis:
+    """Backend compartido entre procesos y servidores. Requiere el paquete 'redis'."""
+
+    def __init__(self, url='redis://localhost:6379/0', prefijo='plataforma:'):
+        import redis  # Solo se necesita si se usa este backend
+        self._cliente = redis.Redis.from_url(url)
+        self._prefijo = prefijo
+
+    def obtener(self, clave):
+        return self._cliente.get(self._prefijo + clave)
+
+    def guardar(self, clave, valor, ttl):
+        self._cliente.set(self._prefijo + clave, valor, ex=int(ttl))
+
+    def eliminar(self, clave):
+        self._cliente.delete(self._prefijo + clave)
+
+    def limpiar(self):
+        claves = list(self._cliente.scan_iter(self._prefijo + '*'))
+        if claves:
+            self._cliente.delete(*claves)
+
+
+# --- 3. Caché de cursos (LRU local + backend compartido opcional) ---
+class CacheCursos:
+    """
+    Caché de dos niveles para los árboles serializados de los cursos publicados.
+    Cada entrada guarda el cuerpo JSON (también ya comprimido con gzip/brotli)
+    junto con sus cabeceras de validación (ETag, Last-Modified...) y la versión
+    del árbol, así un acierto solo necesita leer la versión actual para responder
+    (o responder 304) y no vuelve a comprimir.
+    """
+
+    def __init__(self, max_entradas, max_bytes, max_bytes_entrada, ttl, backend=None):
+        self.local = CacheLRU(max_entradas, max_bytes, ttl)
+        self.backend = backend
+        self.max_bytes_entrada = max_bytes_entrada
+        self.ttl = ttl
+        self._stats_backend = {'hits_backend': 0, 'errores_backend': 0}
+
+    @staticmethod
+    def _clave(curso_id, variante):
+        # Con el formato en la clave, un backend compartido no entrega árboles con el formato anterior
+        return f"curso:{curso_id}:{variante}:f{FORMATO_RESPUESTAS}"
+
+    # Los backends solo guardan bytes: la primera línea lleva la versión, las cabeceras y el
+    # tamaño de cada cuerpo (sin comprimir y precomprimidos, ver compresion.py),
+    # y después van los cuerpos uno tras otro.
+    @staticmethod
+    def _empaquetar(version, cabeceras, cuerpos):
+        tamanos = [[codificacion, len(cuerpo)] for codificacion, cuerpo in cuerpos.items()]
+        indice = {'version': version, 'cabeceras': cabeceras, 'cuerpos': tamanos}
+        return json.dumps(indice, separators=(',', ':')).encode('utf-8') + b'\n' + b''.join(cuerpos.values())
+
+    @staticmethod
+    def _desempaquetar(valor):
+        primera_linea, datos = valor.split(b'\n', 1)
+        indice = json.loads(primera_linea)
+        cuerpos = {}
+        inicio = 0
+        for codificacion, tamano in indice['cuerpos']:
+            cuerpos[codificacion] = datos[inicio:inicio + tamano]
+            inicio += tamano
+        return indice['version'], indice['cabeceras'], cuerpos
+
+    def obtener(self, curso_id, variante):
+        """Retorna (version, cabeceras, cuerpos) o None si el árbol no está guardado. Ver guardar()."""
+        clave = self._clave(curso_id, variante)
+        valor = self.local.obtener(clave)
+        if valor is None and self.backend is not None:
+            try:
+                valor = self.backend.obtener(clave)
+            except Exception:
+                self._stats_backend['errores_backend'] += 1
+                return None
+            if valor is not None:
+                # Lo subimos al LRU local para no volver a preguntar al backend
+                self._stats_backend['hits_backend'] += 1
+                self.local.guardar(clave, valor)
+        if valor is None:
+            return None
+        try:
+            return self._desempaquetar(valor)
+        except (ValueError, KeyError, TypeError):
+            # Entrada con un formato anterior (por ejemplo, en Redis tras un despliegue)
+            return None
+
+    def guardar(self, curso_id, variante, version, cuerpos, cabeceras):
+        """
+        'version' identifica el árbol guardado (versiones.version_arbol). 'cuerpos' es un
+        diccionario {codificacion: bytes} con al menos 'identity' (el JSON sin
+        comprimir) y opcionalmente 'gzip' y 'br' (ver compresion.precomprimir).
+        """
+        if len(cuerpos['identity']) > self.max_bytes_entrada:
+            return
+        valor = self._empaquetar(version, cabeceras, cuerpos)
+        clave = self._clave(curso_id, variante)
+        self.local.guardar(clave, valor)
+        if self.backend is not None:
+            try:
+                self.backend.guardar(clave, valor, self.ttl)
+            except Exception:
+                self._stats_backend['errores_backend'] += 1
+
+    def invalidar(self, curso_id):
+        """Borra todas las variantes guardadas de un curso."""
+        for variante in VARIANTES:
+            clave = self._clave(curso_id, variante)
+            self.local.eliminar(clave)
+            if self.backend is not None:
+                try:
+                    self.backend.eliminar(clave)
+                except Exception:
+                    self._stats_backend['errores_backend'] += 1
+
+    def invalidar_todo(self):
+        self.local.limpiar()
+        if self.backend is not None:
+            try:
+                self.backend.limpiar()
+            except Exception:
+                self._stats_backend['errores_backend'] += 1
+
+    def estadisticas(self):
+        stats = self.local.estadisticas()
+        stats.update(self._stats_backend)
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def configurar_cache(**opciones):
+    """Cambia los parámetros de la caché (ver CACHE_CONFIG). Descarta lo guardado en el LRU local."""
+    global _cache
+    with _cache_lock:
+        CACHE_CONFIG.update(opciones)
+        _cache = None
+
+
+def obtener_cache():
+    """Retorna la caché global de cursos, creándola la primera vez que se usa."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CacheCursos(**CACHE_CONFIG)
+    return _cache
+
+
+def estadisticas_cache():
+    return obtener_cache().estadisticas()
@@ -0,0 +1,338 @@
+# catalogo.py
+# Exportación e importación del catálogo completo: instructores, cursos, módulos y lecciones.
+#
+# Uso:
+#   python catalogo.py exportar catalogo.ndjson.gz     # .gz: comprimido con gzip
+#   python catalogo.py exportar - > catalogo.ndjson    # '-': salida estándar
+#   python catalogo.py importar catalogo.ndjson.gz --lote 1000 --commit-cada 10
+#
+# También por HTTP: GET /api/catalog/export y POST /api/catalog/import (ver routes/catalogo.py).
+#
+# Formato (NDJSON, una línea JSON por registro):
+#   {"formato": "plataforma-catalogo", "version": 1}
+#   {"tabla": "instructores", "columnas": ["id", "nombre", "email", ...]}
+#   [1, "Ana Pérez", "ana.1@example.com", ...]          <- una fila, en el orden de "columnas"
+#   ...
+#   {"tabla": "cursos", "columnas": [...]}
+#   ...
+#   {"fin": {"instructores": 100, "cursos": 100, ...}}  <- filas de cada tabla
+# Los nombres de las columnas van una sola vez por tabla y cada fila es un arreglo,
+# así el archivo ocupa casi lo mismo que un formato por columnas sin necesitar
+# otra biblioteca, y se puede leer y escribir fila por fila.
+#
+# Las tablas van en el orden de las claves foráneas de database.sql (cada una
+# solo apunta a las anteriores) y con sus ids, así la importación inserta cada
+# fila cuando su padre ya existe. Las columnas son las de seed.py más la versión
+# de cada fila. Al importar se verifican los contadores de resumen y se corrigen
+# los que no coincidan con las filas (ver contadores.py).
+#
+# Exportar e importar usan memoria constante: se lee y se escribe por lotes,
+# sin tener una tabla entera en memoria.
+import argparse
+import gzip
+import json
+import sys
+import time
+from datetime import date, datetime
+
+import contadores
+import seed
+from serializacion import dumps_bytes
+from versiones import SQL_NUEVA_GENERACION
+
+FORMATO = 'plataforma-catalogo'
+VERSION_FORMATO = 1
+
+# Orden de las claves foráneas: instructores <- cursos <- modulos <- lecciones
+TABLAS = ('instructores', 'cursos', 'modulos', 'lecciones')
+
+# Las columnas de seed.py más los contadores de resumen (ver contadores.py) y las que
+# guardan la versión de cada fila (ver versiones.py): un catálogo importado responde
+# con los mismos ETag que el original.
+COLUMNAS = {
+    'instructores': seed.COLUMNAS['instructores'] + ('curso_count', 'publicado_count',
+                                                     'created_at', 'revision', 'updated_at'),
+    'cursos': seed.COLUMNAS['cursos'] + ('modulo_count', 'leccion_count', 'revision', 'updated_at'),
+    'modulos': seed.COLUMNAS['modulos'],
+    'lecciones': seed.COLUMNAS['lecciones'] + ('revision', 'updated_at'),
+}
+
+# Un CDN delante de la API no se entera de la importación (los cursos publicados
+# llevan s-maxage de un año, ver versiones.py): lo recuerdan la CLI y POST /api/catalog/import.
+AVISO_CDN = "Si hay un CDN delante de la API, purgue los cursos: los ids del catálogo anterior se reutilizaron."
+
+
+class CatalogoInvalido(ValueError):
+    """El archivo no se puede importar. 'status' es el código HTTP a responder."""
+
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+def _linea(obj):
+    return dumps_bytes(obj) + b'\n'
+
+
+def _valor(valor):
+    # Las fechas van en el formato que aceptan MySQL y SQLite al insertarlas
+    if isinstance(valor, (datetime, date)):
+        return valor.strftime('%Y-%m-%d %H:%M:%S')
+    return valor
+
+
+# --- 1. Exportación ---
+def exportar(conn, lote=1000, progreso=None):
+    """
+    Genera el archivo del catálogo como líneas (bytes), leyendo cada tabla por lotes.
+    Todas las tablas se leen en una misma transacción de solo lectura, así el
+    archivo es una foto consistente aunque la aplicación siga escribiendo.
+    'progreso' recibe (tabla, filas, terminada) después de cada lote.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    conn.start_transaction(consistent_snapshot=True, readonly=True)
+    try:
+        yield _linea({'formato': FORMATO, 'version': VERSION_FORMATO})
+        totales = {}
+        for tabla in TABLAS:
+            columnas = COLUMNAS[tabla]
+            yield _linea({'tabla': tabla, 'columnas': columnas})
+            # Cursor sin buffer: las filas llegan del servidor a medida que se piden
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {', '.join(columnas)} FROM {tabla} ORDER BY id ASC")
+            total = 0
+            while True:
+                filas = cursor.fetchmany(lote)
+                if not filas:
+                    break
+                yield b''.join(_linea([_valor(valor) for valor in fila]) for fila in filas)
+                total += len(filas)
+                if progreso:
+                    progreso(tabla, total, False)
+            cursor.close()
+            totales[tabla] = total
+            if progreso:
+                progreso(tabla, total, True)
+        yield _linea({'fin': totales})
+    finally:
+        # Solo se leyó: rollback termina la transacción sin costo
+        conn.rollback()
+
+
+# --- 2. Importación ---
+def _verificar_vacias(conn):
+    # Los ids del archivo se insertan tal cual: en una base con datos chocarían
+    cursor = conn.cursor()
+    try:
+        for tabla in TABLAS:
+            cursor.execute(f"SELECT id FROM {tabla} LIMIT 1")
+            if cursor.fetchone() is not None:
+                raise CatalogoInvalido(f"La tabla '{tabla}' ya tiene datos: el catálogo se importa en una base vacía", 409)
+    finally:
+        cursor.close()
+    conn.commit()
+
+
+def _nueva_generacion(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_NUEVA_GENERACION)
+    finally:
+        cursor.close()
+    conn.commit()
+
+
+def _leer_registros(lineas):
+    """Genera (número de línea, registro) de cada línea no vacía del archivo."""
+    for numero, linea in enumerate(lineas, 1):
+        if not linea.strip():
+            continue
+        try:
+            yield numero, json.loads(linea)
+        except ValueError:
+            raise CatalogoInvalido(f"Línea {numero}: no es JSON válido")
+
+
+def _encabezado_tabla(numero, registro, tabla_anterior):
+    """Valida la línea que abre una tabla. Retorna (tabla, columnas)."""
+    tabla = registro['tabla']
+    if tabla not in TABLAS:
+        raise CatalogoInvalido(f"Línea {numero}: tabla desconocida '{tabla}'")
+    if tabla_anterior is not None and TABLAS.index(tabla) <= TABLAS.index(tabla_anterior):
+        # Una tabla que llega antes que la tabla a la que apunta no se puede insertar
+        raise CatalogoInvalido(f"Línea {numero}: '{tabla}' debe ir antes que '{tabla_anterior}' "
+                               f"(orden: {', '.join(TABLAS)})")
+    columnas = registro.get('columnas')
+    # Los nombres de las columnas van dentro del INSERT: solo se aceptan los conocidos
+    if (not isinstance(columnas, list) or 'id' not in columnas
+            or len(set(columnas)) != len(columnas) or not set(columnas) <= set(COLUMNAS[tabla])):
+        raise CatalogoInvalido(f"Línea {numero}: columnas no válidas para '{tabla}' "
+                               f"(se aceptan: {', '.join(COLUMNAS[tabla])})")
+    return tabla, columnas
+
+
+def importar(conn, lineas, lote=1000, commit_cada=10, progreso=None):
+    """
+    Importa un archivo del catálogo en una base de datos vacía. 'lineas' es
+    cualquier iterable de líneas (un archivo abierto, el cuerpo de un request).
+    Inserta por lotes de 'lote' filas con un INSERT de varias filas y hace commit
+    cada 'commit_cada' lotes. Retorna {tabla: filas importadas}.
+    Lanza CatalogoInvalido si el archivo no es válido; lo insertado hasta el último
+    commit queda en la base (se vacían las tablas y se vuelve a importar).
+    """
+    _verificar_vacias(conn)
+    # Nueva generación antes y después de insertar: los procesos de la API descartan lo
+    # que guardaron del catálogo anterior (ver versiones.py), y también lo que hayan
+    # leído a mitad de la importación.
+    _nueva_generacion(conn)
+    registros = _leer_registros(lineas)
+    numero, encabezado = next(registros, (0, None))
+    if not isinstance(encabezado, dict) or encabezado.get('formato') != FORMATO:
+        raise CatalogoInvalido("El archivo no es un catálogo exportado (falta la primera línea con 'formato')")
+    if encabezado.get('version') != VERSION_FORMATO:
+        raise CatalogoInvalido(f"Versión de formato no soportada: {encabezado.get('version')}")
+
+    cursor = conn.cursor()
+    totales = {}
+    tabla = columnas = sql = None
+    filas = []
+    lotes_sin_commit = 0
+
+    def insertar_lote():
+        nonlocal filas, lotes_sin_commit
+        if not filas:
+            return
+        cursor.executemany(sql, filas)
+        totales[tabla] += len(filas)
+        filas = []
+        lotes_sin_commit += 1
+        if lotes_sin_commit >= commit_cada:
+            conn.commit()
+            lotes_sin_commit = 0
+        if progreso:
+            progreso(tabla, totales[tabla], False)
+
+    try:
+        fin = None
+        for numero, registro in registros:
+            if fin is not None:
+                raise CatalogoInvalido(f"Línea {numero}: hay datos después de la línea final")
+            if isinstance(registro, list):
+                if tabla is None:
+                    raise CatalogoInvalido(f"Línea {numero}: fila antes de la línea que abre su tabla")
+                if len(registro) != len(columnas):
+                    raise CatalogoInvalido(f"Línea {numero}: se esperaban {len(columnas)} valores en '{tabla}'")
+                filas.append(tuple(registro))
+                if len(filas) >= lote:
+                    insertar_lote()
+            elif isinstance(registro, dict) and 'tabla' in registro:
+                insertar_lote()
+                if tabla is not None and progreso:
+                    progreso(tabla, totales[tabla], True)
+                tabla, columnas = _encabezado_tabla(numero, registro, tabla)
+                sql = (f"INSERT INTO {tabla} ({', '.join(columnas)}) "
+                       f"VALUES ({', '.join(['%s'] * len(columnas))})")
+                totales[tabla] = 0
+            elif isinstance(registro, dict) and 'fin' in registro:
+                insertar_lote()
+                if tabla is not None and progreso:
+                    progreso(tabla, totales[tabla], True)
+                fin = registro['fin']
+            else:
+                raise CatalogoInvalido(f"Línea {numero}: registro desconocido")
+
+        if fin is None:
+            raise CatalogoInvalido("El archivo está incompleto (falta la línea final)")
+        esperadas = {t: fin.get(t, 0) for t in TABLAS if fin.get(t, 0) or t in totales}
+        if esperadas != {t: totales.get(t, 0) for t in esperadas}:
+            raise CatalogoInvalido(f"El archivo está incompleto: se esperaban {esperadas} filas, "
+                                   f"se leyeron {totales}")
+        cursor.execute(SQL_NUEVA_GENERACION)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    # Las filas no pasaron por las rutas: un archivo editado a mano puede traer contadores que no coinciden
+    contadores.reconstruir(conn, lote=lote, salida=None)
+    return totales
+
+
+# --- 3. Progreso ---
+class Progreso:
+    """Muestra las filas procesadas de cada tabla (como mucho dos veces por segundo) y un resumen al terminarla."""
+
+    def __init__(self, verbo, salida=sys.stderr):
+        self.verbo = verbo
+        self.salida = salida
+        self._inicio = {}
+        self._desde = self._ultimo = time.perf_counter()  # Una tabla empieza cuando termina la anterior
+        self._ancho = 0
+
+    def __call__(self, tabla, filas, terminada):
+        ahora = time.perf_counter()
+        segundos = max(ahora - self._inicio.setdefault(tabla, self._desde), 1e-3)
+        if terminada:
+            mensaje = (f"-> {filas} filas {self.verbo} en '{tabla}' en {segundos:.1f} s "
+                       f"({filas / segundos:.0f} filas/s).")
+            print('\r' + mensaje.ljust(self._ancho), file=self.salida)
+            self._desde = ahora
+            self._ancho = 0
+        elif ahora - self._ultimo >= 0.5:
+            mensaje = f"   {tabla}: {filas} filas ({filas / segundos:.0f} filas/s)..."
+            print('\r' + mensaje, end='', file=self.salida, flush=True)
+            self._ultimo = ahora
+            self._ancho = len(mensaje)
+
+
+def _abrir(ruta, modo):
+    """Abre 'ruta' en binario; '-' es la entrada o salida estándar y '.gz' se comprime con gzip."""
+    if ruta == '-':
+        return sys.stdin.buffer if 'r' in modo else sys.stdout.buffer
+    if ruta.endswith('.gz'):
+        return gzip.open(ruta, modo + 'b')
+    return open(ruta, modo + 'b')
+
+
+if __name__ == '__main__':
+    import configuracion
+    import conexion
+
+    parser = argparse.ArgumentParser(description="Exporta o importa el catálogo completo en NDJSON.")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    for nombre, ayuda in (('exportar', "Escribe el catálogo en un archivo"),
+                          ('importar', "Carga un archivo exportado en una base vacía")):
+        comando = comandos.add_parser(nombre, help=ayuda)
+        comando.add_argument('archivo', help="Ruta del archivo ('-' para stdin/stdout; '.gz' para gzip)")
+        comando.add_argument('--lote', type=int, default=1000, help="Filas por lectura o por INSERT")
+    comandos.choices['importar'].add_argument('--commit-cada', type=int, default=10, help="Lotes entre cada commit")
+    args = parser.parse_args()
+
+    configuracion.aplicar_entorno()
+    conn = conexion.get_db_connection()
+    if conn is None:
+        print("No se pudo conectar a la base de datos.", file=sys.stderr)
+        sys.exit(1)
+    inicio = time.perf_counter()
+    try:
+        if args.comando == 'exportar':
+            archivo = _abrir(args.archivo, 'w')
+            for parte in exportar(conn, args.lote, Progreso('exportadas')):
+                archivo.write(parte)
+            archivo.flush()
+        else:
+            archivo = _abrir(args.archivo, 'r')
+            importar(conn, archivo, args.lote, args.commit_cada, Progreso('importadas'))
+        if archivo not in (sys.stdin.buffer, sys.stdout.buffer):
+            archivo.close()
+    except CatalogoInvalido as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        conn.close()
+    print(f"Listo en {time.perf_counter() - inicio:.1f} s.", file=sys.stderr)
+    if args.comando == 'importar':
+        print(AVISO_CDN, file=sys.stderr)
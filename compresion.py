@@ -0,0 +1,153 @@
+import re
+import zlib
+
+from flask import request
+
+try:
+    import brotli  # Opcional: sin él solo se ofrece gzip
+except ImportError:
+    brotli = None
+
+# --- Compresión de las respuestas (gzip / brotli) ---
+# Las respuestas JSON se comprimen según la cabecera Accept-Encoding del cliente:
+#   - Respuestas normales: solo si el cuerpo tiene al menos 'min_bytes' (comprimir
+#     un cuerpo pequeño cuesta CPU y casi no ahorra bytes).
+#   - Respuestas por partes (árbol de un curso, ?stream=): se comprimen a medida
+#     que se generan; cada parte se envía en cuanto está comprimida (SYNC_FLUSH),
+#     así el cliente sigue recibiendo el NDJSON fila por fila.
+#   - Árboles de cursos publicados: se guardan en la caché ya comprimidos
+#     (ver precomprimir() y get_curso), así el costo se paga una sola vez.
+#
+# Cada codificación es una representación distinta: su ETag lleva el sufijo
+# '-gzip' o '-br' y las respuestas llevan 'Vary: Accept-Encoding' para que los
+# CDN guarden una copia por codificación. Al revisar If-None-Match el sufijo se
+# quita (ver versiones.py), así un 304 sirve para cualquier codificación.
+
+COMPRESION_CONFIG = {
+    'activa': True,
+    'min_bytes': 1024,                  # Cuerpos más pequeños se envían sin comprimir
+    'tipos': ('application/json', 'application/x-ndjson'),
+    'nivel_gzip': 6,                    # Por request: equilibrio entre CPU y tamaño
+    'calidad_brotli': 4,
+    'nivel_gzip_precomprimido': 9,      # Una vez por árbol guardado en la caché: máxima compresión
+    'calidad_brotli_precomprimido': 9,  # 10-11 comprimen algo más pero son muy lentos
+}
+
+# En orden de preferencia cuando el cliente acepta varias con la misma calidad
+CODIFICACIONES = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+_SUFIJO_ETAG = re.compile(r'-(?:br|gzip)(?=")')
+
+
+# --- 1. Negociación ---
+def elegir_codificacion(opciones=CODIFICACIONES):
+    """Mejor codificación de 'opciones' según Accept-Encoding, o None para enviar sin comprimir."""
+    if not COMPRESION_CONFIG['activa']:
+        return None
+    return request.accept_encodings.best_match([c for c in opciones if c in CODIFICACIONES])
+
+
+def etag_con_codificacion(etag, codificacion):
+    return f"{etag}-{codificacion}"
+
+
+def quitar_codificacion(if_none_match):
+    """Valor de If-None-Match sin los sufijos '-gzip'/'-br' de las ETag."""
+    return _SUFIJO_ETAG.sub('', if_none_match)
+
+
+# --- 2. Compresores ---
+def comprimir(datos, codificacion, precomprimido=False):
+    """Comprime 'datos' (bytes) de una sola vez."""
+    if codificacion == 'br':
+        calidad = COMPRESION_CONFIG['calidad_brotli_precomprimido' if precomprimido else 'calidad_brotli']
+        return brotli.compress(datos, quality=calidad)
+    nivel = COMPRESION_CONFIG['nivel_gzip_precomprimido' if precomprimido else 'nivel_gzip']
+    compresor = zlib.compressobj(nivel, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    return compresor.compress(datos) + compresor.flush()
+
+
+def precomprimir(cuerpo):
+    """
+    Diccionario {codificacion: bytes} con el cuerpo sin comprimir ('identity') y
+    comprimido con cada codificación disponible, para guardarlo en la caché.
+    """
+    cuerpos = {'identity': cuerpo}
+    if COMPRESION_CONFIG['activa'] and len(cuerpo) >= COMPRESION_CONFIG['min_bytes']:
+        for codificacion in CODIFICACIONES:
+            cuerpos[codificacion] = comprimir(cuerpo, codificacion, precomprimido=True)
+    return cuerpos
+
+
+def _comprimir_partes(partes, codificacion):
+    """Comprime un iterable de partes (str o bytes) sin juntarlas, enviando cada una al terminarla."""
+    if codificacion == 'br':
+        compresor = brotli.Compressor(quality=COMPRESION_CONFIG['calidad_brotli'])
+        comprimir_parte = lambda parte: compresor.process(parte) + compresor.flush()
+        terminar = compresor.finish
+    else:
+        compresor = zlib.compressobj(COMPRESION_CONFIG['nivel_gzip'], zlib.DEFLATED, 31)
+        comprimir_parte = lambda parte: compresor.compress(parte) + compresor.flush(zlib.Z_SYNC_FLUSH)
+        terminar = compresor.flush
+    try:
+        for parte in partes:
+            if isinstance(parte, str):
+                parte = parte.encode('utf-8')
+            if parte:
+                yield comprimir_parte(parte)
+        yield terminar()
+    finally:
+        # Al cerrar la respuesta se cierra también el generador original (stream_with_context)
+        if hasattr(partes, 'close'):
+            partes.close()
+
+
+# --- 3. Integración con Flask ---
+def _comprimir_respuesta(respuesta):
+    if respuesta.status_code == 304:
+        _etag_de_304(respuesta)
+        return respuesta
+    if respuesta.mimetype not in COMPRESION_CONFIG['tipos']:
+        return respuesta
+    respuesta.vary.add('Accept-Encoding')
+    if respuesta.status_code != 200 or respuesta.direct_passthrough:
+        return respuesta
+
+    # Si la ruta ya envía un cuerpo comprimido (caché) solo falta ajustar la ETag
+    codificacion = respuesta.headers.get('Content-Encoding')
+    if codificacion is None:
+        codificacion = elegir_codificacion()
+        if codificacion is None:
+            return respuesta
+        if respuesta.is_streamed:
+            respuesta.response = _comprimir_partes(respuesta.response, codificacion)
+            respuesta.headers.pop('Content-Length', None)
+        else:
+            datos = respuesta.get_data()
+            if len(datos) < COMPRESION_CONFIG['min_bytes']:
+                return respuesta
+            respuesta.set_data(comprimir(datos, codificacion))
+        respuesta.headers['Content-Encoding'] = codificacion
+
+    etag, debil = respuesta.get_etag()
+    if etag and codificacion in CODIFICACIONES:
+        respuesta.set_etag(etag_con_codificacion(etag, codificacion), debil)
+    return respuesta
+
+
+def _etag_de_304(respuesta):
+    """Un 304 lleva la ETag de la representación que tiene el cliente (con o sin sufijo)."""
+    etag, debil = respuesta.get_etag()
+    if not etag:
+        return
+    respuesta.vary.add('Accept-Encoding')
+    for codificacion in CODIFICACIONES:
+        etag_codificada = etag_con_codificacion(etag, codificacion)
+        if request.if_none_match.contains_weak(etag_codificada):
+            respuesta.set_etag(etag_codificada, debil)
+            return
+
+
+def init_app(app):
+    """Comprime las respuestas JSON de la aplicación según Accept-Encoding."""
+    app.after_request(_comprimir_respuesta)
@@ -1,26 +1,677 @@
-import mysql.connector
-from mysql.connector import Error
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
 
-def get_db_connection():
+from flask import g, has_app_context, has_request_context, request
+
+import metricas
+from instrumentacion import CursorInstrumentado
+
+logger = logging.getLogger('plataforma.db')
+
+# --- 1. Configuración de la Base de Datos ---
+# --- ¡CONFIGURA TUS DATOS AQUÍ! ---
+# Reemplaza los valores si tu configuración de MySQL es diferente.
+DB_CONFIG = {
+    'host': 'localhost',             # El servidor de tu base de datos, casi siempre 'localhost'
+    'user': 'root',                  # Tu nombre de usuario de MySQL (por defecto es 'root')
+    'password': '',                  # Tu contraseña de MySQL (por defecto suele estar vacía)
+    'database': 'plataforma_cursos'  # El nombre de la base de datos que creamos
+}
+
+# Motor de base de datos: 'mysql' (producción) o 'sqlite' (sustituto local para
+# benchmarks y pruebas sin servidor MySQL, ver conexion_sqlite.py).
+BACKEND_CONFIG = {
+    'tipo': 'mysql',
+    'ruta': 'plataforma_cursos.db',  # Archivo usado solo con 'sqlite'
+}
+
+# Parámetros del pool de conexiones (se pueden cambiar con configurar_pool()).
+POOL_CONFIG = {
+    'tamano': 5,            # Conexiones que se mantienen abiertas y listas para reutilizar
+    'max_overflow': 10,     # Conexiones extra permitidas en picos (se cierran al devolverse)
+    'timeout': 30.0,        # Segundos máximos esperando una conexión libre
+    'reciclar': 1800,       # Segundos de vida máxima de una conexión antes de reabrirla
+    'verificar_tras': 30,   # Segundos inactiva tras los cuales se hace ping antes de usarla
+    'precalentar': 0,       # Conexiones que se abren al crear la app (0: con el primer request, ver precalentar_pool)
+}
+
+
+# Réplicas de solo lectura (ver sección 5). Sin réplicas todo va a la primaria.
+REPLICAS_CONFIG = {
+    'replicas': [],                 # 'host' o 'host:puerto' (mysql), 'archivo.db' (sqlite) o un dict de opciones
+    'lectura_propia': 5,            # Segundos que un cliente lee de la primaria después de escribir
+    'cookie': 'plataforma_escritura',
+    'fallos_para_expulsar': 3,      # Errores de conexión seguidos antes de sacar una réplica
+    'expulsion': 30,                # Segundos que una réplica queda fuera antes de volver a probarla
+    'max_retraso': 10,              # Segundos de retraso de replicación tolerados (solo mysql; None: no se mide)
+    'medir_retraso_cada': 5,        # Segundos entre mediciones del retraso de cada réplica
+}
+
+
+class PoolAgotadoError(Exception):
+    """Se lanza cuando no hay conexiones libres tras esperar 'timeout' segundos."""
+
+
+# --- 2. Conexión devuelta por el pool ---
+class ConexionPool:
+    """
+    Envoltorio de una conexión real de MySQL.
+    Se comporta igual que la conexión (cursor, commit, rollback...), pero
+    close() la devuelve al pool en lugar de cerrar el socket.
+    """
+
+    def __init__(self, pool, conn, creada_en):
+        self._pool = pool
+        self._conn = conn
+        self._creada_en = creada_en
+        self._por_request = False  # True si la conexión pertenece al request actual (Flask g)
+        self._devuelta = False
+        self._entregada_en = time.monotonic()
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+    def cursor(self, *args, **kwargs):
+        # Cada consulta queda medida (ver instrumentacion.py)
+        return CursorInstrumentado(self._conn.cursor(*args, **kwargs))
+
+    def close(self):
+        # Dentro de un request, la conexión se comparte entre todas las funciones
+        # del handler y se devuelve en el teardown, así que close() no hace nada.
+        if self._por_request:
+            return
+        self.liberar()
+
+    def liberar(self):
+        """Devuelve la conexión al pool (solo la primera vez que se llama)."""
+        if self._devuelta:
+            return
+        self._devuelta = True
+        metricas.observar('db_connection_held_seconds', time.monotonic() - self._entregada_en, self._pool.etiquetas)
+        self._pool.devolver(self._conn, self._creada_en)
+
+
+# --- 3. Pool de Conexiones ---
+class PoolConexiones:
+    """
+    Pool de conexiones seguro para hilos.
+    Mantiene hasta 'tamano' conexiones libres, permite 'max_overflow' extra en picos
+    y hace esperar como máximo 'timeout' segundos cuando todas están ocupadas.
+    'nombre' identifica al pool en /metrics (ver metricas.py).
+    """
+
+    def __init__(self, crear_conexion, tamano=5, max_overflow=10, timeout=30.0,
+                 reciclar=1800, verificar_tras=30, precalentar=0, nombre='primaria'):
+        self._crear_conexion = crear_conexion
+        self.etiquetas = (('pool', nombre),)
+        self.tamano = tamano
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.reciclar = reciclar
+        self.verificar_tras = verificar_tras
+        self.precalentar = precalentar
+
+        self._libres = deque()  # Tuplas (conexión, creada_en, usada_en)
+        self._abiertas = 0      # Conexiones abiertas (libres + en uso)
+        self._cond = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'esperas': 0,
+            'tiempo_espera_total': 0.0,
+            'tiempo_espera_max': 0.0,
+            'timeouts': 0,
+            'creadas': 0,
+            'recicladas': 0,
+            'descartadas': 0,
+        }
+
+    def obtener(self):
+        """Entrega una conexión del pool, creando una nueva si hace falta."""
+        inicio = time.monotonic()
+        espero = False
+        conn = None
+
+        with self._cond:
+            while True:
+                if self._libres:
+                    # LIFO: la conexión usada más recientemente es la que menos
+                    # probabilidades tiene de haber sido cortada por el servidor.
+                    conn, creada_en, usada_en = self._libres.pop()
+                    break
+                if self._abiertas < self.tamano + self.max_overflow:
+                    # Reservamos el hueco ahora y abrimos la conexión fuera del lock.
+                    self._abiertas += 1
+                    break
+                restante = self.timeout - (time.monotonic() - inicio)
+                if restante <= 0:
+                    self._stats['timeouts'] += 1
+                    metricas.sumar('db_connection_errors_total', self.etiquetas)
+                    raise PoolAgotadoError(
+                        f"No hay conexiones libres tras esperar {self.timeout} segundos")
+                espero = True
+                self._cond.wait(restante)
+
+            self._stats['checkouts'] += 1
+            if espero:
+                espera = time.monotonic() - inicio
+                self._stats['esperas'] += 1
+                self._stats['tiempo_espera_total'] += espera
+                self._stats['tiempo_espera_max'] = max(self._stats['tiempo_espera_max'], espera)
+
+        if conn is not None and not self._es_valida(conn, creada_en, usada_en):
+            conn = None
+
+        if conn is None:
+            try:
+                conn = self._crear_conexion()
+            except Exception:
+                self._liberar_hueco()
+                metricas.sumar('db_connection_errors_total', self.etiquetas)
+                raise
+            creada_en = time.monotonic()
+            with self._cond:
+                self._stats['creadas'] += 1
+            metricas.sumar('db_connections_opened_total', self.etiquetas)
+
+        metricas.observar('db_connection_checkout_seconds', time.monotonic() - inicio, self.etiquetas)
+        return ConexionPool(self, conn, creada_en)
+
+    def devolver(self, conn, creada_en):
+        """Recibe de vuelta una conexión. Deshace cualquier transacción a medias."""
+        reutilizable = True
+        try:
+            # Un SELECT también abre una transacción (y su snapshot), así que
+            # la cerramos para que el próximo request vea datos frescos.
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            reutilizable = False
+
+        with self._cond:
+            if reutilizable and len(self._libres) < self.tamano:
+                self._libres.append((conn, creada_en, time.monotonic()))
+                self._cond.notify()
+                return
+            if not reutilizable:
+                self._stats['descartadas'] += 1
+
+        # Conexión de overflow o rota: se cierra y se libera su hueco.
+        self._cerrar(conn)
+        self._liberar_hueco()
+
+    def estadisticas(self):
+        """Métricas del pool en un diccionario listo para jsonify."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['abiertas'] = self._abiertas
+            stats['libres'] = len(self._libres)
+            stats['en_uso'] = self._abiertas - len(self._libres)
+        stats['tamano'] = self.tamano
+        stats['max_overflow'] = self.max_overflow
+        return stats
+
+    def calentar(self, cantidad=None):
+        """
+        Deja 'cantidad' conexiones abiertas y libres (por defecto 'precalentar', como
+        máximo 'tamano'), así los primeros requests no esperan a conectarse.
+        Retorna cuántas quedaron listas.
+        """
+        cantidad = min(self.precalentar if cantidad is None else cantidad, self.tamano)
+        tomadas = []
+        try:
+            # Se toman todas a la vez: obtener() reusa las libres y abre las que falten
+            for _ in range(cantidad):
+                tomadas.append(self.obtener())
+        finally:
+            for conn in tomadas:
+                conn.liberar()
+        return len(tomadas)
+
+    def cerrar_todas(self):
+        """Cierra las conexiones libres (las que están en uso se cierran al devolverse)."""
+        with self._cond:
+            libres = list(self._libres)
+            self._libres.clear()
+            self._abiertas -= len(libres)
+            self._cond.notify_all()
+        for conn, _, _ in libres:
+            self._cerrar(conn)
+
+    # --- Funciones internas ---
+    def _es_valida(self, conn, creada_en, usada_en):
+        ahora = time.monotonic()
+        if ahora - creada_en > self.reciclar:
+            self._cerrar(conn)
+            with self._cond:
+                self._stats['recicladas'] += 1
+            return False
+        if ahora - usada_en > self.verificar_tras:
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                self._cerrar(conn)
+                with self._cond:
+                    self._stats['descartadas'] += 1
+                return False
+        return True
+
+    def _liberar_hueco(self):
+        with self._cond:
+            self._abiertas -= 1
+            self._cond.notify()
+
+    def _cerrar(self, conn):
+        metricas.sumar('db_connections_closed_total', self.etiquetas)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+# --- 4. Pool compartido por todos los Blueprints ---
+_pool = None
+_pool_pid = None  # Proceso que creó el pool
+_pool_lock = threading.Lock()
+
+
+def _crear_conexion(replica=None):
+    """Abre una conexión a la primaria o, con 'replica' (opciones de conexión), a esa réplica."""
+    if BACKEND_CONFIG['tipo'] == 'sqlite':
+        import conexion_sqlite
+        return conexion_sqlite.conectar(replica['ruta'] if replica else BACKEND_CONFIG['ruta'])
+    # El driver se importa con la primera conexión y no al importar este módulo:
+    # tarda en cargar y con 'sqlite' (o en scripts que no se conectan) no se usa.
+    import mysql.connector
+    # consume_results=True evita el error "Unread result found" cuando un handler
+    # hace fetchone() y luego reutiliza la misma conexión del request.
+    # time_zone='+00:00': las columnas TIMESTAMP (updated_at) se leen en UTC, como
+    # espera la cabecera Last-Modified (ver versiones.py).
+    return mysql.connector.connect(consume_results=True, time_zone='+00:00', **{**DB_CONFIG, **(replica or {})})
+
+
+def configurar_backend(tipo, **opciones):
+    """
+    Elige el motor de base de datos: 'mysql' o 'sqlite' (con ruta='archivo.db').
+    Las conexiones abiertas con el motor anterior se cierran.
+    """
+    if tipo not in ('mysql', 'sqlite'):
+        raise ValueError(f"Backend de base de datos desconocido: {tipo}")
+    BACKEND_CONFIG['tipo'] = tipo
+    BACKEND_CONFIG.update(opciones)
+    configurar_pool()
+
+
+def configurar_pool(**opciones):
+    """
+    Cambia los parámetros del pool (tamano, max_overflow, timeout, reciclar, verificar_tras).
+    Debe llamarse antes de la primera conexión; si el pool ya existía se vuelve a crear.
+    """
+    global _pool
+    with _pool_lock:
+        POOL_CONFIG.update(opciones)
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.cerrar_todas()
+        _pool = None
+    # Las réplicas usan los mismos parámetros
+    configurar_replicas()
+
+
+def obtener_pool():
+    """
+    Retorna el pool global, creándolo la primera vez que se necesita.
+    Si el proceso fue creado con fork() después de abrir conexiones (servidores
+    con varios procesos), el hijo crea su propio pool: los sockets heredados
+    pertenecen al proceso padre y no se deben usar ni cerrar aquí.
+    """
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = PoolConexiones(_crear_conexion, **POOL_CONFIG)
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def cerrar_pool():
+    """Cierra las conexiones libres del pool y de las réplicas (al apagar el servidor o un proceso de trabajo)."""
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.cerrar_todas()
+    if _replicas is not None and _replicas_pid == os.getpid():
+        _replicas.cerrar_todas()
+
+
+def estadisticas_pool():
+    """Checkouts, esperas, tiempo de espera y ocupación del pool."""
+    return obtener_pool().estadisticas()
+
+
+def precalentar_pool(cantidad=None):
     """
-    Crea y retorna una conexión a la base de datos.
-    Retorna el objeto de conexión si tiene éxito, o None si falla.
+    Paso opcional al arrancar un proceso: abre 'cantidad' conexiones (por defecto
+    POOL_CONFIG['precalentar']) en el pool de la primaria y en el de cada réplica.
+    Un error se registra en el log y no impide arrancar. Retorna las conexiones listas.
     """
+    pools = [('primaria', obtener_pool())]
+    grupo = obtener_replicas()
+    if grupo is not None:
+        pools += [(replica.nombre, replica.pool) for replica in grupo.replicas]
+    listas = 0
+    for nombre, pool in pools:
+        try:
+            listas += pool.calentar(cantidad)
+        except Exception as e:
+            logger.warning("No se pudo precalentar el pool %s: %s", nombre, e)
+    return listas
+
+
+# --- 5. Réplicas de lectura ---
+# Con REPLICAS_CONFIG['replicas'] los requests GET y HEAD leen de una réplica:
+#   - Se reparten por turnos (round-robin), cada réplica con su propio pool.
+#   - Una réplica que falla 'fallos_para_expulsar' veces seguidas al conectar, o
+#     que va más de 'max_retraso' segundos detrás de la primaria, queda fuera
+#     'expulsion' segundos; después se vuelve a probar. Sin réplicas sanas se lee
+#     de la primaria.
+#   - Todo lo demás va a la primaria: las escrituras y las verificaciones de la
+#     regla de negocio (ejecutar_transaccion pide get_db_connection(primaria=True)).
+#   - Después de escribir, el cliente recibe una cookie y sus lecturas van a la
+#     primaria durante 'lectura_propia' segundos: ve lo que acaba de escribir
+#     aunque la réplica aún no lo tenga.
+# Para probar sin servidores MySQL, las réplicas pueden ser archivos SQLite
+# copiados de la primaria (ver conexion_sqlite.replicar).
+def _opciones_replica(replica):
+    """'host:puerto' (mysql) o 'archivo.db' (sqlite) -> opciones para _crear_conexion."""
+    if isinstance(replica, dict):
+        return replica
+    if BACKEND_CONFIG['tipo'] == 'sqlite':
+        return {'ruta': replica}
+    host, _, puerto = replica.partition(':')
+    return {'host': host, 'port': int(puerto)} if puerto else {'host': host}
+
+
+def _retraso_replicacion(conn):
+    """Segundos que la réplica va detrás de la primaria, o None si no se sabe."""
+    if BACKEND_CONFIG['tipo'] != 'mysql':
+        return None
+    # Cursor sin instrumentar: no es una consulta del request
+    cursor = conn._conn.cursor(dictionary=True)
     try:
-        # --- ¡CONFIGURA TUS DATOS AQUÍ! ---
-        # Reemplaza los valores si tu configuración de MySQL es diferente.
-        conn = mysql.connector.connect(
-            host='localhost',             # El servidor de tu base de datos, casi siempre 'localhost'
-            user='root',                  # Tu nombre de usuario de MySQL (por defecto es 'root')
-            password='',                  # Tu contraseña de MySQL (por defecto suele estar vacía)
-            database='plataforma_cursos'  # El nombre de la base de datos que creamos
-        )
-        
-        # Si la conexión fue exitosa, retorna el objeto de conexión
-        return conn
-
-    except Error as e:
-        # Si ocurre un error durante la conexión, lo imprime en la consola
-        print(f"Error al conectar a la base de datos MySQL: {e}")
+        cursor.execute("SHOW REPLICA STATUS")
+        fila = cursor.fetchone()
+    finally:
+        cursor.close()
+    return fila['Seconds_Behind_Source'] if fila else None
+
+
+class Replica:
+    """Una réplica con su pool y su estado de salud."""
+
+    def __init__(self, nombre, pool):
+        self.nombre = nombre
+        self.pool = pool
+        self.fallos = 0             # Errores de conexión seguidos
+        self.expulsada_hasta = 0.0
+        self.retraso = None
+        self.retraso_medido_en = None
+        self.lecturas = 0
+        self.expulsiones = 0
+
+
+class GrupoReplicas:
+    """Reparte las lecturas entre las réplicas sanas y saca de turno a las que fallan."""
+
+    def __init__(self, replicas, fallos_para_expulsar=3, expulsion=30, max_retraso=10, medir_retraso_cada=5):
+        self.replicas = replicas
+        self.fallos_para_expulsar = fallos_para_expulsar
+        self.expulsion = expulsion
+        self.max_retraso = max_retraso
+        self.medir_retraso_cada = medir_retraso_cada
+        self._siguiente = 0
+        self._lock = threading.Lock()
+        self._stats = {'lecturas_replica': 0, 'lecturas_primaria_sin_replica': 0, 'lecturas_propias': 0}
+
+    def contar(self, clave):
+        with self._lock:
+            self._stats[clave] += 1
+
+    def obtener(self):
+        """Conexión de la próxima réplica sana, o None si no hay ninguna."""
+        for replica in self._en_turno():
+            try:
+                conn = replica.pool.obtener()
+            except PoolAgotadoError:
+                # Réplica ocupada pero sana: se prueba la siguiente
+                continue
+            except Exception as e:
+                self._registrar_fallo(replica, e)
+                continue
+            try:
+                retraso = self._medir_retraso(replica, conn)
+            except Exception as e:
+                conn.liberar()
+                self._registrar_fallo(replica, e)
+                continue
+            if retraso is not None and self.max_retraso is not None and retraso > self.max_retraso:
+                conn.liberar()
+                self._expulsar(replica, f"{retraso} s de retraso")
+                continue
+            with self._lock:
+                replica.fallos = 0
+                replica.lecturas += 1
+                self._stats['lecturas_replica'] += 1
+            return conn
+        self.contar('lecturas_primaria_sin_replica')
+        return None
+
+    def estadisticas(self):
+        ahora = time.monotonic()
+        with self._lock:
+            stats = dict(self._stats)
+            stats['replicas'] = [{
+                'nombre': replica.nombre,
+                'sana': replica.expulsada_hasta <= ahora,
+                'fallos': replica.fallos,
+                'expulsiones': replica.expulsiones,
+                'retraso': replica.retraso,
+                'lecturas': replica.lecturas,
+            } for replica in self.replicas]
+        for datos, replica in zip(stats['replicas'], self.replicas):
+            datos['pool'] = replica.pool.estadisticas()
+        return stats
+
+    def cerrar_todas(self):
+        for replica in self.replicas:
+            replica.pool.cerrar_todas()
+
+    # --- Funciones internas ---
+    def _en_turno(self):
+        """Réplicas no expulsadas, empezando por la siguiente en el turno."""
+        ahora = time.monotonic()
+        with self._lock:
+            inicio = self._siguiente
+            self._siguiente = (self._siguiente + 1) % len(self.replicas)
+        orden = self.replicas[inicio:] + self.replicas[:inicio]
+        return [replica for replica in orden if replica.expulsada_hasta <= ahora]
+
+    def _medir_retraso(self, replica, conn):
+        # Como mucho una medición cada 'medir_retraso_cada' segundos por réplica
+        if self.max_retraso is None:
+            return None
+        ahora = time.monotonic()
+        if replica.retraso_medido_en is not None and ahora - replica.retraso_medido_en < self.medir_retraso_cada:
+            return replica.retraso
+        replica.retraso = _retraso_replicacion(conn)
+        replica.retraso_medido_en = ahora
+        return replica.retraso
+
+    def _registrar_fallo(self, replica, error):
+        with self._lock:
+            replica.fallos += 1
+            expulsar = replica.fallos >= self.fallos_para_expulsar
+        logger.warning("Réplica %s no disponible (%s fallos seguidos): %s", replica.nombre, replica.fallos, error)
+        if expulsar:
+            self._expulsar(replica, error)
+
+    def _expulsar(self, replica, motivo):
+        with self._lock:
+            replica.expulsada_hasta = time.monotonic() + self.expulsion
+            replica.expulsiones += 1
+            replica.fallos = 0
+        logger.warning("Réplica %s fuera de turno por %s s: %s", replica.nombre, self.expulsion, motivo)
+
+
+_replicas = None
+_replicas_pid = None
+
+
+def configurar_replicas(**opciones):
+    """Cambia las réplicas o sus parámetros (ver REPLICAS_CONFIG). Sus conexiones se vuelven a abrir."""
+    global _replicas
+    with _pool_lock:
+        REPLICAS_CONFIG.update(opciones)
+        if _replicas is not None and _replicas_pid == os.getpid():
+            _replicas.cerrar_todas()
+        _replicas = None
+
+
+def obtener_replicas():
+    """Retorna el grupo de réplicas (uno por proceso, como el pool), o None si no hay réplicas."""
+    global _replicas, _replicas_pid
+    if not REPLICAS_CONFIG['replicas']:
+        return None
+    if _replicas is None or _replicas_pid != os.getpid():
+        with _pool_lock:
+            if _replicas is None or _replicas_pid != os.getpid():
+                replicas = []
+                for numero, replica in enumerate(REPLICAS_CONFIG['replicas'], 1):
+                    opciones = _opciones_replica(replica)
+                    nombre = opciones.get('nombre') or opciones.get('host') or opciones.get('ruta') or f"replica{numero}"
+                    opciones = {clave: valor for clave, valor in opciones.items() if clave != 'nombre'}
+                    pool = PoolConexiones(functools.partial(_crear_conexion, opciones), nombre=nombre, **POOL_CONFIG)
+                    replicas.append(Replica(nombre, pool))
+                _replicas = GrupoReplicas(
+                    replicas, REPLICAS_CONFIG['fallos_para_expulsar'], REPLICAS_CONFIG['expulsion'],
+                    REPLICAS_CONFIG['max_retraso'], REPLICAS_CONFIG['medir_retraso_cada'])
+                _replicas_pid = os.getpid()
+    return _replicas
+
+
+def estadisticas_replicas():
+    """Lecturas, salud y pool de cada réplica (None si no hay réplicas)."""
+    grupo = obtener_replicas()
+    return grupo.estadisticas() if grupo is not None else None
+
+
+def _escribio_hace_poco():
+    # La cookie guarda hasta cuándo (segundos desde 1970) leer de la primaria
+    try:
+        return float(request.cookies.get(REPLICAS_CONFIG['cookie'], 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def _conexion_replica():
+    """Conexión de una réplica para el request actual, o None si debe leer de la primaria."""
+    if not has_request_context() or request.method not in ('GET', 'HEAD'):
+        return None
+    grupo = obtener_replicas()
+    if grupo is None:
+        return None
+    if _escribio_hace_poco():
+        grupo.contar('lecturas_propias')
+        return None
+    conn = grupo.obtener()
+    if conn is not None:
+        conn._por_request = True
+        g._db_conn_replica = conn
+    return conn
+
+
+def _marcar_escritura(respuesta):
+    # Tras una escritura, las lecturas de este cliente van un rato a la primaria
+    if (REPLICAS_CONFIG['replicas'] and request.method not in ('GET', 'HEAD', 'OPTIONS')
+            and respuesta.status_code < 400):
+        ventana = REPLICAS_CONFIG['lectura_propia']
+        respuesta.set_cookie(REPLICAS_CONFIG['cookie'], f"{time.time() + ventana:.3f}",
+                             max_age=max(1, int(ventana) + 1), httponly=True, samesite='Lax')
+    return respuesta
+
+
+# --- 6. Función usada por los Blueprints ---
+def get_db_connection(primaria=False):
+    """
+    Retorna una conexión a la base de datos tomada del pool.
+    Dentro de un request de Flask siempre se retorna la misma conexión
+    (guardada en 'g') y se devuelve al pool al terminar el request.
+    Los requests GET y HEAD leen de una réplica si hay alguna (ver sección 5),
+    salvo con primaria=True o si el request ya usó la primaria.
+    Retorna None si no se puede conectar.
+    """
+    try:
+        if has_app_context():
+            conn = g.get('_db_conn')
+            if conn is None and not primaria:
+                conn = g.get('_db_conn_replica') or _conexion_replica()
+            if conn is None:
+                conn = obtener_pool().obtener()
+                conn._por_request = True
+                g._db_conn = conn
+            return conn
+
+        # Fuera de Flask (por ejemplo en seed.py) quien la usa debe llamar a close().
+        return obtener_pool().obtener()
+
+    except Exception as e:
+        # Si ocurre un error durante la conexión, lo registra en el log
+        logger.error("Error al conectar a la base de datos (%s): %s", BACKEND_CONFIG['tipo'], e)
         # Retorna None para indicar que la conexión falló
-        return None
\ No newline at end of file
+        return None
+
+
+def al_terminar_stream(respuesta, funcion):
+    """
+    Ejecuta funcion() una sola vez cuando una respuesta por partes termina de
+    enviarse o cuando se cierra, lo que pase primero (un cliente puede cortar a
+    la mitad, y no todos los clientes WSGI llaman a close()).
+    """
+    pendiente = [funcion]
+
+    def ejecutar():
+        if pendiente:
+            pendiente.pop()()
+
+    def recorrer(partes):
+        try:
+            yield from partes
+        finally:
+            ejecutar()
+
+    respuesta.response = recorrer(respuesta.response)
+    respuesta.call_on_close(ejecutar)
+
+
+def _retener_conexion_en_stream(respuesta):
+    # Una respuesta por partes sigue leyendo del cursor después de que termina la
+    # ruta (y de teardown_appcontext): la conexión se devuelve al terminar de enviarla.
+    if respuesta.is_streamed:
+        for clave in ('_db_conn', '_db_conn_replica'):
+            if clave in g:
+                al_terminar_stream(respuesta, g.pop(clave).liberar)
+    return respuesta
+
+
+def _liberar_conexion_request(exc):
+    for clave in ('_db_conn', '_db_conn_replica'):
+        conn = g.pop(clave, None)
+        if conn is not None:
+            conn.liberar()
+
+
+def init_app(app):
+    """Registra la devolución automática de las conexiones al terminar cada request."""
+    app.after_request(_retener_conexion_en_stream)
+    app.after_request(_marcar_escritura)
+    app.teardown_appcontext(_liberar_conexion_request)
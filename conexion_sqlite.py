@@ -0,0 +1,229 @@
+import re
+import sqlite3
+
+# --- Sustituto local de MySQL basado en SQLite ---
+# Permite levantar la aplicación (benchmarks, pruebas, desarrollo sin servidor MySQL)
+# contra un archivo SQLite. Imita la parte de la API de mysql.connector que usan
+# los Blueprints: cursor(dictionary=True), parámetros '%s', lastrowid, rowcount,
+# column_names, start_transaction, commit/rollback, ping e in_transaction.
+#
+# Se activa con conexion.configurar_backend('sqlite', ruta='archivo.db'). Otros
+# archivos copiados con replicar() sirven de réplicas de lectura (ver conexion.py).
+
+# Mismo esquema que database.sql, traducido a SQLite. Los cambios posteriores
+# vienen de la carpeta 'migraciones' (ver migrar.py).
+# SQLite no crea índices para las claves foráneas: los de curso_id, modulo_id e
+# instructor_id vienen de la migración 0002_indices_compuestos.
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS instructores (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  nombre VARCHAR(100) NOT NULL,
+  email VARCHAR(100) NOT NULL UNIQUE,
+  created_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS cursos (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  titulo VARCHAR(255) NOT NULL,
+  descripcion TEXT NULL,
+  is_published BOOLEAN NOT NULL DEFAULT FALSE,
+  instructor_id INT NULL REFERENCES instructores (id) ON DELETE SET NULL ON UPDATE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS modulos (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  titulo VARCHAR(255) NOT NULL,
+  curso_id INT NOT NULL REFERENCES cursos (id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS lecciones (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  titulo VARCHAR(255) NOT NULL,
+  contenido TEXT NULL,
+  modulo_id INT NOT NULL REFERENCES modulos (id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+"""
+
+# SQLite no tiene bloqueos por fila: toda la base se bloquea al escribir,
+# así que "SELECT ... FOR UPDATE" se ejecuta como un SELECT normal.
+_FOR_UPDATE = re.compile(r'\s+FOR\s+UPDATE\b', re.IGNORECASE)
+_INSERT = re.compile(r'\s*INSERT\b', re.IGNORECASE)
+
+
+class ErrorSQLite(Exception):
+    """Error con mensaje y código al estilo de MySQL (los handlers buscan textos como 'Duplicate entry')."""
+
+    def __init__(self, mensaje, errno=None):
+        super().__init__(mensaje)
+        self.errno = errno
+        self.msg = mensaje
+
+
+def _traducir_error(error):
+    mensaje = str(error)
+    if isinstance(error, sqlite3.IntegrityError):
+        if 'UNIQUE' in mensaje:
+            return ErrorSQLite(f"1062 (23000): Duplicate entry ({mensaje})", 1062)
+        if 'FOREIGN KEY' in mensaje:
+            return ErrorSQLite(f"1452 (23000): Cannot add or update a child row: "
+                               f"a foreign key constraint fails ({mensaje})", 1452)
+    if isinstance(error, sqlite3.OperationalError) and 'locked' in mensaje:
+        # Equivalente a "Lock wait timeout exceeded" de MySQL
+        return ErrorSQLite(f"1205 (HY000): {mensaje}", 1205)
+    return ErrorSQLite(mensaje)
+
+
+def _traducir_sql(sql):
+    return _FOR_UPDATE.sub('', sql).replace('%s', '?').replace('%%', '%')
+
+
+class CursorSQLite:
+    """Cursor con la misma interfaz que los cursores de mysql.connector."""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+        self._primer_id = None
+
+    def execute(self, sql, params=()):
+        self._primer_id = None
+        try:
+            self._cursor.execute(_traducir_sql(sql), tuple(params))
+        except sqlite3.Error as e:
+            raise _traducir_error(e) from e
+
+    def executemany(self, sql, filas):
+        self._primer_id = None
+        try:
+            self._cursor.executemany(_traducir_sql(sql), filas)
+        except sqlite3.Error as e:
+            raise _traducir_error(e) from e
+        # mysql.connector envía un executemany de INSERT como un solo INSERT de varias
+        # filas, y su lastrowid es el id de la primera. sqlite3 no toca lastrowid aquí:
+        # lo calculamos desde el último id, porque mientras se escribe nadie más puede
+        # insertar (SQLite bloquea toda la base) y los ids quedan consecutivos.
+        if _INSERT.match(sql) and self._cursor.rowcount > 0:
+            ultimo = self._cursor.connection.execute("SELECT last_insert_rowid()").fetchone()[0]
+            self._primer_id = ultimo - self._cursor.rowcount + 1
+
+    @property
+    def column_names(self):
+        return tuple(columna[0] for columna in self._cursor.description or ())
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._primer_id if self._primer_id is not None else self._cursor.lastrowid
+
+    def _fila(self, fila):
+        if fila is None or not self._dictionary:
+            return fila
+        return dict(zip(self.column_names, fila))
+
+    def fetchone(self):
+        return self._fila(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._fila(fila) for fila in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._fila(fila) for fila in self._cursor.fetchall()]
+
+    def __iter__(self):
+        for fila in self._cursor:
+            yield self._fila(fila)
+
+    def close(self):
+        self._cursor.close()
+
+
+class ConexionSQLite:
+    """Conexión con la misma interfaz que mysql.connector.connect()."""
+
+    def __init__(self, ruta, timeout=30.0):
+        # PARSE_DECLTYPES convierte las columnas TIMESTAMP en datetime, igual que MySQL
+        self._conn = sqlite3.connect(ruta, timeout=timeout, check_same_thread=False,
+                                     detect_types=sqlite3.PARSE_DECLTYPES)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._abierta = True
+
+    def cursor(self, dictionary=False, buffered=None):
+        return CursorSQLite(self._conn.cursor(), dictionary)
+
+    def start_transaction(self, consistent_snapshot=False, isolation_level=None, readonly=None):
+        # BEGIN IMMEDIATE toma el bloqueo de escritura de toda la base al empezar:
+        # es lo que aquí reemplaza a SELECT ... FOR UPDATE (ver transacciones.py).
+        # Una transacción de solo lectura no bloquea a nadie: BEGIN a secas ve una
+        # foto fija de la base desde su primera consulta (modo WAL).
+        try:
+            self._conn.execute("BEGIN" if readonly else "BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            raise _traducir_error(e) from e
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def is_connected(self):
+        return self._abierta
+
+    def ping(self, reconnect=False):
+        if not self._abierta:
+            raise ErrorSQLite("La conexión está cerrada")
+        self._conn.execute("SELECT 1")
+
+    def close(self):
+        self._abierta = False
+        self._conn.close()
+
+    def ejecutar_script(self, sql):
+        """Ejecuta varias sentencias seguidas (los triggers llevan ';' dentro, ver migrar.py)."""
+        try:
+            self._conn.executescript(sql)
+        except sqlite3.Error as e:
+            raise _traducir_error(e) from e
+
+
+def conectar(ruta):
+    return ConexionSQLite(ruta)
+
+
+def crear_esquema(ruta):
+    """Crea las tablas (si no existen) en el archivo SQLite indicado y aplica las migraciones pendientes."""
+    import migrar
+
+    conn = conectar(ruta)
+    try:
+        conn.ejecutar_script(ESQUEMA)
+        migrar.aplicar_pendientes(conn, 'sqlite', salida=None)
+    finally:
+        conn.close()
+
+
+def replicar(origen, destino):
+    """
+    Copia la base 'origen' sobre 'destino' (una foto consistente, aunque alguien
+    esté escribiendo). Sirve de réplica de lectura en pruebas: la "replicación" es
+    volver a llamar a esta función, y mientras tanto la réplica va atrasada.
+    """
+    fuente = sqlite3.connect(origen)
+    copia = sqlite3.connect(destino)
+    try:
+        fuente.backup(copia)
+    finally:
+        copia.close()
+        fuente.close()
@@ -0,0 +1,149 @@
+import os
+import threading
+
+import admision
+import cache
+import compresion
+import conexion
+import instrumentacion
+import metricas
+import trabajos
+
+# --- Configuración desde variables de entorno ---
+# Cada módulo tiene sus valores por defecto (DB_CONFIG, POOL_CONFIG, ...).
+# Aquí solo se sobrescriben los que estén definidos en el entorno, así el mismo
+# código sirve en desarrollo (sin variables) y en producción.
+#
+#   Variable               Destino                                   Ejemplo
+#   DB_BACKEND             conexion.BACKEND_CONFIG['tipo']           mysql | sqlite
+#   DB_SQLITE_PATH         conexion.BACKEND_CONFIG['ruta']           /srv/datos/plataforma.db
+#   DB_HOST                conexion.DB_CONFIG['host']                db.interna
+#   DB_PORT                conexion.DB_CONFIG['port']                3306
+#   DB_USER                conexion.DB_CONFIG['user']                plataforma
+#   DB_PASSWORD            conexion.DB_CONFIG['password']            ****
+#   DB_NAME                conexion.DB_CONFIG['database']            plataforma_cursos
+#   DB_POOL_SIZE           conexion.POOL_CONFIG['tamano']            10
+#   DB_POOL_MAX_OVERFLOW   conexion.POOL_CONFIG['max_overflow']      20
+#   DB_POOL_TIMEOUT        conexion.POOL_CONFIG['timeout']           5
+#   DB_POOL_RECYCLE        conexion.POOL_CONFIG['reciclar']          1800
+#   DB_POOL_WARMUP         conexion.POOL_CONFIG['precalentar']       5 (conexiones abiertas al arrancar)
+#   DB_REPLICAS            conexion.REPLICAS_CONFIG['replicas']      replica1,replica2:3307 (o archivos .db)
+#   DB_READ_YOUR_WRITES    conexion.REPLICAS_CONFIG['lectura_propia'] 5
+#   DB_REPLICA_MAX_LAG     conexion.REPLICAS_CONFIG['max_retraso']   10
+#   CACHE_MAX_ENTRIES      cache.CACHE_CONFIG['max_entradas']        5000
+#   CACHE_TTL              cache.CACHE_CONFIG['ttl']                 3600
+#   CACHE_REDIS_URL        cache.CACHE_CONFIG['backend']             redis://cache:6379/0
+#   SLOW_QUERY_MS          instrumentacion ['umbral_lenta_ms']       200
+#   SLOW_QUERY_LOG         instrumentacion ['archivo_lentas']        /var/log/plataforma/lentas.log
+#   COMPRESSION_ENABLED    compresion ['activa']                     0 (si ya comprime el proxy)
+#   COMPRESSION_MIN_BYTES  compresion ['min_bytes']                  1024
+#   ADMISSION_ENABLED      admision ['activa']                       0 (sin límites)
+#   ADMISSION_CLIENT_RATE  admision ['cliente'] (tasa/ráfaga)        20/40
+#   ADMISSION_TOTAL_RATE   admision ['total'] (tasa/ráfaga)          500/1000
+#   ADMISSION_REDIS_URL    admision ['backend']                      redis://cache:6379/1
+#   JOBS_ENABLED           trabajos ['activa']                       0 (publicar no precalcula)
+#   JOBS_THREADS           trabajos ['hilos']                        2
+#   JOBS_STORE             trabajos ['almacen']                      memoria | tabla
+#   METRICS_ENABLED        metricas ['activa']                       0 (sin /metrics)
+#   METRICS_DIR            metricas ['directorio']                   /run/plataforma/metricas
+
+
+def _booleano(valor):
+    return valor.lower() in ('1', 'true', 'si', 'sí', 'yes', 'on')
+
+
+def _lista(valor):
+    """'a, b,c' -> ['a', 'b', 'c']"""
+    return [elemento.strip() for elemento in valor.split(',') if elemento.strip()]
+
+
+def _tasa_rafaga(valor):
+    """'20/40' -> (20.0, 40): requests por segundo y ráfaga máxima."""
+    tasa, _, rafaga = valor.partition('/')
+    return float(tasa), int(rafaga or max(1, float(tasa)))
+
+
+VARIABLES = [
+    ('DB_BACKEND', conexion.BACKEND_CONFIG, 'tipo', str),
+    ('DB_SQLITE_PATH', conexion.BACKEND_CONFIG, 'ruta', str),
+    ('DB_HOST', conexion.DB_CONFIG, 'host', str),
+    ('DB_PORT', conexion.DB_CONFIG, 'port', int),
+    ('DB_USER', conexion.DB_CONFIG, 'user', str),
+    ('DB_PASSWORD', conexion.DB_CONFIG, 'password', str),
+    ('DB_NAME', conexion.DB_CONFIG, 'database', str),
+    ('DB_POOL_SIZE', conexion.POOL_CONFIG, 'tamano', int),
+    ('DB_POOL_MAX_OVERFLOW', conexion.POOL_CONFIG, 'max_overflow', int),
+    ('DB_POOL_TIMEOUT', conexion.POOL_CONFIG, 'timeout', float),
+    ('DB_POOL_RECYCLE', conexion.POOL_CONFIG, 'reciclar', int),
+    ('DB_POOL_WARMUP', conexion.POOL_CONFIG, 'precalentar', int),
+    ('DB_REPLICAS', conexion.REPLICAS_CONFIG, 'replicas', _lista),
+    ('DB_READ_YOUR_WRITES', conexion.REPLICAS_CONFIG, 'lectura_propia', float),
+    ('DB_REPLICA_MAX_LAG', conexion.REPLICAS_CONFIG, 'max_retraso', float),
+    ('CACHE_MAX_ENTRIES', cache.CACHE_CONFIG, 'max_entradas', int),
+    ('CACHE_TTL', cache.CACHE_CONFIG, 'ttl', int),
+    ('CACHE_REDIS_URL', cache.CACHE_CONFIG, 'backend', lambda url: cache.BackendRedis(url)),
+    ('SLOW_QUERY_MS', instrumentacion.INSTRUMENTACION_CONFIG, 'umbral_lenta_ms', float),
+    ('SLOW_QUERY_LOG', instrumentacion.INSTRUMENTACION_CONFIG, 'archivo_lentas', str),
+    ('COMPRESSION_ENABLED', compresion.COMPRESION_CONFIG, 'activa', _booleano),
+    ('COMPRESSION_MIN_BYTES', compresion.COMPRESION_CONFIG, 'min_bytes', int),
+    ('ADMISSION_ENABLED', admision.ADMISION_CONFIG, 'activa', _booleano),
+    ('ADMISSION_CLIENT_RATE', admision.ADMISION_CONFIG, 'cliente', _tasa_rafaga),
+    ('ADMISSION_TOTAL_RATE', admision.ADMISION_CONFIG, 'total', _tasa_rafaga),
+    ('ADMISSION_REDIS_URL', admision.ADMISION_CONFIG, 'backend', lambda url: admision.BackendRedis(url)),
+    ('JOBS_ENABLED', trabajos.TRABAJOS_CONFIG, 'activa', _booleano),
+    ('JOBS_THREADS', trabajos.TRABAJOS_CONFIG, 'hilos', int),
+    ('JOBS_STORE', trabajos.TRABAJOS_CONFIG, 'almacen', str),
+    ('METRICS_ENABLED', metricas.METRICAS_CONFIG, 'activa', _booleano),
+    ('METRICS_DIR', metricas.METRICAS_CONFIG, 'directorio', str),
+]
+
+# Variables del servidor (las usa servidor.py y el punto de entrada de app.py)
+SERVIDOR = {
+    'host': os.environ.get('APP_HOST', '127.0.0.1'),
+    'puerto': int(os.environ.get('APP_PORT', 5000)),
+    'debug': _booleano(os.environ.get('APP_DEBUG', '1')),   # Solo lo usa el servidor de desarrollo (python app.py)
+    'workers': int(os.environ.get('WEB_WORKERS', os.cpu_count() or 1)),
+    'threads': int(os.environ.get('WEB_THREADS', 4)),
+    'timeout': int(os.environ.get('WEB_TIMEOUT', 30)),
+    'graceful_timeout': int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30)),
+}
+
+
+_entorno_aplicado = False
+_entorno_lock = threading.Lock()
+
+
+def aplicar_entorno(entorno=None):
+    """
+    Copia las variables de entorno definidas a la configuración de cada módulo.
+    'entorno' es un diccionario con las mismas variables (por defecto, os.environ).
+    Retorna un diccionario {variable: valor} con lo que se aplicó.
+    """
+    global _entorno_aplicado
+    if entorno is None:
+        entorno = os.environ
+        _entorno_aplicado = True
+    aplicadas = {}
+    for variable, destino, clave, convertir in VARIABLES:
+        if variable in entorno:
+            destino[clave] = convertir(entorno[variable])
+            aplicadas[variable] = entorno[variable]
+
+    if aplicadas:
+        # Las conexiones, la caché, los límites y la cola se vuelven a crear con los valores nuevos
+        conexion.configurar_pool()
+        cache.configurar_cache()
+        admision.configurar_admision()
+        trabajos.configurar_trabajos()
+    return aplicadas
+
+
+def aplicar_entorno_una_vez():
+    """
+    Aplica os.environ solo la primera vez que se llama en el proceso (o si nadie
+    llamó antes a aplicar_entorno()). Así crear otra aplicación no vuelve a crear
+    el pool, la caché ni los límites que ya se configuraron.
+    """
+    with _entorno_lock:
+        if not _entorno_aplicado:
+            aplicar_entorno()
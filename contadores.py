@@ -0,0 +1,178 @@
+# contadores.py
+# Contadores de resumen para los listados (ver migraciones/0004_contadores_resumen.sql).
+#
+# Uso:
+#   python contadores.py verificar             # Informa las filas con contadores distintos de los reales
+#   python contadores.py reconstruir           # Además los corrige
+#   python contadores.py reconstruir --lote 5000
+#
+# Columnas:
+#   cursos.modulo_count / cursos.leccion_count              -> get_cursos
+#   instructores.curso_count / instructores.publicado_count -> get_instructores
+#
+# Las rutas que crean o eliminan filas los actualizan con las funciones de la
+# sección 1, dentro de la misma transacción que la escritura (ver transacciones.py).
+# Un curso publicado ya no se edita ni se elimina, así que 'publicado_count'
+# solo cambia al publicar. Si alguien escribe directamente en la base de datos
+# los contadores dejan de coincidir: 'reconstruir' los vuelve a calcular.
+#
+# Usa la misma configuración que la aplicación (variables DB_*, ver configuracion.py).
+import argparse
+import sys
+
+from versiones import SQL_NUEVA_REVISION
+
+
+# --- 1. Mantenimiento incremental (lo llaman las rutas que escriben) ---
+# Las dos funciones suben también la revisión de la fila, porque los contadores
+# forman parte de su JSON (ver versiones.py).
+def sumar_contenido_curso(cursor, curso_id, modulos=0, lecciones=0):
+    """Suma (o resta, con valores negativos) módulos y lecciones a un curso y sube su revisión."""
+    cursor.execute(f"""
+        UPDATE cursos SET modulo_count = modulo_count + %s, leccion_count = leccion_count + %s, {SQL_NUEVA_REVISION}
+        WHERE id = %s
+    """, (modulos, lecciones, curso_id))
+
+
+def sumar_cursos_instructor(cursor, instructor_id, cursos=0, publicados=0):
+    """Suma (o resta) cursos y cursos publicados a un instructor. Un curso sin instructor no cuenta."""
+    if instructor_id is None:
+        return
+    cursor.execute(f"""
+        UPDATE instructores SET curso_count = curso_count + %s, publicado_count = publicado_count + %s,
+          {SQL_NUEVA_REVISION}
+        WHERE id = %s
+    """, (cursos, publicados, instructor_id))
+
+
+def cambiar_instructor(cursor, anterior_id, nuevo_id):
+    """Pasa un curso sin publicar de un instructor a otro (cualquiera de los dos puede ser None)."""
+    if anterior_id == nuevo_id:
+        return
+    sumar_cursos_instructor(cursor, anterior_id, cursos=-1)
+    sumar_cursos_instructor(cursor, nuevo_id, cursos=1)
+
+
+# --- 2. Reconstrucción ---
+# Los valores reales se calculan por lotes de filas, recorridos por id como la
+# paginación de las rutas (ver paginacion.py), con los índices de
+# 0002_indices_compuestos.sql. Cada lote es una transacción que bloquea sus filas
+# (FOR UPDATE), así una escritura concurrente no se pierde entre el cálculo y la
+# corrección.
+SQL_CURSOS_REALES = """
+    SELECT c.id, c.modulo_count, c.leccion_count,
+      (SELECT COUNT(*) FROM modulos m WHERE m.curso_id = c.id) AS modulos,
+      (SELECT COUNT(*) FROM lecciones l JOIN modulos m ON m.id = l.modulo_id WHERE m.curso_id = c.id) AS lecciones
+    FROM cursos c
+    WHERE c.id > %s
+    ORDER BY c.id ASC
+    LIMIT %s
+    FOR UPDATE
+"""
+SQL_CORREGIR_CURSOS = f"UPDATE cursos SET modulo_count = %s, leccion_count = %s, {SQL_NUEVA_REVISION} WHERE id = %s"
+
+SQL_INSTRUCTORES_REALES = """
+    SELECT i.id, i.curso_count, i.publicado_count,
+      (SELECT COUNT(*) FROM cursos c WHERE c.instructor_id = i.id) AS cursos,
+      (SELECT COUNT(*) FROM cursos c WHERE c.instructor_id = i.id AND c.is_published = TRUE) AS publicados
+    FROM instructores i
+    WHERE i.id > %s
+    ORDER BY i.id ASC
+    LIMIT %s
+    FOR UPDATE
+"""
+SQL_CORREGIR_INSTRUCTORES = (f"UPDATE instructores SET curso_count = %s, publicado_count = %s, {SQL_NUEVA_REVISION} "
+                             "WHERE id = %s")
+
+# tabla -> (consulta, corrección, [(columna del contador, columna con el valor real)])
+RECONSTRUCCIONES = {
+    'cursos': (SQL_CURSOS_REALES, SQL_CORREGIR_CURSOS,
+               [('modulo_count', 'modulos'), ('leccion_count', 'lecciones')]),
+    'instructores': (SQL_INSTRUCTORES_REALES, SQL_CORREGIR_INSTRUCTORES,
+                     [('curso_count', 'cursos'), ('publicado_count', 'publicados')]),
+}
+
+
+def _reconstruir_lote(cursor, tabla, after_id, lote, corregir):
+    """
+    Revisa hasta 'lote' filas con id mayor que 'after_id'. Retorna (filas revisadas,
+    último id, diferencias) con las diferencias como (id, {columna: (guardado, real)}).
+    Si 'corregir', actualiza las filas con diferencias.
+    """
+    consulta, correccion, columnas = RECONSTRUCCIONES[tabla]
+    cursor.execute(consulta, (after_id, lote))
+    filas = cursor.fetchall()
+    diferencias = []
+    correcciones = []
+    for fila in filas:
+        distintas = {columna: (fila[columna], fila[real]) for columna, real in columnas
+                     if fila[columna] != fila[real]}
+        if distintas:
+            diferencias.append((fila['id'], distintas))
+            correcciones.append(tuple(fila[real] for _, real in columnas) + (fila['id'],))
+
+    if corregir and correcciones:
+        cursor.executemany(correccion, correcciones)
+    return len(filas), (filas[-1]['id'] if filas else after_id), diferencias
+
+
+def reconstruir(conn, lote=1000, corregir=True, salida=print):
+    """
+    Compara los contadores de cursos e instructores con los valores reales y, si
+    'corregir', los actualiza (subiendo la revisión de cada fila corregida).
+    Retorna {tabla: filas con diferencias}. 'salida' recibe los mensajes de progreso.
+    """
+    salida = salida or (lambda mensaje: None)
+    resultado = {}
+    cursor = conn.cursor(dictionary=True)
+    try:
+        for tabla in RECONSTRUCCIONES:
+            if conn.in_transaction:
+                conn.commit()
+            revisadas = total = 0
+            after_id = 0
+            while True:
+                conn.start_transaction()
+                try:
+                    cantidad, after_id, diferencias = _reconstruir_lote(cursor, tabla, after_id, lote, corregir)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                # Solo se muestran las primeras filas; el total va al final
+                for id_, distintas in diferencias[:max(0, 20 - total)]:
+                    detalle = ', '.join(f"{columna} {guardado} -> {real}"
+                                        for columna, (guardado, real) in distintas.items())
+                    salida(f"  {tabla} {id_}: {detalle}")
+                revisadas += cantidad
+                total += len(diferencias)
+                if cantidad < lote:
+                    break
+            verbo = 'corregidas' if corregir else 'con diferencias'
+            salida(f"-> {tabla}: {total} de {revisadas} filas {verbo}.")
+            resultado[tabla] = total
+    finally:
+        cursor.close()
+    return resultado
+
+
+if __name__ == '__main__':
+    import configuracion
+    import conexion
+
+    parser = argparse.ArgumentParser(description="Verifica o reconstruye los contadores de cursos e instructores.")
+    parser.add_argument('comando', choices=('verificar', 'reconstruir'))
+    parser.add_argument('--lote', type=int, default=1000, help="Filas por transacción")
+    args = parser.parse_args()
+
+    configuracion.aplicar_entorno()
+    conn = conexion.get_db_connection()
+    if conn is None:
+        print("No se pudo conectar a la base de datos.")
+        sys.exit(1)
+    try:
+        diferencias = reconstruir(conn, args.lote, corregir=args.comando == 'reconstruir')
+    finally:
+        conn.close()
+    # 'verificar' termina con código 1 si algún contador no coincide
+    sys.exit(1 if args.comando == 'verificar' and any(diferencias.values()) else 0)
@@ -6,6 +6,10 @@ COLLATE utf8mb4_unicode_ci;
 -- Usar la base de datos que acabamos de crear.
 USE plataforma_cursos;
 
+-- Este archivo crea el esquema inicial. Los cambios posteriores (índices,
+-- columnas nuevas...) están en la carpeta 'migraciones' y se aplican con:
+--   python migrar.py aplicar
+
 -- -----------------------------------------------------
 -- Tabla `instructores`
 -- Se crea primero porque otras tablas dependen de ella.
@@ -0,0 +1,173 @@
+import threading
+import time
+from collections import OrderedDict
+
+from conexion import get_db_connection
+from versiones import leer_generacion
+
+# --- Índice en memoria del estado de publicación ---
+# Las reglas de negocio de módulos y lecciones solo necesitan saber si el curso
+# al que pertenecen está publicado. En lugar de hacer un JOIN de 2 o 3 tablas
+# antes de cada escritura, guardamos:
+#   modulo_id  -> curso_id
+#   leccion_id -> curso_id
+#   curso_id   -> is_published
+#
+# Es solo un atajo para rechazar enseguida las escrituras sobre cursos ya
+# publicados: la verificación que vale es la de transacciones.py, que bloquea
+# la fila del curso (SELECT ... FOR UPDATE) en la misma transacción que la escritura.
+#
+# Un módulo o una lección nunca cambian de curso, y un curso publicado nunca
+# vuelve a estar sin publicar, así que esas entradas no caducan. El estado
+# "no publicado" sí caduca tras 'ttl_no_publicado' segundos, por si el curso
+# se publicó desde otro proceso; dentro de este proceso lo mantienen al día
+# los endpoints de escritura de routes/cursos.py y routes/modulos.py.
+#
+# Importar un catálogo (ver catalogo.py) vuelve a usar los mismos ids con otros
+# datos. Por eso las rutas preguntan con publicado_por_modulo() y
+# publicado_por_leccion() (al final del archivo): antes de rechazar una escritura
+# comparan la generación del catálogo (ver versiones.py), y si cambió el índice
+# se vacía y decide la base de datos.
+
+INDICE_CONFIG = {
+    'max_entradas': 100000,   # Máximo de entradas en cada uno de los tres mapas
+    'ttl_no_publicado': 5,    # Segundos que se confía en un "no publicado" guardado
+}
+
+_PARA_SIEMPRE = float('inf')
+
+
+class IndicePublicacion:
+    """Mapas LRU acotados para resolver el estado de publicación sin ir a la base de datos."""
+
+    def __init__(self, max_entradas=100000, ttl_no_publicado=5):
+        self.max_entradas = max_entradas
+        self.ttl_no_publicado = ttl_no_publicado
+        self._curso_de_modulo = OrderedDict()
+        self._curso_de_leccion = OrderedDict()
+        self._publicado = OrderedDict()  # curso_id -> (is_published, expira_en)
+        self._generacion = None          # Generación del catálogo de lo guardado (None: no se sabe)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0}
+
+    # --- Consultas ---
+    def publicado_por_modulo(self, modulo_id):
+        """Retorna True/False si el índice conoce la respuesta, o None si hay que consultar la BD."""
+        with self._lock:
+            return self._resolver(self._curso_de_modulo, modulo_id)
+
+    def publicado_por_leccion(self, leccion_id):
+        with self._lock:
+            return self._resolver(self._curso_de_leccion, leccion_id)
+
+    def curso_de_modulo(self, modulo_id):
+        with self._lock:
+            return self._curso_de_modulo.get(modulo_id)
+
+    # --- Registro (lo llaman las consultas de respaldo y los endpoints de escritura) ---
+    def registrar_curso(self, curso_id, publicado):
+        expira_en = _PARA_SIEMPRE if publicado else time.monotonic() + self.ttl_no_publicado
+        with self._lock:
+            self._guardar(self._publicado, curso_id, (bool(publicado), expira_en))
+
+    def registrar_modulo(self, modulo_id, curso_id):
+        with self._lock:
+            self._guardar(self._curso_de_modulo, modulo_id, curso_id)
+
+    def registrar_leccion(self, leccion_id, curso_id):
+        with self._lock:
+            self._guardar(self._curso_de_leccion, leccion_id, curso_id)
+
+    def olvidar_curso(self, curso_id):
+        # Los módulos y lecciones que apuntaban a este curso quedan huérfanos en el
+        # índice; al no encontrar el estado del curso se vuelve a consultar la BD.
+        with self._lock:
+            self._publicado.pop(curso_id, None)
+
+    def olvidar_leccion(self, leccion_id):
+        with self._lock:
+            self._curso_de_leccion.pop(leccion_id, None)
+
+    def limpiar(self):
+        # Tras reemplazar los datos de la base (ver catalogo.py) los ids vuelven a usarse
+        with self._lock:
+            self._vaciar()
+
+    def comprobar_generacion(self, generacion):
+        """
+        Si el catálogo cambió de generación desde la última vez, vacía el índice y
+        retorna True. La primera vez también: no se sabe de qué catálogo es lo guardado.
+        """
+        with self._lock:
+            if generacion == self._generacion:
+                return False
+            self._vaciar()
+            self._generacion = generacion
+            return True
+
+    def estadisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['modulos'] = len(self._curso_de_modulo)
+            stats['lecciones'] = len(self._curso_de_leccion)
+            stats['cursos'] = len(self._publicado)
+        return stats
+
+    # --- Funciones internas (se llaman con el lock tomado) ---
+    def _vaciar(self):
+        self._curso_de_modulo.clear()
+        self._curso_de_leccion.clear()
+        self._publicado.clear()
+
+    def _resolver(self, mapa, clave):
+        curso_id = mapa.get(clave)
+        estado = self._publicado.get(curso_id) if curso_id is not None else None
+        if estado is None or estado[1] < time.monotonic():
+            self._stats['misses'] += 1
+            return None
+        mapa.move_to_end(clave)
+        self._publicado.move_to_end(curso_id)
+        self._stats['hits'] += 1
+        return estado[0]
+
+    def _guardar(self, mapa, clave, valor):
+        mapa[clave] = valor
+        mapa.move_to_end(clave)
+        if len(mapa) > self.max_entradas:
+            mapa.popitem(last=False)
+
+
+_indice = None
+_indice_lock = threading.Lock()
+
+
+def obtener_indice():
+    """Retorna el índice global, creándolo la primera vez que se usa."""
+    global _indice
+    if _indice is None:
+        with _indice_lock:
+            if _indice is None:
+                _indice = IndicePublicacion(**INDICE_CONFIG)
+    return _indice
+
+
+# --- Consultas de las rutas ---
+def publicado_por_modulo(modulo_id):
+    """True si el curso del módulo está publicado según el índice (ver _confirmar)."""
+    return _confirmar(obtener_indice().publicado_por_modulo(modulo_id))
+
+
+def publicado_por_leccion(leccion_id):
+    return _confirmar(obtener_indice().publicado_por_leccion(leccion_id))
+
+
+def _confirmar(publicado):
+    # Un "publicado" guardado puede ser de un catálogo anterior. Antes de rechazar la
+    # escritura se lee la generación: una fila por clave primaria, sin bloqueos, en
+    # lugar del JOIN con FOR UPDATE. Si cambió, decide la transacción de la ruta.
+    if not publicado:
+        return False
+    conn = get_db_connection(primaria=True)
+    if conn is None:
+        return False
+    return not obtener_indice().comprobar_generacion(leer_generacion(conn))
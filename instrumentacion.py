@@ -0,0 +1,201 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+
+from flask import g, request, has_app_context, has_request_context
+
+import metricas
+
+# --- Instrumentación de consultas a la base de datos ---
+# Todos los cursores que entrega get_db_connection() pasan por CursorInstrumentado,
+# que mide cada consulta. Por cada request se registra:
+#   - número de consultas, tiempo total en la BD, filas leídas y la consulta más lenta
+#   - cabecera Server-Timing (visible en las herramientas de desarrollo del navegador)
+#   - una línea de log en JSON (logger 'plataforma.requests')
+#   - aviso de posible N+1 si la misma consulta se repite muchas veces (logger 'plataforma.db')
+# La duración de cada consulta también va al histograma de /metrics (ver metricas.py).
+# Además, toda consulta más lenta que 'umbral_lenta_ms' se escribe en el log de
+# consultas lentas (logger 'plataforma.lentas', y en 'archivo_lentas' si se configura).
+
+INSTRUMENTACION_CONFIG = {
+    'umbral_lenta_ms': 200,      # Consultas más lentas que esto van al log de lentas
+    'archivo_lentas': None,      # Archivo para el log de consultas lentas (None = solo logging)
+    'umbral_n_mas_1': 5,         # Repeticiones de la misma consulta en un request para avisar
+    'log_requests': True,        # Una línea JSON por request con las métricas de la BD
+}
+
+logger_db = logging.getLogger('plataforma.db')
+logger_requests = logging.getLogger('plataforma.requests')
+logger_lentas = logging.getLogger('plataforma.lentas')
+
+_ESPACIOS = re.compile(r'\s+')
+_LISTA_PARAMETROS = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+
+
+def normalizar_sql(sql):
+    """Consulta en una sola línea y con las listas 'IN (%s, %s, ...)' colapsadas, para agrupar repeticiones."""
+    sql = _ESPACIOS.sub(' ', sql).strip()
+    return _LISTA_PARAMETROS.sub('(...)', sql)
+
+
+# --- 1. Métricas de un request ---
+class EstadisticasRequest:
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo = 0.0
+        self.filas = 0
+        self.mas_lenta = (0.0, None)  # (segundos, sql)
+        self.repeticiones = Counter()
+
+    def registrar_consulta(self, sql, duracion):
+        self.consultas += 1
+        self.tiempo += duracion
+        self.repeticiones[sql] += 1
+        if duracion > self.mas_lenta[0]:
+            self.mas_lenta = (duracion, sql)
+
+    def registrar_lectura(self, filas, duracion):
+        self.filas += filas
+        self.tiempo += duracion
+
+    def posibles_n_mas_1(self):
+        umbral = INSTRUMENTACION_CONFIG['umbral_n_mas_1']
+        return [(sql, veces) for sql, veces in self.repeticiones.items() if veces >= umbral]
+
+    def como_dict(self):
+        return {
+            "consultas": self.consultas,
+            "db_ms": round(self.tiempo * 1000, 3),
+            "filas": self.filas,
+            "mas_lenta_ms": round(self.mas_lenta[0] * 1000, 3),
+            "mas_lenta_sql": self.mas_lenta[1],
+        }
+
+
+def _estadisticas_actuales():
+    if has_app_context():
+        return g.get('_db_stats')
+    return None
+
+
+# --- 2. Cursor instrumentado ---
+class CursorInstrumentado:
+    """Envuelve un cursor y mide execute/executemany y las lecturas de filas."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def execute(self, sql, params=()):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, params)
+        finally:
+            self._registrar(sql, time.perf_counter() - inicio, params)
+
+    def executemany(self, sql, filas):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, filas)
+        finally:
+            self._registrar(sql, time.perf_counter() - inicio, f"<{len(filas)} filas>")
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        fila = self._cursor.fetchone()
+        self._leidas(0 if fila is None else 1, time.perf_counter() - inicio)
+        return fila
+
+    def fetchmany(self, size=1):
+        inicio = time.perf_counter()
+        filas = self._cursor.fetchmany(size)
+        self._leidas(len(filas), time.perf_counter() - inicio)
+        return filas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        filas = self._cursor.fetchall()
+        self._leidas(len(filas), time.perf_counter() - inicio)
+        return filas
+
+    def __iter__(self):
+        # Leemos por bloques para medir solo el tiempo de la BD y no el de quien consume las filas
+        while True:
+            filas = self.fetchmany(100)
+            if not filas:
+                return
+            yield from filas
+
+    def _registrar(self, sql, duracion, params):
+        sql = normalizar_sql(sql)
+        metricas.observar('db_query_duration_seconds', duracion, (('operation', sql.split(' ', 1)[0].upper()),))
+        stats = _estadisticas_actuales()
+        if stats is not None:
+            stats.registrar_consulta(sql, duracion)
+        if duracion * 1000 >= INSTRUMENTACION_CONFIG['umbral_lenta_ms']:
+            ruta = request.path if has_request_context() else None
+            logger_lentas.warning(json.dumps({
+                "duracion_ms": round(duracion * 1000, 3),
+                "sql": sql,
+                "params": repr(params)[:200],
+                "ruta": ruta,
+            }, ensure_ascii=False))
+
+    def _leidas(self, filas, duracion):
+        stats = _estadisticas_actuales()
+        if stats is not None:
+            stats.registrar_lectura(filas, duracion)
+
+
+# --- 3. Integración con Flask ---
+def _iniciar_request():
+    g._db_stats = EstadisticasRequest()
+
+
+def _cabecera_server_timing(stats):
+    return f'db;dur={stats.tiempo * 1000:.3f};desc="{stats.consultas} consultas, {stats.filas} filas"'
+
+
+def _registrar_request(stats, metodo, ruta, status):
+    for sql, veces in stats.posibles_n_mas_1():
+        logger_db.warning("Posible N+1 en %s %s: la consulta se ejecutó %d veces: %s", metodo, ruta, veces, sql)
+    if INSTRUMENTACION_CONFIG['log_requests']:
+        linea = {"metodo": metodo, "ruta": ruta, "status": status}
+        linea.update(stats.como_dict())
+        logger_requests.info(json.dumps(linea, ensure_ascii=False))
+
+
+def _terminar_request(respuesta):
+    stats = g.get('_db_stats')
+    if stats is None:
+        return respuesta
+    # En las respuestas por partes (stream) la cabecera solo cubre las consultas
+    # hechas antes de empezar a enviar; el log se escribe al terminar el envío.
+    respuesta.headers['Server-Timing'] = _cabecera_server_timing(stats)
+    metodo, ruta, status = request.method, request.path, respuesta.status_code
+    respuesta.call_on_close(lambda: _registrar_request(stats, metodo, ruta, status))
+    return respuesta
+
+
+_manejador_lentas = None
+
+
+def _configurar_archivo_lentas():
+    global _manejador_lentas
+    archivo = INSTRUMENTACION_CONFIG['archivo_lentas']
+    if not archivo or _manejador_lentas is not None:
+        return
+    _manejador_lentas = logging.FileHandler(archivo, encoding='utf-8')
+    _manejador_lentas.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    logger_lentas.addHandler(_manejador_lentas)
+
+
+def init_app(app):
+    """Registra la medición de consultas en todos los requests de la aplicación."""
+    app.before_request(_iniciar_request)
+    app.after_request(_terminar_request)
+    _configurar_archivo_lentas()
@@ -0,0 +1,121 @@
+# --- Validación de los endpoints de creación por lotes ---
+# POST /api/courses/<id>/modules/bulk  y  POST /api/modules/<id>/lessons/bulk
+#
+# Todo el lote se valida antes de tocar la base de datos y se inserta en una
+# sola transacción: o se crean todas las filas o ninguna.
+
+import logging
+
+from conexion import BACKEND_CONFIG, DB_CONFIG
+
+logger = logging.getLogger('plataforma.db')
+
+# Tamaño máximo de un lote (si se supera se responde 413):
+
+MAX_MODULOS_POR_LOTE = 100      # Módulos en un mismo request
+MAX_LECCIONES_POR_LOTE = 1000   # Lecciones en un mismo request (sumando todos los módulos)
+
+# (tipo, host, puerto) -> si el servidor da ids consecutivos a un INSERT de varias filas
+_modo_autoincremento = {}
+
+
+class LoteInvalido(ValueError):
+    """El cuerpo del lote no es válido. 'status' es el código HTTP a responder."""
+
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+def validar_lecciones(lecciones, donde="lecciones"):
+    """Valida una lista de lecciones y retorna sus filas (titulo, contenido)."""
+    if not isinstance(lecciones, list):
+        raise LoteInvalido(f"El campo '{donde}' debe ser una lista")
+    filas = []
+    for posicion, leccion in enumerate(lecciones):
+        if not isinstance(leccion, dict) or not leccion.get('titulo'):
+            raise LoteInvalido(f"{donde}[{posicion}]: el campo 'titulo' es requerido")
+        if not isinstance(leccion['titulo'], str):
+            raise LoteInvalido(f"{donde}[{posicion}]: el campo 'titulo' debe ser texto")
+        if not isinstance(leccion.get('contenido'), (str, type(None))):
+            raise LoteInvalido(f"{donde}[{posicion}]: el campo 'contenido' debe ser texto")
+        filas.append((leccion['titulo'], leccion.get('contenido')))
+    return filas
+
+
+def validar_modulos(modulos):
+    """
+    Valida una lista de módulos con sus lecciones opcionales.
+    Retorna una lista de tuplas (titulo, filas_de_lecciones).
+    """
+    if not isinstance(modulos, list) or not modulos:
+        raise LoteInvalido("El campo 'modulos' debe ser una lista no vacía")
+    if len(modulos) > MAX_MODULOS_POR_LOTE:
+        raise LoteInvalido(f"Se permiten como máximo {MAX_MODULOS_POR_LOTE} módulos por lote", 413)
+
+    resultado = []
+    total_lecciones = 0
+    for posicion, modulo in enumerate(modulos):
+        if not isinstance(modulo, dict) or not modulo.get('titulo'):
+            raise LoteInvalido(f"modulos[{posicion}]: el campo 'titulo' es requerido")
+        if not isinstance(modulo['titulo'], str):
+            raise LoteInvalido(f"modulos[{posicion}]: el campo 'titulo' debe ser texto")
+        lecciones = validar_lecciones(modulo.get('lecciones', []), f"modulos[{posicion}].lecciones")
+        total_lecciones += len(lecciones)
+        resultado.append((modulo['titulo'], lecciones))
+
+    if total_lecciones > MAX_LECCIONES_POR_LOTE:
+        raise LoteInvalido(f"Se permiten como máximo {MAX_LECCIONES_POR_LOTE} lecciones por lote", 413)
+    return resultado
+
+
+def _ids_consecutivos(cursor):
+    """
+    True si el servidor da ids consecutivos a todas las filas de un mismo INSERT:
+    innodb_autoinc_lock_mode 0 o 1 y auto_increment_increment 1 (ver README).
+    Se consulta una vez por proceso y servidor; el sustituto SQLite siempre cumple.
+    """
+    clave = (BACKEND_CONFIG['tipo'], DB_CONFIG.get('host'), DB_CONFIG.get('port'))
+    if clave not in _modo_autoincremento:
+        if BACKEND_CONFIG['tipo'] == 'sqlite':
+            consecutivos = True
+        else:
+            cursor.execute("SELECT @@innodb_autoinc_lock_mode AS modo, "
+                           "@@auto_increment_increment AS incremento")
+            fila = cursor.fetchone()
+            if isinstance(fila, dict):
+                fila = (fila['modo'], fila['incremento'])
+            consecutivos = int(fila[0]) in (0, 1) and int(fila[1]) == 1
+            if not consecutivos:
+                logger.warning("innodb_autoinc_lock_mode=%s, auto_increment_increment=%s: "
+                               "los lotes se insertan fila por fila", fila[0], fila[1])
+        _modo_autoincremento[clave] = consecutivos
+    return _modo_autoincremento[clave]
+
+
+def ids_insertados(cursor, cantidad):
+    """
+    Ids, en orden, de las 'cantidad' filas que acaba de crear cursor.executemany("INSERT ...").
+    mysql.connector envía el lote como un solo INSERT de varias filas: lastrowid es el
+    id de la primera y, si _ids_consecutivos() lo confirma, las demás le siguen.
+    El sustituto SQLite hace lo mismo (ver conexion_sqlite.py).
+    """
+    if cursor.rowcount != cantidad or not cursor.lastrowid:
+        raise RuntimeError(f"El INSERT por lotes creó {cursor.rowcount} filas de {cantidad}")
+    return list(range(cursor.lastrowid, cursor.lastrowid + cantidad))
+
+
+def insertar_filas(cursor, sql, filas):
+    """
+    Inserta 'filas' con 'sql' (un INSERT con parámetros %s) y retorna sus ids en orden.
+    Con ids consecutivos es un solo INSERT de varias filas; si el servidor no los
+    garantiza, un INSERT por fila leyendo el lastrowid de cada una.
+    """
+    if _ids_consecutivos(cursor):
+        cursor.executemany(sql, filas)
+        return ids_insertados(cursor, len(filas))
+    ids = []
+    for fila in filas:
+        cursor.execute(sql, fila)
+        ids.append(cursor.lastrowid)
+    return ids
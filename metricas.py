@@ -0,0 +1,377 @@
+import atexit
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+from flask import g, request
+
+# --- Métricas en formato Prometheus (GET /metrics) ---
+# Se miden los requests (cantidad por ruta, método y status, latencia, tamaño de
+# la respuesta y requests en curso), las conexiones a la base de datos (aperturas,
+# cierres, espera para obtenerlas y tiempo en uso, ver conexion.py) y la duración
+# de las consultas (ver instrumentacion.py).
+#
+# Registrar una medición no toma ningún lock: cada hilo suma en su propio
+# fragmento (un diccionario que solo él escribe) y los fragmentos se juntan al
+# leer /metrics, que es mucho menos frecuente que los requests. Los fragmentos
+# de los hilos que ya terminaron se suman a uno solo, así la lista no crece con
+# cada hilo nuevo (el servidor de desarrollo crea uno por request).
+#
+# Con varios procesos de trabajo (ver servidor.py) cada proceso escribe sus
+# totales cada 'volcar_cada' segundos en '<directorio>/metricas-<pid>.json', y
+# /metrics suma los archivos de todos los procesos: responda el proceso que
+# responda, el resultado es el del servidor entero. Los contadores de un proceso
+# que ya terminó se siguen sumando (un contador nunca baja); los gauges (requests
+# en curso) solo cuentan si el proceso sigue vivo.
+
+METRICAS_CONFIG = {
+    'activa': True,
+    'directorio': None,     # Carpeta compartida por los procesos de trabajo (None: solo este proceso)
+    'volcar_cada': 5.0,     # Segundos entre escrituras del archivo de cada proceso
+    'buckets_latencia': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    'buckets_consultas': (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+    'buckets_tamano': (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+}
+
+# Nombre -> (tipo, ayuda, clave de los buckets en METRICAS_CONFIG)
+METRICAS = {
+    'http_requests_total': ('counter', 'Requests atendidos por endpoint, método y status.', None),
+    'http_request_duration_seconds': ('histogram', 'Duración de los requests (hasta enviar el último byte).', 'buckets_latencia'),
+    'http_response_size_bytes': ('histogram', 'Tamaño del cuerpo enviado (ya comprimido).', 'buckets_tamano'),
+    'http_requests_in_flight': ('gauge', 'Requests en curso.', None),
+    'db_connections_opened_total': ('counter', 'Conexiones abiertas con la base de datos.', None),
+    'db_connections_closed_total': ('counter', 'Conexiones con la base de datos cerradas.', None),
+    'db_connection_errors_total': ('counter', 'Errores al obtener una conexión (sin conexión o pool agotado).', None),
+    'db_connection_checkout_seconds': ('histogram', 'Espera para obtener una conexión del pool (incluye abrirla).', 'buckets_latencia'),
+    'db_connection_held_seconds': ('histogram', 'Tiempo que una conexión pasa fuera del pool.', 'buckets_latencia'),
+    'db_query_duration_seconds': ('histogram', 'Duración de cada consulta por tipo de sentencia.', 'buckets_consultas'),
+}
+
+
+# --- 1. Fragmentos por hilo ---
+class Fragmento:
+    """Totales de un hilo. Solo lo escribe su hilo; los demás solo lo copian."""
+
+    def __init__(self, hilo=None):
+        self.hilo = hilo         # None en el fragmento de los hilos terminados
+        self.valores = {}        # (nombre, etiquetas) -> número (contadores y gauges)
+        self.histogramas = {}    # (nombre, etiquetas) -> [cuenta por bucket..., +Inf, suma]
+
+
+_local = threading.local()
+_fragmentos = []
+_retirado = Fragmento()          # Lo que sumaron los hilos que ya terminaron
+_fragmentos_lock = threading.Lock()
+
+
+def _fragmento():
+    fragmento = getattr(_local, 'fragmento', None)
+    if fragmento is None:
+        fragmento = _nuevo_fragmento()
+    return fragmento
+
+
+def _nuevo_fragmento():
+    # Una vez por hilo: aquí sí hace falta el lock para anotarlo en la lista
+    fragmento = Fragmento(threading.current_thread())
+    with _fragmentos_lock:
+        _retirar_terminados()
+        _fragmentos.append(fragmento)
+    _local.fragmento = fragmento
+    _iniciar_volcado()
+    return fragmento
+
+
+def _despues_del_fork():
+    # Proceso nuevo: lo heredado es del padre y ya está (o estará) en su archivo.
+    # Se hace aquí y no comparando el pid en cada medición, que costaría una llamada al sistema.
+    global _local, _fragmentos, _retirado, _fragmentos_lock, _volcado_iniciado
+    _local = threading.local()
+    _fragmentos = []
+    _retirado = Fragmento()
+    _fragmentos_lock = threading.Lock()
+    _volcado_iniciado = False
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_despues_del_fork)
+
+
+def sumar(nombre, etiquetas=(), valor=1):
+    """Suma 'valor' al contador o gauge 'nombre'. 'etiquetas' es una tupla de pares (clave, valor)."""
+    if not METRICAS_CONFIG['activa']:
+        return
+    valores = _fragmento().valores
+    clave = (nombre, etiquetas)
+    valores[clave] = valores.get(clave, 0) + valor
+
+
+def observar(nombre, valor, etiquetas=()):
+    """Anota 'valor' en el histograma 'nombre'."""
+    if not METRICAS_CONFIG['activa']:
+        return
+    histogramas = _fragmento().histogramas
+    clave = (nombre, etiquetas)
+    limites = METRICAS_CONFIG[METRICAS[nombre][2]]
+    cuentas = histogramas.get(clave)
+    if cuentas is None:
+        cuentas = histogramas[clave] = [0] * (len(limites) + 2)
+    cuentas[bisect.bisect_left(limites, valor)] += 1
+    cuentas[-1] += valor
+
+
+def _retirar_terminados():
+    # Con _fragmentos_lock tomado. Un hilo terminado ya no escribe en su fragmento:
+    # se suma al de los terminados y se quita de la lista.
+    vivos = []
+    for fragmento in _fragmentos:
+        if fragmento.hilo.is_alive():
+            vivos.append(fragmento)
+        else:
+            _sumar_fragmento(_retirado.valores, _retirado.histogramas, fragmento)
+    _fragmentos[:] = vivos
+
+
+def _sumar_fragmento(valores, histogramas, fragmento):
+    # dict() y list() copian sin soltar el GIL: el hilo dueño no puede cambiar nada a la mitad
+    for clave, valor in dict(fragmento.valores).items():
+        valores[clave] = valores.get(clave, 0) + valor
+    for clave, cuentas in dict(fragmento.histogramas).items():
+        _sumar_cuentas(histogramas, clave, list(cuentas))
+
+
+def _totales_del_proceso():
+    valores, histogramas = {}, {}
+    with _fragmentos_lock:
+        _retirar_terminados()
+        fragmentos = list(_fragmentos)
+        _sumar_fragmento(valores, histogramas, _retirado)
+    for fragmento in fragmentos:
+        _sumar_fragmento(valores, histogramas, fragmento)
+    return valores, histogramas
+
+
+def _sumar_cuentas(histogramas, clave, cuentas):
+    total = histogramas.get(clave)
+    if total is None or len(total) != len(cuentas):
+        histogramas[clave] = cuentas
+    else:
+        for i, cuenta in enumerate(cuentas):
+            total[i] += cuenta
+
+
+def reiniciar():
+    """Pone todas las métricas de este proceso en cero (benchmarks y pruebas)."""
+    with _fragmentos_lock:
+        for fragmento in _fragmentos + [_retirado]:
+            fragmento.valores.clear()
+            fragmento.histogramas.clear()
+
+
+# --- 2. Archivos por proceso ---
+_volcado_iniciado = False
+
+
+def _archivo(pid):
+    return os.path.join(METRICAS_CONFIG['directorio'], f"metricas-{pid}.json")
+
+
+def volcar():
+    """Escribe los totales de este proceso en su archivo (si hay 'directorio')."""
+    if not METRICAS_CONFIG['directorio']:
+        return
+    valores, histogramas = _totales_del_proceso()
+    datos = {
+        'pid': os.getpid(),
+        'valores': [[nombre, etiquetas, valor] for (nombre, etiquetas), valor in valores.items()],
+        'histogramas': [[nombre, etiquetas, cuentas] for (nombre, etiquetas), cuentas in histogramas.items()],
+    }
+    os.makedirs(METRICAS_CONFIG['directorio'], exist_ok=True)
+    archivo = _archivo(os.getpid())
+    temporal = f"{archivo}.tmp"
+    # Escribir aparte y renombrar: quien lee nunca ve un archivo a medias
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, separators=(',', ':'))
+    os.replace(temporal, archivo)
+
+
+def _volcar_periodicamente():
+    while True:
+        time.sleep(METRICAS_CONFIG['volcar_cada'])
+        try:
+            volcar()
+        except OSError:
+            pass
+
+
+def _iniciar_volcado():
+    global _volcado_iniciado
+    if not METRICAS_CONFIG['directorio'] or _volcado_iniciado:
+        return
+    with _fragmentos_lock:
+        if _volcado_iniciado:
+            return
+        _volcado_iniciado = True
+    threading.Thread(target=_volcar_periodicamente, name='metricas-volcado', daemon=True).start()
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # Existe, pero es de otro usuario
+    return True
+
+
+def _leer_otros_procesos(valores, histogramas):
+    propio = _archivo(os.getpid())
+    for archivo in glob.glob(os.path.join(METRICAS_CONFIG['directorio'], 'metricas-*.json')):
+        if archivo == propio:
+            continue
+        try:
+            with open(archivo, encoding='utf-8') as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            continue
+        vivo = _proceso_vivo(datos['pid'])
+        for nombre, etiquetas, valor in datos['valores']:
+            if METRICAS.get(nombre, ('gauge',))[0] == 'gauge' and not vivo:
+                continue
+            clave = (nombre, tuple(tuple(par) for par in etiquetas))
+            valores[clave] = valores.get(clave, 0) + valor
+        for nombre, etiquetas, cuentas in datos['histogramas']:
+            _sumar_cuentas(histogramas, (nombre, tuple(tuple(par) for par in etiquetas)), cuentas)
+
+
+def limpiar_directorio(directorio=None):
+    """Borra los archivos de una ejecución anterior (al arrancar el servidor, antes de crear los procesos)."""
+    directorio = directorio or METRICAS_CONFIG['directorio']
+    if not directorio:
+        return
+    for archivo in glob.glob(os.path.join(directorio, 'metricas-*.json*')):
+        try:
+            os.remove(archivo)
+        except OSError:
+            pass
+
+
+# --- 3. Formato de texto de Prometheus ---
+def _etiquetas_texto(etiquetas):
+    if not etiquetas:
+        return ''
+    partes = []
+    for clave, valor in etiquetas:
+        valor = str(valor).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+        partes.append(f'{clave}="{valor}"')
+    return '{' + ','.join(partes) + '}'
+
+
+def _numero(valor):
+    if isinstance(valor, float) and not valor.is_integer():
+        return repr(valor)
+    return str(int(valor))
+
+
+def generar():
+    """Texto para GET /metrics con las métricas de todos los procesos."""
+    valores, histogramas = _totales_del_proceso()
+    if METRICAS_CONFIG['directorio']:
+        # El archivo propio se actualiza para que los demás procesos también lo vean al día
+        try:
+            volcar()
+        except OSError:
+            pass
+        _leer_otros_procesos(valores, histogramas)
+
+    lineas = []
+    for nombre, (tipo, ayuda, buckets) in METRICAS.items():
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        if tipo != 'histogram':
+            for (metrica, etiquetas), valor in sorted(valores.items()):
+                if metrica == nombre:
+                    lineas.append(f"{nombre}{_etiquetas_texto(etiquetas)} {_numero(valor)}")
+            continue
+        limites = METRICAS_CONFIG[buckets]
+        for (metrica, etiquetas), cuentas in sorted(histogramas.items()):
+            if metrica != nombre or len(cuentas) != len(limites) + 2:
+                continue
+            acumulado = 0
+            for limite, cuenta in zip(limites + (float('inf'),), cuentas):
+                acumulado += cuenta
+                le = '+Inf' if limite == float('inf') else _numero(limite)
+                lineas.append(f"{nombre}_bucket{_etiquetas_texto(etiquetas + (('le', le),))} {acumulado}")
+            lineas.append(f"{nombre}_sum{_etiquetas_texto(etiquetas)} {_numero(cuentas[-1])}")
+            lineas.append(f"{nombre}_count{_etiquetas_texto(etiquetas)} {acumulado}")
+    return '\n'.join(lineas) + '\n'
+
+
+# --- 4. Integración con Flask ---
+def _iniciar_request():
+    if not METRICAS_CONFIG['activa']:
+        return
+    g._metricas_inicio = time.perf_counter()
+    sumar('http_requests_in_flight')
+
+
+def _registrar(inicio, etiquetas, status, tamano):
+    sumar('http_requests_total', etiquetas + (('status', str(status)),))
+    observar('http_request_duration_seconds', time.perf_counter() - inicio, etiquetas)
+    observar('http_response_size_bytes', tamano, etiquetas)
+    sumar('http_requests_in_flight', valor=-1)
+
+
+def _contar_bytes(partes, enviados):
+    for parte in partes:
+        enviados[0] += len(parte)
+        yield parte
+
+
+def _terminar_request(respuesta):
+    inicio = g.pop('_metricas_inicio', None)
+    if inicio is None:
+        return respuesta
+    # Endpoint y no la URL: /api/courses/1 y /api/courses/2 son la misma serie
+    etiquetas = (('endpoint', request.endpoint or 'sin_ruta'), ('method', request.method))
+    status = respuesta.status_code
+    if not respuesta.is_streamed:
+        _registrar(inicio, etiquetas, status, respuesta.calculate_content_length() or 0)
+        return respuesta
+
+    # Por partes: la duración y el tamaño se conocen al terminar de enviar
+    from conexion import al_terminar_stream
+
+    enviados = [0]
+    respuesta.response = _contar_bytes(respuesta.response, enviados)
+    al_terminar_stream(respuesta, lambda: _registrar(inicio, etiquetas, status, enviados[0]))
+    return respuesta
+
+
+def _terminar_con_error(error=None):
+    # Si after_request no llegó a correr, el request igual se cuenta (como 500)
+    inicio = g.pop('_metricas_inicio', None)
+    if inicio is not None:
+        _registrar(inicio, (('endpoint', request.endpoint or 'sin_ruta'), ('method', request.method)), 500, 0)
+
+
+def init_app(app):
+    """Mide todos los requests de la aplicación. Debe registrarse antes que los demás after_request."""
+    app.before_request(_iniciar_request)
+    app.after_request(_terminar_request)
+    app.teardown_request(_terminar_con_error)
+
+
+def _volcar_al_salir():
+    # Al terminar el proceso queda escrito su total final
+    try:
+        volcar()
+    except OSError:
+        pass
+
+
+atexit.register(_volcar_al_salir)
@@ -0,0 +1,7 @@
+-- Índices de texto completo para GET /api/search (ver busqueda.py).
+-- Usan la colación de la tabla (utf8mb4_unicode_ci), así que 'programacion'
+-- encuentra 'Programación'. Las palabras de menos de 3 letras no se indexan
+-- (innodb_ft_min_token_size) y las palabras vacías del español se quitan de la
+-- consulta en busqueda.py.
+ALTER TABLE cursos ADD FULLTEXT INDEX ft_cursos_texto (titulo, descripcion);
+ALTER TABLE lecciones ADD FULLTEXT INDEX ft_lecciones_texto (titulo, contenido);
@@ -0,0 +1,36 @@
+-- Equivalente SQLite de los índices FULLTEXT (ver busqueda.py).
+-- Son tablas FTS5 "de contenido externo": guardan solo el índice y los triggers
+-- las mantienen al día con cada INSERT, UPDATE y DELETE (también en cascada).
+CREATE VIRTUAL TABLE cursos_fts USING fts5(
+  titulo, descripcion, content='cursos', content_rowid='id',
+  tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER cursos_fts_insertar AFTER INSERT ON cursos BEGIN
+  INSERT INTO cursos_fts (rowid, titulo, descripcion) VALUES (new.id, new.titulo, new.descripcion);
+END;
+CREATE TRIGGER cursos_fts_borrar AFTER DELETE ON cursos BEGIN
+  INSERT INTO cursos_fts (cursos_fts, rowid, titulo, descripcion) VALUES ('delete', old.id, old.titulo, old.descripcion);
+END;
+CREATE TRIGGER cursos_fts_actualizar AFTER UPDATE OF titulo, descripcion ON cursos BEGIN
+  INSERT INTO cursos_fts (cursos_fts, rowid, titulo, descripcion) VALUES ('delete', old.id, old.titulo, old.descripcion);
+  INSERT INTO cursos_fts (rowid, titulo, descripcion) VALUES (new.id, new.titulo, new.descripcion);
+END;
+
+CREATE VIRTUAL TABLE lecciones_fts USING fts5(
+  titulo, contenido, content='lecciones', content_rowid='id',
+  tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER lecciones_fts_insertar AFTER INSERT ON lecciones BEGIN
+  INSERT INTO lecciones_fts (rowid, titulo, contenido) VALUES (new.id, new.titulo, new.contenido);
+END;
+CREATE TRIGGER lecciones_fts_borrar AFTER DELETE ON lecciones BEGIN
+  INSERT INTO lecciones_fts (lecciones_fts, rowid, titulo, contenido) VALUES ('delete', old.id, old.titulo, old.contenido);
+END;
+CREATE TRIGGER lecciones_fts_actualizar AFTER UPDATE OF titulo, contenido ON lecciones BEGIN
+  INSERT INTO lecciones_fts (lecciones_fts, rowid, titulo, contenido) VALUES ('delete', old.id, old.titulo, old.contenido);
+  INSERT INTO lecciones_fts (rowid, titulo, contenido) VALUES (new.id, new.titulo, new.contenido);
+END;
+
+-- Indexa las filas que ya existían antes de la migración
+INSERT INTO cursos_fts (cursos_fts) VALUES ('rebuild');
+INSERT INTO lecciones_fts (lecciones_fts) VALUES ('rebuild');
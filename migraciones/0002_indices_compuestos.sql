@@ -0,0 +1,14 @@
+-- Índices para los filtros más usados por las rutas (sirve igual en MySQL y SQLite).
+-- MySQL borra solo el índice implícito de cada clave foránea cuando otro índice
+-- empieza por la misma columna, así que no quedan índices duplicados.
+
+-- eliminar_instructor: COUNT(*) ... WHERE instructor_id = %s AND is_published = TRUE
+-- get_cursos con ?instructor_id=
+CREATE INDEX idx_cursos_instructor_publicado ON cursos (instructor_id, is_published);
+
+-- get_cursos con ?is_published= (paginado por id)
+CREATE INDEX idx_cursos_publicado ON cursos (is_published, id);
+
+-- get_curso: módulos de un curso y lecciones de cada módulo, en orden de id
+CREATE INDEX idx_modulos_curso ON modulos (curso_id, id);
+CREATE INDEX idx_lecciones_modulo ON lecciones (modulo_id, id);
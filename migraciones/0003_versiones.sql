@@ -0,0 +1,16 @@
+-- Versión de cada fila para las peticiones condicionales (ETag / Last-Modified, ver versiones.py).
+-- 'revision' aumenta en 1 con cada cambio; 'updated_at' guarda cuándo fue.
+-- En cursos, la revisión cambia también cuando cambia cualquier parte de su árbol
+-- (módulos, lecciones o el nombre del instructor). Las rutas actualizan las dos
+-- columnas de forma explícita (sin ON UPDATE) para que funcione igual en SQLite.
+ALTER TABLE instructores
+  ADD COLUMN revision INT NOT NULL DEFAULT 1,
+  ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+ALTER TABLE cursos
+  ADD COLUMN revision INT NOT NULL DEFAULT 1,
+  ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+ALTER TABLE lecciones
+  ADD COLUMN revision INT NOT NULL DEFAULT 1,
+  ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
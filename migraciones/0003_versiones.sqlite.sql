@@ -0,0 +1,22 @@
+-- Mismas columnas que 0003_versiones.sql. SQLite no acepta CURRENT_TIMESTAMP como
+-- valor por defecto en ALTER TABLE ... ADD COLUMN, así que un trigger lo pone al insertar.
+ALTER TABLE instructores ADD COLUMN revision INT NOT NULL DEFAULT 1;
+ALTER TABLE instructores ADD COLUMN updated_at TIMESTAMP NULL;
+UPDATE instructores SET updated_at = CURRENT_TIMESTAMP;
+CREATE TRIGGER instructores_updated_at AFTER INSERT ON instructores WHEN new.updated_at IS NULL BEGIN
+  UPDATE instructores SET updated_at = CURRENT_TIMESTAMP WHERE id = new.id;
+END;
+
+ALTER TABLE cursos ADD COLUMN revision INT NOT NULL DEFAULT 1;
+ALTER TABLE cursos ADD COLUMN updated_at TIMESTAMP NULL;
+UPDATE cursos SET updated_at = CURRENT_TIMESTAMP;
+CREATE TRIGGER cursos_updated_at AFTER INSERT ON cursos WHEN new.updated_at IS NULL BEGIN
+  UPDATE cursos SET updated_at = CURRENT_TIMESTAMP WHERE id = new.id;
+END;
+
+ALTER TABLE lecciones ADD COLUMN revision INT NOT NULL DEFAULT 1;
+ALTER TABLE lecciones ADD COLUMN updated_at TIMESTAMP NULL;
+UPDATE lecciones SET updated_at = CURRENT_TIMESTAMP;
+CREATE TRIGGER lecciones_updated_at AFTER INSERT ON lecciones WHEN new.updated_at IS NULL BEGIN
+  UPDATE lecciones SET updated_at = CURRENT_TIMESTAMP WHERE id = new.id;
+END;
@@ -0,0 +1,21 @@
+-- Contadores para los listados (ver contadores.py): get_cursos devuelve cuántos
+-- módulos y lecciones tiene cada curso, y get_instructores cuántos cursos tiene
+-- cada instructor y cuántos están publicados, sin contar filas en cada request.
+-- Las rutas que crean o eliminan filas los mantienen en la misma transacción;
+-- 'python contadores.py reconstruir' corrige cualquier diferencia.
+ALTER TABLE cursos
+  ADD COLUMN modulo_count INT NOT NULL DEFAULT 0,
+  ADD COLUMN leccion_count INT NOT NULL DEFAULT 0;
+
+ALTER TABLE instructores
+  ADD COLUMN curso_count INT NOT NULL DEFAULT 0,
+  ADD COLUMN publicado_count INT NOT NULL DEFAULT 0;
+
+-- Valores iniciales de las filas que ya existen
+UPDATE cursos SET
+  modulo_count = (SELECT COUNT(*) FROM modulos m WHERE m.curso_id = cursos.id),
+  leccion_count = (SELECT COUNT(*) FROM lecciones l JOIN modulos m ON m.id = l.modulo_id WHERE m.curso_id = cursos.id);
+
+UPDATE instructores SET
+  curso_count = (SELECT COUNT(*) FROM cursos c WHERE c.instructor_id = instructores.id),
+  publicado_count = (SELECT COUNT(*) FROM cursos c WHERE c.instructor_id = instructores.id AND c.is_published = TRUE);
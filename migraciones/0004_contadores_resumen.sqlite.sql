@@ -0,0 +1,14 @@
+-- Mismas columnas que 0004_contadores_resumen.sql. SQLite solo acepta una
+-- columna por cada ALTER TABLE ... ADD COLUMN.
+ALTER TABLE cursos ADD COLUMN modulo_count INT NOT NULL DEFAULT 0;
+ALTER TABLE cursos ADD COLUMN leccion_count INT NOT NULL DEFAULT 0;
+ALTER TABLE instructores ADD COLUMN curso_count INT NOT NULL DEFAULT 0;
+ALTER TABLE instructores ADD COLUMN publicado_count INT NOT NULL DEFAULT 0;
+
+UPDATE cursos SET
+  modulo_count = (SELECT COUNT(*) FROM modulos m WHERE m.curso_id = cursos.id),
+  leccion_count = (SELECT COUNT(*) FROM lecciones l JOIN modulos m ON m.id = l.modulo_id WHERE m.curso_id = cursos.id);
+
+UPDATE instructores SET
+  curso_count = (SELECT COUNT(*) FROM cursos c WHERE c.instructor_id = instructores.id),
+  publicado_count = (SELECT COUNT(*) FROM cursos c WHERE c.instructor_id = instructores.id AND c.is_published = TRUE);
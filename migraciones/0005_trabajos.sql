@@ -0,0 +1,19 @@
+-- Cola persistente de trabajos en segundo plano (ver trabajos.py, almacén 'tabla').
+-- Un trabajo pendiente se puede tomar cuando llega 'disponible_en'. Al tomarlo pasa
+-- a 'en_curso' y 'disponible_en' se corre hasta el fin de su plazo: si el proceso
+-- muere a la mitad, otro lo vuelve a tomar cuando el plazo vence.
+CREATE TABLE trabajos (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  tipo VARCHAR(50) NOT NULL,
+  argumentos TEXT NOT NULL,                            -- JSON
+  estado VARCHAR(20) NOT NULL DEFAULT 'pendiente',     -- pendiente | en_curso | completado | fallido
+  intentos INT NOT NULL DEFAULT 0,
+  error TEXT NULL,
+  creado_en TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+  disponible_en TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+  iniciado_en TIMESTAMP NULL,
+  terminado_en TIMESTAMP NULL,
+  -- Próximos trabajos a tomar, trabajos por estado y limpieza de los terminados
+  INDEX idx_trabajos_estado (estado, disponible_en),
+  INDEX idx_trabajos_terminados (estado, terminado_en)
+);
@@ -0,0 +1,15 @@
+-- Misma tabla que 0005_trabajos.sql. SQLite no acepta INDEX dentro de CREATE TABLE.
+CREATE TABLE trabajos (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  tipo VARCHAR(50) NOT NULL,
+  argumentos TEXT NOT NULL,
+  estado VARCHAR(20) NOT NULL DEFAULT 'pendiente',
+  intentos INT NOT NULL DEFAULT 0,
+  error TEXT NULL,
+  creado_en TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+  disponible_en TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+  iniciado_en TIMESTAMP NULL,
+  terminado_en TIMESTAMP NULL
+);
+CREATE INDEX idx_trabajos_estado ON trabajos (estado, disponible_en);
+CREATE INDEX idx_trabajos_terminados ON trabajos (estado, terminado_en);
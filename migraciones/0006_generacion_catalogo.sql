@@ -0,0 +1,8 @@
+-- Generación del catálogo (ver versiones.py). La importación de catalogo.py la
+-- incrementa: los ids vuelven a usarse con otros datos, y la caché de árboles y el
+-- índice de publicación de cada proceso descartan lo guardado con otra generación.
+CREATE TABLE generacion_catalogo (
+  id INT NOT NULL PRIMARY KEY,       -- Siempre 1: la tabla tiene una sola fila
+  generacion INT NOT NULL
+);
+INSERT INTO generacion_catalogo (id, generacion) VALUES (1, 1);
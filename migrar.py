@@ -0,0 +1,231 @@
+# migrar.py
+# Migraciones versionadas del esquema de la base de datos.
+#
+# Uso:
+#   python migrar.py estado                  # Migraciones aplicadas y pendientes
+#   python migrar.py aplicar                 # Aplica todas las pendientes, en orden
+#   python migrar.py aplicar --hasta 0002    # Aplica las pendientes hasta esa versión
+#   python migrar.py aplicar --simular       # Muestra el SQL sin ejecutarlo
+#   python migrar.py nueva "agregar columna x"
+#
+# Cada migración es un archivo 'NNNN_descripcion.sql' en la carpeta 'migraciones'.
+# Si la migración necesita SQL distinto para el sustituto SQLite, se agrega
+# 'NNNN_descripcion.sqlite.sql' (si no existe, se usa el mismo .sql en los dos motores).
+# Las migraciones aplicadas se guardan en la tabla 'schema_migrations', con un
+# checksum para avisar si alguien modifica un archivo que ya se aplicó.
+#
+# Usa la misma configuración que la aplicación (variables DB_*, ver configuracion.py).
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+
+CARPETA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migraciones')
+
+SQL_TABLA_MIGRACIONES = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+      version VARCHAR(255) NOT NULL PRIMARY KEY,
+      checksum CHAR(64) NOT NULL,
+      duracion_ms INT NULL,
+      aplicada_en TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+_NOMBRE = re.compile(r'^(\d{4})_[\w-]+\.sql$')
+
+
+class MigracionError(Exception):
+    """Error al leer o aplicar una migración."""
+
+
+# --- 1. Archivos de migración ---
+def listar_migraciones(motor):
+    """Lista ordenada de (version, ruta) para el motor 'mysql' o 'sqlite'."""
+    migraciones = {}
+    for archivo in sorted(os.listdir(CARPETA)):
+        if not archivo.endswith('.sql') or archivo.endswith('.sqlite.sql'):
+            continue
+        if not _NOMBRE.match(archivo):
+            raise MigracionError(f"Nombre de migración no válido: {archivo} (se espera NNNN_descripcion.sql)")
+        version = archivo[:-len('.sql')]
+        numero = version[:4]
+        if numero in migraciones:
+            raise MigracionError(f"Hay dos migraciones con el número {numero}")
+        ruta = os.path.join(CARPETA, archivo)
+        variante = os.path.join(CARPETA, version + '.sqlite.sql')
+        if motor == 'sqlite' and os.path.exists(variante):
+            ruta = variante
+        migraciones[numero] = (version, ruta)
+    return [migraciones[numero] for numero in sorted(migraciones)]
+
+
+def _leer(ruta):
+    with open(ruta, encoding='utf-8') as archivo:
+        return archivo.read()
+
+
+def _checksum(sql):
+    return hashlib.sha256(sql.encode('utf-8')).hexdigest()
+
+
+def dividir_sentencias(sql):
+    """
+    Separa un script en sentencias (MySQL solo ejecuta una por llamada).
+    Quita los comentarios '--' y corta en cada ';' al final de una línea, así
+    que las migraciones de MySQL no pueden definir triggers ni procedimientos.
+    """
+    lineas = [linea for linea in sql.splitlines() if not linea.strip().startswith('--')]
+    sentencias = re.split(r';\s*$', '\n'.join(lineas), flags=re.MULTILINE)
+    return [sentencia.strip() for sentencia in sentencias if sentencia.strip()]
+
+
+# --- 2. Estado y aplicación ---
+def versiones_aplicadas(conn):
+    """Diccionario {version: checksum} de las migraciones ya aplicadas."""
+    cursor = conn.cursor()
+    cursor.execute(SQL_TABLA_MIGRACIONES)
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    aplicadas = dict(cursor.fetchall())
+    cursor.close()
+    conn.commit()
+    return aplicadas
+
+
+def estado(conn, motor):
+    """Lista de (version, estado) con estado 'aplicada', 'pendiente' o 'modificada'."""
+    aplicadas = versiones_aplicadas(conn)
+    resultado = []
+    for version, ruta in listar_migraciones(motor):
+        if version not in aplicadas:
+            resultado.append((version, 'pendiente'))
+        elif aplicadas[version] != _checksum(_leer(ruta)):
+            resultado.append((version, 'modificada'))
+        else:
+            resultado.append((version, 'aplicada'))
+    return resultado
+
+
+def _ejecutar(conn, motor, sql):
+    if motor == 'sqlite':
+        # executescript() entiende los triggers (BEGIN ... ; ... END;). En SQLite los
+        # cambios de esquema son transaccionales: si algo falla no queda nada a medias.
+        conn.ejecutar_script(f"BEGIN;\n{sql}\nCOMMIT;")
+        return
+    cursor = conn.cursor()
+    for sentencia in dividir_sentencias(sql):
+        cursor.execute(sentencia)
+    cursor.close()
+
+
+def aplicar_pendientes(conn, motor, hasta=None, simular=False, salida=print):
+    """
+    Aplica en orden las migraciones pendientes (hasta la versión 'hasta', incluida).
+    Retorna la lista de versiones aplicadas. 'salida' recibe los mensajes de progreso.
+    """
+    salida = salida or (lambda mensaje: None)
+    if motor == 'mysql' and not simular:
+        _bloquear(conn)
+    try:
+        aplicadas = versiones_aplicadas(conn)
+        nuevas = []
+        for version, ruta in listar_migraciones(motor):
+            if hasta is not None and version[:4] > hasta:
+                break
+            if version in aplicadas:
+                continue
+            sql = _leer(ruta)
+            if simular:
+                salida(f"-- {version} ({os.path.basename(ruta)})\n{sql}")
+                nuevas.append(version)
+                continue
+
+            salida(f"Aplicando {version}...")
+            inicio = time.perf_counter()
+            try:
+                _ejecutar(conn, motor, sql)
+            except Exception as e:
+                conn.rollback()
+                raise MigracionError(f"La migración {version} falló: {e}") from e
+            duracion_ms = int((time.perf_counter() - inicio) * 1000)
+            cursor = conn.cursor()
+            cursor.execute("INSERT INTO schema_migrations (version, checksum, duracion_ms) VALUES (%s, %s, %s)",
+                           (version, _checksum(sql), duracion_ms))
+            cursor.close()
+            conn.commit()
+            salida(f"  {version} aplicada en {duracion_ms} ms")
+            nuevas.append(version)
+        return nuevas
+    finally:
+        if motor == 'mysql' and not simular:
+            _desbloquear(conn)
+
+
+# En MySQL los cambios de esquema no son transaccionales: un bloqueo con nombre
+# evita que dos despliegues apliquen la misma migración a la vez.
+def _bloquear(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT GET_LOCK('plataforma_migraciones', 60)")
+    (obtenido,) = cursor.fetchone()
+    cursor.close()
+    if obtenido != 1:
+        raise MigracionError("Otro proceso está aplicando migraciones")
+
+
+def _desbloquear(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT RELEASE_LOCK('plataforma_migraciones')")
+    cursor.fetchone()
+    cursor.close()
+
+
+# --- 3. Nueva migración ---
+def nueva_migracion(descripcion):
+    """Crea el archivo vacío de la siguiente migración y retorna su ruta."""
+    numeros = [int(archivo[:4]) for archivo in os.listdir(CARPETA) if _NOMBRE.match(archivo)]
+    numero = max(numeros, default=0) + 1
+    nombre = re.sub(r'\W+', '_', descripcion.strip().lower()).strip('_')
+    ruta = os.path.join(CARPETA, f"{numero:04d}_{nombre}.sql")
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        archivo.write(f"-- {descripcion}\n")
+    return ruta
+
+
+if __name__ == '__main__':
+    import configuracion
+    import conexion
+
+    parser = argparse.ArgumentParser(description="Aplica las migraciones del esquema de la base de datos.")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    comandos.add_parser('estado', help="Muestra las migraciones aplicadas y pendientes")
+    aplicar = comandos.add_parser('aplicar', help="Aplica las migraciones pendientes")
+    aplicar.add_argument('--hasta', default=None, help="Última versión a aplicar (por ejemplo 0002)")
+    aplicar.add_argument('--simular', action='store_true', help="Muestra el SQL sin ejecutarlo")
+    nueva = comandos.add_parser('nueva', help="Crea el archivo de una nueva migración")
+    nueva.add_argument('descripcion')
+    args = parser.parse_args()
+
+    if args.comando == 'nueva':
+        print(f"Migración creada: {nueva_migracion(args.descripcion)}")
+        sys.exit(0)
+
+    configuracion.aplicar_entorno()
+    motor = conexion.BACKEND_CONFIG['tipo']
+    conn = conexion.get_db_connection()
+    if conn is None:
+        print("No se pudo conectar a la base de datos.")
+        sys.exit(1)
+    try:
+        if args.comando == 'estado':
+            for version, situacion in estado(conn, motor):
+                print(f"{situacion:<11} {version}")
+        else:
+            nuevas = aplicar_pendientes(conn, motor, hasta=args.hasta, simular=args.simular)
+            if not nuevas:
+                print("No hay migraciones pendientes.")
+    except MigracionError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
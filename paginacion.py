@@ -0,0 +1,132 @@
+import base64
+import json
+
+from flask import request, jsonify, Response, stream_with_context
+
+from serializacion import generar_filas_json
+from versiones import respuesta_condicional
+
+# --- Paginación por cursor (keyset) para los listados ---
+# En lugar de OFFSET, cada página pide las filas con id mayor al último id
+# de la página anterior (?after_id=). Así cada página cuesta lo mismo sin
+# importar cuántas filas tenga la tabla.
+#
+# Parámetros aceptados por los listados:
+#   ?limit=N        Tamaño de la página (por defecto 100, máximo 1000)
+#   ?after_id=N     Devuelve las filas con id mayor a N
+#   ?cursor=...     Token opaco de la página siguiente (cabecera X-Next-Cursor)
+#   ?stream=ndjson  Envía todas las filas (una por línea) sin cargarlas en memoria
+#   ?stream=json    Igual, pero como un arreglo JSON escrito por partes
+
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+FORMATOS_STREAM = {'ndjson': 'application/x-ndjson', 'json': 'application/json'}
+
+
+class ParametroInvalido(ValueError):
+    """Error en los parámetros de paginación o filtros (se responde con 400)."""
+
+
+def codificar_token(datos):
+    """Convierte un diccionario en un token opaco para la URL (base64 de su JSON)."""
+    texto = json.dumps(datos, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def decodificar_token(token):
+    """Inverso de codificar_token(). Lanza ParametroInvalido si el token no es válido."""
+    try:
+        relleno = '=' * (-len(token) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(token + relleno))
+    except (ValueError, TypeError):
+        raise ParametroInvalido("El parámetro 'cursor' no es válido")
+    if not isinstance(datos, dict):
+        raise ParametroInvalido("El parámetro 'cursor' no es válido")
+    return datos
+
+
+def codificar_cursor(after_id, filtros):
+    """Crea el token opaco de la página siguiente (incluye los filtros usados)."""
+    return codificar_token({"after_id": after_id, "filtros": filtros})
+
+
+def decodificar_cursor(token):
+    datos = decodificar_token(token)
+    try:
+        return int(datos['after_id']), dict(datos.get('filtros') or {})
+    except (ValueError, KeyError, TypeError):
+        raise ParametroInvalido("El parámetro 'cursor' no es válido")
+
+
+def leer_entero(valor, nombre):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ParametroInvalido(f"El parámetro '{nombre}' debe ser un número entero")
+
+
+def leer_booleano(valor, nombre):
+    texto = str(valor).lower()
+    if texto in ('1', 'true', 'si', 'sí'):
+        return True
+    if texto in ('0', 'false', 'no'):
+        return False
+    raise ParametroInvalido(f"El parámetro '{nombre}' debe ser true o false")
+
+
+def leer_parametros(filtros_permitidos):
+    """
+    Lee los parámetros de paginación del request actual.
+    'filtros_permitidos' es un diccionario {nombre: 'int' | 'bool'}.
+    Retorna (after_id, limite, filtros, formato_stream).
+    """
+    args = request.args
+    formato = args.get('stream')
+    if formato is not None and formato not in FORMATOS_STREAM:
+        raise ParametroInvalido("El parámetro 'stream' debe ser 'ndjson' o 'json'")
+
+    if 'cursor' in args:
+        # El cursor ya trae los filtros de la primera página.
+        after_id, filtros = decodificar_cursor(args['cursor'])
+    else:
+        after_id = leer_entero(args.get('after_id', 0), 'after_id')
+        filtros = {}
+        for nombre, tipo in filtros_permitidos.items():
+            if nombre in args:
+                convertir = leer_booleano if tipo == 'bool' else leer_entero
+                filtros[nombre] = convertir(args[nombre], nombre)
+
+    if 'limit' in args:
+        limite = leer_entero(args['limit'], 'limit')
+        if limite < 1 or limite > LIMITE_MAXIMO:
+            raise ParametroInvalido(f"El parámetro 'limit' debe estar entre 1 y {LIMITE_MAXIMO}")
+    else:
+        # En modo stream sin 'limit' se envía la tabla completa.
+        limite = None if formato else LIMITE_POR_DEFECTO
+
+    return after_id, limite, filtros, formato
+
+
+def respuesta_pagina(filas, limite, filtros):
+    """
+    Responde con el arreglo JSON de la página. Las filas deben venir con
+    una fila extra (se consultó LIMIT limite + 1) para saber si hay más páginas.
+    Lleva un ETag del cuerpo: si el cliente ya tiene la página se responde 304.
+    """
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+    respuesta = jsonify(filas)
+    if hay_mas:
+        token = codificar_cursor(filas[-1]['id'], filtros)
+        respuesta.headers['X-Next-Cursor'] = token
+        respuesta.headers['Link'] = f'<{request.base_url}?cursor={token}&limit={limite}>; rel="next"'
+    return respuesta_condicional(respuesta)
+
+
+def respuesta_stream(cursor, formato):
+    """
+    Envía todas las filas del cursor (sin buffer) como NDJSON o arreglo JSON,
+    leyéndolas a medida que se escriben para usar memoria constante.
+    """
+    generador = generar_filas_json(cursor, formato == 'ndjson')
+    return Response(stream_with_context(generador), mimetype=FORMATOS_STREAM[formato])
@@ -0,0 +1,86 @@
+from flask import Blueprint, request, jsonify
+from conexion import get_db_connection
+from busqueda import buscar, terminos_de_busqueda, TIPOS
+from paginacion import codificar_token, decodificar_token, leer_entero, leer_booleano, ParametroInvalido
+
+# Creamos el Blueprint para la ruta /api/search
+busqueda_bp = Blueprint('busqueda_bp', __name__)
+
+# Los resultados van ordenados por relevancia, así que se paginan por posición.
+# Más allá de MAX_RESULTADOS no se pagina (nadie revisa tantos resultados y
+# cada página más profunda obliga a ordenar más filas).
+LIMITE_BUSQUEDA_POR_DEFECTO = 20
+LIMITE_MAXIMO_BUSQUEDA = 100
+MAX_RESULTADOS = 1000
+
+
+def _leer_parametros_busqueda():
+    """Retorna (texto, tipo, is_published, limite, desplazamiento) del request actual."""
+    args = request.args
+    if 'cursor' in args:
+        # El cursor ya trae la búsqueda de la primera página.
+        datos = decodificar_token(args['cursor'])
+        try:
+            texto, tipo = str(datos['q']), datos['tipo']
+            is_published = datos.get('is_published')
+            desplazamiento = int(datos['desplazamiento'])
+        except (KeyError, TypeError, ValueError):
+            raise ParametroInvalido("El parámetro 'cursor' no es válido")
+    else:
+        texto = args.get('q', '').strip()
+        tipo = args.get('tipo', 'cursos')
+        is_published = None
+        if 'is_published' in args:
+            is_published = leer_booleano(args['is_published'], 'is_published')
+        desplazamiento = 0
+
+    if not texto:
+        raise ParametroInvalido("El parámetro 'q' es obligatorio")
+    if tipo not in TIPOS:
+        raise ParametroInvalido(f"El parámetro 'tipo' debe ser uno de: {', '.join(TIPOS)}")
+
+    limite = leer_entero(args.get('limit', LIMITE_BUSQUEDA_POR_DEFECTO), 'limit')
+    if limite < 1 or limite > LIMITE_MAXIMO_BUSQUEDA:
+        raise ParametroInvalido(f"El parámetro 'limit' debe estar entre 1 y {LIMITE_MAXIMO_BUSQUEDA}")
+    if desplazamiento < 0 or desplazamiento >= MAX_RESULTADOS:
+        raise ParametroInvalido("El parámetro 'cursor' no es válido")
+
+    return texto, tipo, is_published, limite, desplazamiento
+
+
+# --- Endpoint 1: BUSCAR CURSOS O LECCIONES ---
+# Ruta: GET /api/search?q=texto
+# Parámetros opcionales: ?tipo=cursos|lecciones (por defecto cursos), ?is_published=true|false,
+# ?limit=N (máximo 100). La página siguiente llega en la cabecera X-Next-Cursor (?cursor=...).
+@busqueda_bp.route('/', methods=['GET'])
+def buscar_contenido():
+    try:
+        texto, tipo, is_published, limite, desplazamiento = _leer_parametros_busqueda()
+    except ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
+    terminos = terminos_de_busqueda(texto)
+    if not terminos:
+        # Solo había palabras vacías ("de", "la", "para"...) o demasiado cortas
+        return jsonify([])
+
+    try:
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({"error": "Error de conexión a la base de datos"}), 500
+
+        limite = min(limite, MAX_RESULTADOS - desplazamiento)
+        # Pedimos una fila extra para saber si existe una página siguiente
+        filas = buscar(conn, tipo, terminos, limite + 1, desplazamiento, is_published)
+        conn.close()
+
+        hay_mas = len(filas) > limite and desplazamiento + limite < MAX_RESULTADOS
+        respuesta = jsonify(filas[:limite])
+        if hay_mas:
+            token = codificar_token({"q": texto, "tipo": tipo, "is_published": is_published,
+                                     "desplazamiento": desplazamiento + limite})
+            respuesta.headers['X-Next-Cursor'] = token
+            respuesta.headers['Link'] = f'<{request.base_url}?cursor={token}&limit={limite}>; rel="next"'
+        return respuesta
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,81 @@
+import gzip
+
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from conexion import get_db_connection
+from cache import obtener_cache
+from indice_publicacion import obtener_indice
+from catalogo import exportar, importar, CatalogoInvalido, AVISO_CDN
+from paginacion import leer_entero, ParametroInvalido
+
+# Creamos el Blueprint para la ruta /api/catalog
+catalogo_bp = Blueprint('catalogo_bp', __name__)
+
+# El formato del archivo y las reglas de la importación están en catalogo.py
+LOTE_POR_DEFECTO = 1000
+LOTE_MAXIMO = 10000
+
+
+def _leer_lote():
+    lote = leer_entero(request.args.get('lote', LOTE_POR_DEFECTO), 'lote')
+    if lote < 1 or lote > LOTE_MAXIMO:
+        raise ParametroInvalido(f"El parámetro 'lote' debe estar entre 1 y {LOTE_MAXIMO}")
+    return lote
+
+
+# --- Endpoint 1: EXPORTAR EL CATÁLOGO ---
+# Ruta: GET /api/catalog/export
+# Parámetro opcional: ?lote=N (filas por lectura). Se envía por partes mientras
+# se leen las tablas, comprimido si el cliente lo acepta (ver compresion.py).
+@catalogo_bp.route('/export', methods=['GET'])
+def exportar_catalogo():
+    try:
+        lote = _leer_lote()
+    except ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({"error": "Error de conexión a la base de datos"}), 500
+
+    return Response(stream_with_context(exportar(conn, lote)), mimetype='application/x-ndjson',
+                    headers={'Content-Disposition': 'attachment; filename="catalogo.ndjson"',
+                             'Cache-Control': 'no-store'})
+
+
+# --- Endpoint 2: IMPORTAR EL CATÁLOGO ---
+# Ruta: POST /api/catalog/import
+# Cuerpo: un archivo exportado (NDJSON), opcionalmente con Content-Encoding: gzip.
+# Solo en una base de datos vacía (409 si no). Se lee por líneas, sin cargar el cuerpo entero.
+@catalogo_bp.route('/import', methods=['POST'])
+def importar_catalogo():
+    try:
+        lote = _leer_lote()
+    except ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
+    cuerpo = request.stream
+    if request.content_encoding == 'gzip':
+        cuerpo = gzip.GzipFile(fileobj=cuerpo, mode='rb')
+    elif request.content_encoding:
+        return jsonify({"error": "Content-Encoding no soportado (solo gzip)"}), 415
+
+    try:
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({"error": "Error de conexión a la base de datos"}), 500
+
+        filas = importar(conn, cuerpo, lote)
+        # Los ids vuelven a empezar: nada de lo guardado antes sirve. Los demás procesos
+        # lo descartan al ver la nueva generación del catálogo (ver versiones.py); aquí
+        # se libera enseguida la memoria, y el backend compartido de la caché.
+        obtener_cache().invalidar_todo()
+        obtener_indice().limpiar()
+        return jsonify({"message": "Catálogo importado exitosamente", "filas": filas,
+                        "aviso": AVISO_CDN}), 201
+    except CatalogoInvalido as e:
+        return jsonify({"error": str(e)}), e.status
+    except (OSError, EOFError) as e:
+        # Cuerpo gzip dañado o cortado
+        return jsonify({"error": f"No se pudo leer el cuerpo: {e}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
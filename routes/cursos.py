@@ -1,67 +1,231 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from conexion import get_db_connection
+from serializacion import abrir_objeto, dumps, MapaColumnas
+from cache import obtener_cache
+from compresion import elegir_codificacion, precomprimir
+from contadores import sumar_contenido_curso, sumar_cursos_instructor, cambiar_instructor
+from indice_publicacion import obtener_indice
+from lotes import validar_modulos, insertar_filas, LoteInvalido
+from paginacion import leer_parametros, respuesta_pagina, respuesta_stream, ParametroInvalido
+from trabajos import encolar, tarea
+from transacciones import ejecutar_transaccion, bloquear_curso_editable, ErrorNegocio
+from versiones import (cabeceras_validacion, etag_curso, no_modificado, respuesta_304, SQL_NUEVA_REVISION,
+                       CACHE_CONTROL_PUBLICADO, CACHE_CONTROL_REVALIDAR, leer_generacion, version_arbol)
 
 # Creamos el Blueprint para las rutas que empiezan con /api/courses
 cursos_bp = Blueprint('cursos_bp', __name__)
 
 # --- Endpoint 1: OBTENER TODOS LOS CURSOS ---
 # Ruta: GET /api/courses
+# Paginado por cursor (ver paginacion.py). Filtros opcionales: ?is_published=true|false, ?instructor_id=N
+# Cada curso trae 'modulo_count' y 'leccion_count' (ver contadores.py).
 @cursos_bp.route('/', methods=['GET'])
 def get_cursos():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+        after_id, limite, filtros, formato = leer_parametros({'is_published': 'bool', 'instructor_id': 'int'})
+    except ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        # Construimos el WHERE solo con los filtros recibidos
+        condiciones = ["c.id > %s"]
+        params = [after_id]
+        if 'is_published' in filtros:
+            condiciones.append("c.is_published = %s")
+            params.append(filtros['is_published'])
+        if 'instructor_id' in filtros:
+            condiciones.append("c.instructor_id = %s")
+            params.append(filtros['instructor_id'])
+
         # Usamos un LEFT JOIN para obtener también el nombre del instructor
-        cursor.execute("""
-            SELECT c.id, c.titulo, c.descripcion, c.is_published, c.instructor_id, i.nombre as instructor_nombre
+        query = f"""
+            SELECT c.id, c.titulo, c.descripcion, c.is_published, c.instructor_id, i.nombre as instructor_nombre,
+                   c.modulo_count, c.leccion_count
             FROM cursos c
             LEFT JOIN instructores i ON c.instructor_id = i.id
+            WHERE {' AND '.join(condiciones)}
             ORDER BY c.id ASC
-        """)
-        cursos = cursor.fetchall()
+        """
+        if limite is not None:
+            # Pedimos una fila extra para saber si existe una página siguiente
+            query += " LIMIT %s"
+            params.append(limite + 1)
+
+        conn = get_db_connection()
+        if formato:
+            cursor = conn.cursor()
+            cursor.execute(query, tuple(params))
+            return respuesta_stream(cursor, formato)
+
+        # Cursor de tuplas: los nombres de las columnas se resuelven una vez por página
+        cursor = conn.cursor()
+        cursor.execute(query, tuple(params))
+        cursos = MapaColumnas.de_cursor(cursor).filas(cursor.fetchall())
         cursor.close()
         conn.close()
-        return jsonify(cursos)
+        return respuesta_pagina(cursos, limite, filtros)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # --- Endpoint 2: OBTENER UN SOLO CURSO POR ID ---
 # Ruta: GET /api/courses/<id>
+# Parámetro opcional: ?fields=outline devuelve solo la estructura (sin el 'contenido' de las lecciones).
 @cursos_bp.route('/<int:id>', methods=['GET'])
 def get_curso(id):
+    incluir_contenido = request.args.get('fields', 'full') != 'outline'
+    variante = 'full' if incluir_contenido else 'outline'
+
     try:
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        # Obtenemos el curso y también los módulos y lecciones que le pertenecen
-        cursor.execute("""
-            SELECT c.*, i.nombre as instructor_nombre
-            FROM cursos c
-            LEFT JOIN instructores i ON c.instructor_id = i.id
-            WHERE c.id = %s
-        """, (id,))
-        curso = cursor.fetchone()
+
+        # Los cursos publicados casi no cambian, así que su árbol puede venir de la caché.
+        # Solo se usa si el curso sigue publicado y en la misma versión: el nombre del
+        # instructor puede cambiar, o importarse otro catálogo con los mismos ids, y la
+        # caché de los otros procesos no se entera (ver versiones.py).
+        guardado = obtener_cache().obtener(id, variante)
+        if guardado is not None and guardado[0] == _version_publicada(conn, id):
+            _, cabeceras, cuerpos = guardado
+            if no_modificado(cabeceras):
+                return respuesta_304(cabeceras)
+            # Si el cliente acepta gzip o brotli se envía la versión ya comprimida (ver compresion.py)
+            codificacion = elegir_codificacion([c for c in cuerpos if c != 'identity'])
+            cabeceras = {**cabeceras, 'X-Cache': 'HIT'}
+            if codificacion is not None:
+                cabeceras['Content-Encoding'] = codificacion
+            return Response(cuerpos[codificacion or 'identity'], mimetype='application/json', headers=cabeceras)
+
+        curso = _leer_curso(conn, id)
 
         if not curso:
             return jsonify({"error": "Curso no encontrado"}), 404
 
-        # Obtenemos los módulos de este curso
-        cursor.execute("SELECT * FROM modulos WHERE curso_id = %s ORDER BY id ASC", (id,))
-        modulos = cursor.fetchall()
-        
-        # Para cada módulo, obtenemos sus lecciones
-        for modulo in modulos:
-            cursor.execute("SELECT * FROM lecciones WHERE modulo_id = %s ORDER BY id ASC", (modulo['id'],))
-            lecciones = cursor.fetchall()
-            modulo['lecciones'] = lecciones # Añadimos las lecciones al diccionario del módulo
-        
-        curso['modulos'] = modulos # Añadimos los módulos al diccionario del curso
+        # La revisión del curso cubre todo su árbol: si el cliente ya la tiene,
+        # respondemos 304 sin leer módulos ni lecciones (ver versiones.py).
+        cabeceras = cabeceras_validacion(
+            etag_curso(curso, variante), curso['updated_at'],
+            CACHE_CONTROL_PUBLICADO if curso['is_published'] else CACHE_CONTROL_REVALIDAR)
+        if no_modificado(cabeceras):
+            return respuesta_304(cabeceras)
 
-        cursor.close()
-        conn.close()
-        return jsonify(curso)
+        # El resto del árbol (módulos y lecciones) se envía por partes mientras se leen las filas.
+        generador = _generar_arbol_curso(conn, curso, incluir_contenido)
+        if curso['is_published']:
+            version = version_arbol(leer_generacion(conn), curso['revision'])
+            generador = _guardar_en_cache(generador, id, variante, version, cabeceras)
+        return Response(stream_with_context(generador), mimetype='application/json',
+                        headers={**cabeceras, 'X-Cache': 'MISS'})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+SQL_CURSO = """
+    SELECT c.*, i.nombre as instructor_nombre
+    FROM cursos c
+    LEFT JOIN instructores i ON c.instructor_id = i.id
+    WHERE c.id = %s
+"""
+
+def _leer_curso(conn, curso_id):
+    cursor = conn.cursor()
+    cursor.execute(SQL_CURSO, (curso_id,))
+    curso = MapaColumnas.de_cursor(cursor).fila(cursor.fetchone())
+    cursor.close()
+    return curso
+
+# Versión actual del árbol de un curso publicado (ver versiones.version_arbol)
+SQL_VERSION_PUBLICADA = """
+    SELECT g.generacion, c.revision
+    FROM cursos c
+    JOIN generacion_catalogo g ON g.id = 1
+    WHERE c.id = %s AND c.is_published = TRUE
+"""
+
+def _version_publicada(conn, curso_id):
+    """Versión actual del árbol del curso, o None si no existe o no está publicado."""
+    cursor = conn.cursor()
+    cursor.execute(SQL_VERSION_PUBLICADA, (curso_id,))
+    fila = cursor.fetchone()
+    cursor.close()
+    return version_arbol(*fila) if fila else None
+
+# Una sola consulta trae todos los módulos del curso con sus lecciones, ya ordenados.
+# Los módulos sin lecciones aparecen una vez con las columnas de la lección en NULL.
+SQL_MODULOS_Y_LECCIONES = """
+    SELECT m.id, m.titulo, l.id, l.titulo{contenido}
+    FROM modulos m
+    LEFT JOIN lecciones l ON l.modulo_id = m.id
+    WHERE m.curso_id = %s
+    ORDER BY m.id ASC, l.id ASC
+"""
+
+def _generar_arbol_curso(conn, curso, incluir_contenido):
+    """
+    Genera el JSON del curso con sus módulos y lecciones en un solo recorrido de las filas.
+    Cada módulo se envía en cuanto se termina de leer, sin esperar al resto del curso.
+    """
+    columna_contenido = ", l.contenido" if incluir_contenido else ""
+    cursor = conn.cursor()
+    cursor.execute(SQL_MODULOS_Y_LECCIONES.format(contenido=columna_contenido), (curso['id'],))
+
+    yield abrir_objeto(curso, 'modulos') + b'['
+
+    # Las lecciones de cada módulo se juntan y se serializan con un solo dumps()
+    modulo = None
+    lecciones = []
+    for fila in cursor:
+        modulo_id, modulo_titulo, leccion_id, leccion_titulo = fila[:4]
+
+        if modulo is None or modulo_id != modulo['id']:
+            # Empieza un módulo nuevo: enviamos el anterior ya completo.
+            if modulo is not None:
+                yield abrir_objeto(modulo, 'lecciones') + dumps(lecciones) + b'},'
+            modulo = {"id": modulo_id, "titulo": modulo_titulo, "curso_id": curso['id']}
+            lecciones = []
+
+        if leccion_id is not None:
+            leccion = {"id": leccion_id, "titulo": leccion_titulo, "modulo_id": modulo_id}
+            if incluir_contenido:
+                leccion['contenido'] = fila[4]
+            lecciones.append(leccion)
+
+    ultimo = abrir_objeto(modulo, 'lecciones') + dumps(lecciones) + b'}' if modulo is not None else b''
+    yield ultimo + b']}'
+    cursor.close()
+
+def _guardar_en_cache(generador, curso_id, variante, version, cabeceras):
+    """
+    Deja pasar las partes del árbol mientras se envían y, si se envió completo,
+    guarda el JSON en la caché, también comprimido. Si el árbol es demasiado
+    grande deja de acumularlo.
+    """
+    limite = obtener_cache().max_bytes_entrada
+    partes = []
+    tamano = 0
+    for parte in generador:
+        if partes is not None:
+            partes.append(parte)
+            tamano += len(parte)
+            if tamano > limite:
+                partes = None
+        yield parte
+    if partes is not None:
+        obtener_cache().guardar(curso_id, variante, version, precomprimir(b''.join(partes)), cabeceras)
+
+@tarea('precalcular_curso')
+def precalcular_curso(conn, curso_id):
+    """
+    Trabajo en segundo plano que encola publicar_curso (ver trabajos.py): arma los
+    dos árboles del curso publicado (completo y outline), los comprime y los guarda
+    en la caché con sus cabeceras, así la primera lectura ya es un acierto.
+    """
+    curso = _leer_curso(conn, curso_id)
+    if not curso or not curso['is_published']:
+        return
+    version = version_arbol(leer_generacion(conn), curso['revision'])
+    for variante, incluir_contenido in (('full', True), ('outline', False)):
+        cabeceras = cabeceras_validacion(etag_curso(curso, variante), curso['updated_at'], CACHE_CONTROL_PUBLICADO)
+        cuerpo = b''.join(_generar_arbol_curso(conn, curso, incluir_contenido))
+        obtener_cache().guardar(curso_id, variante, version, precomprimir(cuerpo), cabeceras)
+
 # --- Endpoint 3: CREAR UN NUEVO CURSO ---
 # Ruta: POST /api/courses
 @cursos_bp.route('/', methods=['POST'])
@@ -73,120 +237,189 @@ def crear_curso():
     if not titulo or not instructor_id:
         return jsonify({"error": "Los campos 'titulo' e 'instructor_id' son requeridos"}), 400
 
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+    def crear(cursor):
         cursor.execute("INSERT INTO cursos (titulo, descripcion, instructor_id) VALUES (%s, %s, %s)", 
                        (titulo, data.get('descripcion'), instructor_id))
-        conn.commit()
         nuevo_id = cursor.lastrowid
-        cursor.close()
-        conn.close()
-        return jsonify({"message": "Curso creado exitosamente", "id": nuevo_id}), 201
+        sumar_cursos_instructor(cursor, instructor_id, cursos=1)
+        return nuevo_id
+
+    try:
+        nuevo_id = ejecutar_transaccion(crear)
     except Exception as e:
         # Manejo de error si el instructor_id no existe
         if 'foreign key constraint' in str(e).lower():
             return jsonify({"error": "El instructor_id proporcionado no existe."}), 404
         return jsonify({"error": str(e)}), 500
 
+    obtener_indice().registrar_curso(nuevo_id, False)
+    return jsonify({"message": "Curso creado exitosamente", "id": nuevo_id}), 201
+
 # --- Endpoint 4: ACTUALIZAR UN CURSO (CON REGLA DE NEGOCIO) ---
 # Ruta: PUT /api/courses/<id>
 @cursos_bp.route('/<int:id>', methods=['PUT'])
 def actualizar_curso(id):
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # REGLA DE NEGOCIO: No se puede editar un curso que ya está publicado.
-        cursor.execute("SELECT is_published FROM cursos WHERE id = %s", (id,))
-        curso = cursor.fetchone()
+    data = request.get_json()
 
-        if not curso:
-            return jsonify({"error": "Curso no encontrado"}), 404
-        if curso['is_published']:
-            return jsonify({"error": "No se puede editar un curso que ya ha sido publicado"}), 403
+    def actualizar(cursor):
+        # REGLA DE NEGOCIO: No se puede editar un curso que ya está publicado.
+        bloquear_curso_editable(cursor, id, "No se puede editar un curso que ya ha sido publicado")
+        cursor.execute("SELECT instructor_id FROM cursos WHERE id = %s", (id,))
+        instructor_anterior = cursor.fetchone()['instructor_id']
+        cursor.execute(f"""
+            UPDATE cursos SET titulo = %s, descripcion = %s, instructor_id = %s, {SQL_NUEVA_REVISION}
+            WHERE id = %s
+        """, (data.get('titulo'), data.get('descripcion'), data.get('instructor_id'), id))
+        cambiar_instructor(cursor, instructor_anterior, data.get('instructor_id'))
 
-        data = request.get_json()
-        cursor.execute("UPDATE cursos SET titulo = %s, descripcion = %s, instructor_id = %s WHERE id = %s",
-                       (data.get('titulo'), data.get('descripcion'), data.get('instructor_id'), id))
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return jsonify({"message": "Curso actualizado exitosamente"})
+    try:
+        ejecutar_transaccion(actualizar)
+    except ErrorNegocio as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+    obtener_cache().invalidar(id)
+    return jsonify({"message": "Curso actualizado exitosamente"})
+
 # --- Endpoint 5: ELIMINAR UN CURSO (CON REGLA DE NEGOCIO) ---
 # Ruta: DELETE /api/courses/<id>
 @cursos_bp.route('/<int:id>', methods=['DELETE'])
 def eliminar_curso(id):
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        cursor.execute("SELECT is_published FROM cursos WHERE id = %s", (id,))
-        curso = cursor.fetchone()
-
-        if not curso:
-            return jsonify({"error": "Curso no encontrado"}), 404
-        if curso['is_published']:
-            return jsonify({"error": "No se puede eliminar un curso que ya ha sido publicado"}), 403
-
+    def eliminar(cursor):
+        bloquear_curso_editable(cursor, id, "No se puede eliminar un curso que ya ha sido publicado")
+        cursor.execute("SELECT instructor_id FROM cursos WHERE id = %s", (id,))
+        sumar_cursos_instructor(cursor, cursor.fetchone()['instructor_id'], cursos=-1)
+        # Sus módulos y lecciones se eliminan en cascada junto con sus contadores
         cursor.execute("DELETE FROM cursos WHERE id = %s", (id,))
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return jsonify({"message": "Curso y todo su contenido (módulos y lecciones) han sido eliminados"})
+
+    try:
+        ejecutar_transaccion(eliminar)
+    except ErrorNegocio as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+    obtener_cache().invalidar(id)
+    obtener_indice().olvidar_curso(id)
+    return jsonify({"message": "Curso y todo su contenido (módulos y lecciones) han sido eliminados"})
+
 # --- Endpoint 6: PUBLICAR UN CURSO ---
 # Ruta: POST /api/courses/<id>/publish
 @cursos_bp.route('/<int:id>/publish', methods=['POST'])
 def publicar_curso(id):
+    def publicar(cursor):
+        # FOR UPDATE espera a que terminen las escrituras en curso sobre el curso
+        # (ver transacciones.py) y bloquea las nuevas hasta el commit.
+        cursor.execute("SELECT is_published, instructor_id FROM cursos WHERE id = %s FOR UPDATE", (id,))
+        curso = cursor.fetchone()
+        if not curso:
+            raise ErrorNegocio("Curso no encontrado", 404)
+        if curso['is_published']:
+            # Ya estaba publicado: no cambia nada, ni siquiera la revisión
+            return False
+        cursor.execute(f"UPDATE cursos SET is_published = TRUE, {SQL_NUEVA_REVISION} WHERE id = %s", (id,))
+        sumar_cursos_instructor(cursor, curso['instructor_id'], publicados=1)
+        return True
+
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE cursos SET is_published = TRUE WHERE id = %s", (id,))
-        conn.commit()
-        
-        if cursor.rowcount == 0:
-            return jsonify({"error": "Curso no encontrado"}), 404
-            
-        cursor.close()
-        conn.close()
-        return jsonify({"message": "Curso publicado exitosamente"})
+        publicado_ahora = ejecutar_transaccion(publicar)
+    except ErrorNegocio as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+    respuesta = {"message": "Curso publicado exitosamente"}
+    if publicado_ahora:
+        # Cualquier árbol guardado antes de publicar ya no es válido. El nuevo se
+        # arma en segundo plano: su estado se consulta en GET /api/jobs/<trabajo_id>.
+        obtener_cache().invalidar(id)
+        respuesta['trabajo_id'] = encolar('precalcular_curso', curso_id=id)
+    # A partir de aquí el índice rechaza escrituras en sus módulos y lecciones
+    obtener_indice().registrar_curso(id, True)
+    return jsonify(respuesta)
+
 # --- ENDPOINT 7: CREAR UN MÓDULO PARA UN CURSO (NUEVO) ---
 # Ruta: POST /api/courses/<course_id>/modules
 @cursos_bp.route('/<int:course_id>/modules', methods=['POST'])
 def crear_modulo_para_curso(course_id):
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+    data = request.get_json()
+    titulo = data.get('titulo')
+    if not titulo:
+        return jsonify({"error": "El campo 'titulo' es requerido"}), 400
 
+    def crear(cursor):
         # REGLA DE NEGOCIO: Verificar si el curso está publicado
-        cursor.execute("SELECT is_published FROM cursos WHERE id = %s", (course_id,))
-        curso = cursor.fetchone()
+        bloquear_curso_editable(cursor, course_id, "No se pueden añadir módulos a un curso ya publicado")
+        cursor.execute("INSERT INTO modulos (titulo, curso_id) VALUES (%s, %s)", (titulo, course_id))
+        nuevo_id = cursor.lastrowid
+        sumar_contenido_curso(cursor, course_id, modulos=1)
+        return nuevo_id
 
-        if not curso:
-            return jsonify({"error": "Curso no encontrado"}), 404
-        if curso['is_published']:
-            return jsonify({"error": "No se pueden añadir módulos a un curso ya publicado"}), 403
+    try:
+        nuevo_id = ejecutar_transaccion(crear)
+    except ErrorNegocio as e:
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        data = request.get_json()
-        titulo = data.get('titulo')
-        if not titulo:
-            return jsonify({"error": "El campo 'titulo' es requerido"}), 400
+    obtener_cache().invalidar(course_id)
+    obtener_indice().registrar_curso(course_id, False)
+    obtener_indice().registrar_modulo(nuevo_id, course_id)
+    return jsonify({"message": "Módulo creado exitosamente", "id": nuevo_id}), 201
 
-        cursor.execute("INSERT INTO modulos (titulo, curso_id) VALUES (%s, %s)", (titulo, course_id))
-        conn.commit()
-        nuevo_id = cursor.lastrowid
-        cursor.close()
-        conn.close()
-        
-        return jsonify({"message": "Módulo creado exitosamente", "id": nuevo_id}), 201
+# --- ENDPOINT 8: CREAR VARIOS MÓDULOS (CON SUS LECCIONES) EN UN SOLO REQUEST ---
+# Ruta: POST /api/courses/<course_id>/modules/bulk
+# Cuerpo: {"modulos": [{"titulo": "...", "lecciones": [{"titulo": "...", "contenido": "..."}]}]}
+# Límites: ver lotes.py (MAX_MODULOS_POR_LOTE, MAX_LECCIONES_POR_LOTE)
+@cursos_bp.route('/<int:course_id>/modules/bulk', methods=['POST'])
+def crear_modulos_en_lote(course_id):
+    data = request.get_json(silent=True) or {}
+    try:
+        modulos = validar_modulos(data.get('modulos'))
+    except LoteInvalido as e:
+        return jsonify({"error": str(e)}), e.status
+
+    def crear(cursor):
+        # REGLA DE NEGOCIO: una sola verificación para todo el lote.
+        # FOR UPDATE bloquea la fila del curso hasta el commit, así nadie puede
+        # publicarlo ni añadirle módulos mientras insertamos.
+        bloquear_curso_editable(cursor, course_id, "No se pueden añadir módulos a un curso ya publicado")
+
+        # 1. Todos los módulos en un INSERT de varias filas (sus ids salen de lastrowid)
+        modulo_ids = insertar_filas(cursor, "INSERT INTO modulos (titulo, curso_id) VALUES (%s, %s)",
+                                    [(titulo, course_id) for titulo, _ in modulos])
+
+        # 2. Todas las lecciones de todos los módulos en otro INSERT
+        filas_lecciones = []
+        for modulo_id, (_, lecciones) in zip(modulo_ids, modulos):
+            filas_lecciones.extend((titulo, contenido, modulo_id) for titulo, contenido in lecciones)
+
+        lecciones_por_modulo = {modulo_id: [] for modulo_id in modulo_ids}
+        if filas_lecciones:
+            leccion_ids = insertar_filas(cursor, "INSERT INTO lecciones (titulo, contenido, modulo_id) "
+                                                 "VALUES (%s, %s, %s)", filas_lecciones)
+            # Los ids siguen el orden de filas_lecciones: módulo por módulo
+            for (_, _, modulo_id), leccion_id in zip(filas_lecciones, leccion_ids):
+                lecciones_por_modulo[modulo_id].append(leccion_id)
+
+        sumar_contenido_curso(cursor, course_id, modulos=len(modulo_ids), lecciones=len(filas_lecciones))
+        return modulo_ids, lecciones_por_modulo
+
+    try:
+        modulo_ids, lecciones_por_modulo = ejecutar_transaccion(crear)
+    except ErrorNegocio as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+    obtener_cache().invalidar(course_id)
+    indice = obtener_indice()
+    indice.registrar_curso(course_id, False)
+    for modulo_id, leccion_ids in lecciones_por_modulo.items():
+        indice.registrar_modulo(modulo_id, course_id)
+        for leccion_id in leccion_ids:
+            indice.registrar_leccion(leccion_id, course_id)
+
+    creados = [{"id": modulo_id, "lecciones": lecciones_por_modulo[modulo_id]} for modulo_id in modulo_ids]
+    return jsonify({"message": "Módulos creados exitosamente", "modulos": creados}), 201
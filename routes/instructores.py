@@ -1,26 +1,50 @@
 from flask import Blueprint, request, jsonify
 # Importa la función de conexión desde la raíz del proyecto
 from conexion import get_db_connection
+from serializacion import MapaColumnas
+from transacciones import ejecutar_transaccion, ErrorNegocio
+from paginacion import leer_parametros, respuesta_pagina, respuesta_stream, ParametroInvalido
+from versiones import (cabeceras_validacion, etag_fila, no_modificado, respuesta_304,
+                       nueva_revision_cursos_de_instructor, SQL_NUEVA_REVISION)
 
 # Crea el Blueprint para los instructores
 instructores_bp = Blueprint('instructores_bp', __name__)
 
 # --- ENDPOINT 1: OBTENER TODOS LOS INSTRUCTORES ---
+# Paginado por cursor (ver paginacion.py): ?limit=, ?after_id=, ?cursor=, ?stream=ndjson|json
+# Cada instructor trae 'curso_count' y 'publicado_count' (ver contadores.py).
 @instructores_bp.route('/', methods=['GET'])
 def get_instructores():
+    try:
+        after_id, limite, filtros, formato = leer_parametros({})
+    except ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
     try:
         conn = get_db_connection()
         if not conn:
             return jsonify({"error": "Error de conexión a la base de datos"}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM instructores ORDER BY id ASC")
-        instructores = cursor.fetchall()
+
+        query = "SELECT * FROM instructores WHERE id > %s ORDER BY id ASC"
+        params = [after_id]
+        if limite is not None:
+            # Pedimos una fila extra para saber si existe una página siguiente
+            query += " LIMIT %s"
+            params.append(limite + 1)
+
+        if formato:
+            cursor = conn.cursor()
+            cursor.execute(query, tuple(params))
+            return respuesta_stream(cursor, formato)
+
+        cursor = conn.cursor()
+        cursor.execute(query, tuple(params))
+        instructores = MapaColumnas.de_cursor(cursor).filas(cursor.fetchall())
         
         cursor.close()
         conn.close()
         
-        return jsonify(instructores)
+        return respuesta_pagina(instructores, limite, filtros)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -38,7 +62,10 @@ def get_instructor(id):
         conn.close()
         
         if instructor:
-            return jsonify(instructor)
+            cabeceras = cabeceras_validacion(etag_fila('instructor', instructor), instructor['updated_at'])
+            if no_modificado(cabeceras):
+                return respuesta_304(cabeceras)
+            return jsonify(instructor), 200, cabeceras
         else:
             return jsonify({"error": "Instructor no encontrado"}), 404
     except Exception as e:
@@ -56,28 +83,22 @@ def crear_instructor():
     if not nombre or not email:
         return jsonify({"error": "Nombre y email son campos requeridos"}), 400
 
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Se inserta el nuevo instructor en la base de datos
+    def crear(cursor):
+        # Se inserta el nuevo instructor y obtenemos su ID
         cursor.execute("INSERT INTO instructores (nombre, email) VALUES (%s, %s)", (nombre, email))
-        conn.commit()
-        
-        # Obtenemos el ID del nuevo instructor creado
-        nuevo_id = cursor.lastrowid
-        
-        cursor.close()
-        conn.close()
-        
-        # Devolvemos un mensaje de éxito y el ID del nuevo instructor
-        return jsonify({"message": "Instructor creado exitosamente", "id": nuevo_id}), 201
+        return cursor.lastrowid
+
+    try:
+        nuevo_id = ejecutar_transaccion(crear)
     except Exception as e:
         # Manejo de error de email duplicado
         if 'Duplicate entry' in str(e):
             return jsonify({"error": "El email ya está registrado"}), 409
         return jsonify({"error": str(e)}), 500
 
+    # Devolvemos un mensaje de éxito y el ID del nuevo instructor
+    return jsonify({"message": "Instructor creado exitosamente", "id": nuevo_id}), 201
+
 # --- ENDPOINT 4: ACTUALIZAR UN INSTRUCTOR EXISTENTE ---
 @instructores_bp.route('/<int:id>', methods=['PUT'])
 def actualizar_instructor(id):
@@ -88,73 +109,66 @@ def actualizar_instructor(id):
     if not nombre and not email:
         return jsonify({"error": "Se requiere al menos un campo (nombre o email) para actualizar"}), 400
 
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Construcción de la consulta SQL dinámicamente
-        query_parts = []
-        params = []
-        if nombre:
-            query_parts.append("nombre = %s")
-            params.append(nombre)
-        if email:
-            query_parts.append("email = %s")
-            params.append(email)
-        
-        params.append(id)
-        
-        query = f"UPDATE instructores SET {', '.join(query_parts)} WHERE id = %s"
-        
+    # Construcción de la consulta SQL dinámicamente
+    query_parts = []
+    params = []
+    if nombre:
+        query_parts.append("nombre = %s")
+        params.append(nombre)
+    if email:
+        query_parts.append("email = %s")
+        params.append(email)
+    params.append(id)
+    query_parts.append(SQL_NUEVA_REVISION)
+    query = f"UPDATE instructores SET {', '.join(query_parts)} WHERE id = %s"
+
+    def actualizar(cursor):
         cursor.execute(query, tuple(params))
-        conn.commit()
-        
         # Verificamos si se actualizó alguna fila
         if cursor.rowcount == 0:
-            cursor.close()
-            conn.close()
-            return jsonify({"error": "Instructor no encontrado"}), 404
-            
-        cursor.close()
-        conn.close()
-        
-        return jsonify({"message": "Instructor actualizado exitosamente"}), 200
+            raise ErrorNegocio("Instructor no encontrado", 404)
+        if nombre:
+            # Cambia el ETag de sus cursos, y ningún proceso vuelve a usar sus árboles en caché
+            nueva_revision_cursos_de_instructor(cursor, id)
+
+    try:
+        ejecutar_transaccion(actualizar)
+    except ErrorNegocio as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
         if 'Duplicate entry' in str(e):
             return jsonify({"error": "El email ya está en uso por otro instructor"}), 409
         return jsonify({"error": str(e)}), 500
 
+    return jsonify({"message": "Instructor actualizado exitosamente"}), 200
+
 # --- ENDPOINT 5: ELIMINAR UN INSTRUCTOR (CON REGLA DE NEGOCIO) ---
 @instructores_bp.route('/<int:id>', methods=['DELETE'])
 def eliminar_instructor(id):
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
+    def eliminar(cursor):
+        cursor.execute("SELECT id FROM instructores WHERE id = %s FOR UPDATE", (id,))
+        if cursor.fetchone() is None:
+            raise ErrorNegocio("Instructor no encontrado", 404)
+
         # REGLA DE NEGOCIO CRÍTICA: No se puede eliminar un instructor con cursos públicos.
-        # Primero, contamos cuántos cursos publicados tiene este instructor.
-        cursor.execute("SELECT COUNT(*) as conteo FROM cursos WHERE instructor_id = %s AND is_published = TRUE", (id,))
-        resultado = cursor.fetchone()
-        
-        if resultado['conteo'] > 0:
-            cursor.close()
-            conn.close()
-            # Si tiene cursos publicados, se prohíbe la eliminación.
-            return jsonify({"error": f"No se puede eliminar. El instructor tiene {resultado['conteo']} curso(s) publicado(s)."}), 409 # 409 Conflict
-            
-        # Si no tiene cursos publicados, procedemos a eliminarlo.
-        # La BD se encargará de poner instructor_id = NULL en los cursos no publicados gracias a ON DELETE SET NULL.
+        # Contamos sus cursos publicados; FOR UPDATE bloquea sus cursos para que
+        # ninguno se publique antes de borrar al instructor.
+        cursor.execute("SELECT COUNT(*) as conteo FROM cursos WHERE instructor_id = %s AND is_published = TRUE FOR UPDATE",
+                       (id,))
+        conteo = cursor.fetchone()['conteo']
+        if conteo > 0:
+            # Si tiene cursos publicados, se prohíbe la eliminación (409 Conflict).
+            raise ErrorNegocio(f"No se puede eliminar. El instructor tiene {conteo} curso(s) publicado(s).", 409)
+
+        # Sus cursos sin publicar quedan sin instructor (ON DELETE SET NULL): cambia su árbol
+        nueva_revision_cursos_de_instructor(cursor, id)
         cursor.execute("DELETE FROM instructores WHERE id = %s", (id,))
-        conn.commit()
-        
-        if cursor.rowcount == 0:
-            cursor.close()
-            conn.close()
-            return jsonify({"error": "Instructor no encontrado"}), 404
-            
-        cursor.close()
-        conn.close()
-        
-        return jsonify({"message": "Instructor eliminado exitosamente"}), 200
+
+    try:
+        ejecutar_transaccion(eliminar)
+    except ErrorNegocio as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify({"message": "Instructor eliminado exitosamente"}), 200
@@ -1,23 +1,25 @@
+import logging
+
 from flask import Blueprint, request, jsonify
 from conexion import get_db_connection
+from contadores import sumar_contenido_curso
+from indice_publicacion import obtener_indice, publicado_por_leccion
+from transacciones import ejecutar_transaccion, bloquear_curso_de_leccion, ErrorNegocio
+from versiones import (cabeceras_validacion, etag_fila, no_modificado, respuesta_304,
+                       nueva_revision_curso, SQL_NUEVA_REVISION)
 
 lecciones_bp = Blueprint('lecciones_bp', __name__)
 
-# --- Función Auxiliar ---
-def check_curso_publicado_por_leccion(leccion_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT c.is_published
-        FROM cursos c
-        JOIN modulos m ON c.id = m.curso_id
-        JOIN lecciones l ON m.id = l.modulo_id
-        WHERE l.id = %s
-    """, (leccion_id,))
-    curso = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    return curso and curso['is_published']
+logger = logging.getLogger('plataforma.requests')
+
+
+def _recordar_publicado(leccion_id, error):
+    # La BD dijo que el curso de la lección está publicado: lo anotamos en el índice
+    # para que la próxima escritura se rechace sin la consulta (también tras reiniciar).
+    if error.curso_id is not None:
+        indice = obtener_indice()
+        indice.registrar_leccion(leccion_id, error.curso_id)
+        indice.registrar_curso(error.curso_id, True)
 
 # --- CRUD Básico para Lecciones Individuales ---
 @lecciones_bp.route('/<int:id>', methods=['GET'])
@@ -28,30 +30,70 @@ def get_leccion(id):
     leccion = cursor.fetchone()
     cursor.close()
     conn.close()
-    return jsonify(leccion) if leccion else ({"error": "Lección no encontrada"}, 404)
+    if not leccion:
+        return {"error": "Lección no encontrada"}, 404
+    cabeceras = cabeceras_validacion(etag_fila('leccion', leccion), leccion['updated_at'])
+    if no_modificado(cabeceras):
+        return respuesta_304(cabeceras)
+    return jsonify(leccion), 200, cabeceras
 
 @lecciones_bp.route('/<int:id>', methods=['PUT'])
 def actualizar_leccion(id):
-    if check_curso_publicado_por_leccion(id):
-        return jsonify({"error": "No se puede editar una lección de un curso ya publicado"}), 403
-    data = request.get_json()
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE lecciones SET titulo = %s, contenido = %s WHERE id = %s", 
-                   (data.get('titulo'), data.get('contenido'), id))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    mensaje = "No se puede editar una lección de un curso ya publicado"
+    # Si el índice ya sabe que el curso está publicado, no hace falta ir a la BD
+    if publicado_por_leccion(id):
+        return jsonify({"error": mensaje}), 403
+
+    # El PUT reemplaza el título y el contenido de la lección
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Se requiere un cuerpo JSON"}), 400
+    titulo = data.get('titulo')
+    contenido = data.get('contenido')
+    if not isinstance(titulo, str) or not titulo.strip():
+        return jsonify({"error": "El título es requerido"}), 400
+    if contenido is not None and not isinstance(contenido, str):
+        return jsonify({"error": "El contenido debe ser un texto"}), 400
+
+    def actualizar(cursor):
+        curso_id = bloquear_curso_de_leccion(cursor, id, mensaje)
+        cursor.execute(f"UPDATE lecciones SET titulo = %s, contenido = %s, {SQL_NUEVA_REVISION} WHERE id = %s",
+                       (titulo, contenido, id))
+        nueva_revision_curso(cursor, curso_id)
+        return curso_id
+
+    try:
+        curso_id = ejecutar_transaccion(actualizar)
+    except ErrorNegocio as e:
+        _recordar_publicado(id, e)
+        return jsonify({"error": str(e)}), e.status
+    except Exception:
+        logger.exception("Error al actualizar la lección %s", id)
+        return jsonify({"error": "Error interno al actualizar la lección"}), 500
+
+    indice = obtener_indice()
+    indice.registrar_leccion(id, curso_id)
+    indice.registrar_curso(curso_id, False)
     return jsonify({"message": "Lección actualizada"})
 
 @lecciones_bp.route('/<int:id>', methods=['DELETE'])
 def eliminar_leccion(id):
-    if check_curso_publicado_por_leccion(id):
-        return jsonify({"error": "No se puede eliminar una lección de un curso ya publicado"}), 403
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM lecciones WHERE id = %s", (id,))
-    conn.commit()
-    cursor.close()
-    conn.close()
-    return jsonify({"message": "Lección eliminada"})
\ No newline at end of file
+    mensaje = "No se puede eliminar una lección de un curso ya publicado"
+    if publicado_por_leccion(id):
+        return jsonify({"error": mensaje}), 403
+
+    def eliminar(cursor):
+        curso_id = bloquear_curso_de_leccion(cursor, id, mensaje)
+        sumar_contenido_curso(cursor, curso_id, lecciones=-1)
+        cursor.execute("DELETE FROM lecciones WHERE id = %s", (id,))
+
+    try:
+        ejecutar_transaccion(eliminar)
+    except ErrorNegocio as e:
+        _recordar_publicado(id, e)
+        return jsonify({"error": str(e)}), e.status
+    except Exception:
+        logger.exception("Error al eliminar la lección %s", id)
+        return jsonify({"error": "Error interno al eliminar la lección"}), 500
+    obtener_indice().olvidar_leccion(id)
+    return jsonify({"message": "Lección eliminada"})
@@ -1,17 +1,21 @@
 from flask import Blueprint, request, jsonify
-from conexion import get_db_connection
+from indice_publicacion import obtener_indice, publicado_por_modulo
+from lotes import validar_lecciones, insertar_filas, LoteInvalido, MAX_LECCIONES_POR_LOTE
+from transacciones import ejecutar_transaccion, bloquear_curso_de_modulo, ErrorNegocio
+from contadores import sumar_contenido_curso
 
 modulos_bp = Blueprint('modulos_bp', __name__)
 
-# --- Función Auxiliar ---
-def check_curso_publicado(modulo_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT c.is_published FROM cursos c JOIN modulos m ON c.id = m.curso_id WHERE m.id = %s", (modulo_id,))
-    curso = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    return curso and curso['is_published']
+MENSAJE_PUBLICADO = "No se pueden añadir lecciones a un módulo de un curso ya publicado"
+
+
+def _recordar_publicado(modulo_id, error):
+    # La BD dijo que el curso del módulo está publicado: lo anotamos en el índice para
+    # que la próxima escritura se rechace sin la consulta (también tras reiniciar).
+    if error.curso_id is not None:
+        indice = obtener_indice()
+        indice.registrar_modulo(modulo_id, error.curso_id)
+        indice.registrar_curso(error.curso_id, True)
 
 # --- CRUD Básico para Módulos Individuales ---
 # ... (Aquí van los endpoints GET, PUT, DELETE para /modules/<id> que ya te di) ...
@@ -20,20 +24,79 @@ def check_curso_publicado(modulo_id):
 # Ruta: POST /api/modules/<module_id>/lessons
 @modulos_bp.route('/<int:module_id>/lessons', methods=['POST'])
 def crear_leccion_en_modulo(module_id):
-    if check_curso_publicado(module_id):
-        return jsonify({"error": "No se pueden añadir lecciones a un módulo de un curso ya publicado"}), 403
+    # Si el índice ya sabe que el curso está publicado, no hace falta ir a la BD
+    if publicado_por_modulo(module_id):
+        return jsonify({"error": MENSAJE_PUBLICADO}), 403
 
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Se requiere un cuerpo JSON"}), 400
     titulo = data.get('titulo')
     if not titulo:
         return jsonify({"error": "El título es requerido"}), 400
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO lecciones (titulo, contenido, modulo_id) VALUES (%s, %s, %s)", 
-                   (titulo, data.get('contenido'), module_id))
-    conn.commit()
-    nuevo_id = cursor.lastrowid
-    cursor.close()
-    conn.close()
-    return jsonify({"message": "Lección creada exitosamente", "id": nuevo_id}), 201
\ No newline at end of file
+
+    def crear(cursor):
+        curso_id = bloquear_curso_de_modulo(cursor, module_id, MENSAJE_PUBLICADO)
+        cursor.execute("INSERT INTO lecciones (titulo, contenido, modulo_id) VALUES (%s, %s, %s)",
+                       (titulo, data.get('contenido'), module_id))
+        nuevo_id = cursor.lastrowid
+        sumar_contenido_curso(cursor, curso_id, lecciones=1)
+        return curso_id, nuevo_id
+
+    try:
+        curso_id, nuevo_id = ejecutar_transaccion(crear)
+    except ErrorNegocio as e:
+        _recordar_publicado(module_id, e)
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    indice = obtener_indice()
+    indice.registrar_modulo(module_id, curso_id)
+    indice.registrar_curso(curso_id, False)
+    indice.registrar_leccion(nuevo_id, curso_id)
+    return jsonify({"message": "Lección creada exitosamente", "id": nuevo_id}), 201
+
+# --- ENDPOINT DE CREACIÓN DE LECCIONES POR LOTES ---
+# Ruta: POST /api/modules/<module_id>/lessons/bulk
+# Cuerpo: {"lecciones": [{"titulo": "...", "contenido": "..."}, ...]}
+# Límite: MAX_LECCIONES_POR_LOTE (ver lotes.py). Retorna los ids en el mismo orden.
+@modulos_bp.route('/<int:module_id>/lessons/bulk', methods=['POST'])
+def crear_lecciones_en_lote(module_id):
+    data = request.get_json(silent=True) or {}
+    try:
+        lecciones = validar_lecciones(data.get('lecciones'))
+    except LoteInvalido as e:
+        return jsonify({"error": str(e)}), e.status
+    if not lecciones:
+        return jsonify({"error": "El campo 'lecciones' debe ser una lista no vacía"}), 400
+    if len(lecciones) > MAX_LECCIONES_POR_LOTE:
+        return jsonify({"error": f"Se permiten como máximo {MAX_LECCIONES_POR_LOTE} lecciones por lote"}), 413
+
+    if publicado_por_modulo(module_id):
+        return jsonify({"error": MENSAJE_PUBLICADO}), 403
+
+    def crear(cursor):
+        # Una sola verificación para todo el lote. FOR UPDATE bloquea el módulo y su
+        # curso hasta el commit: nadie puede publicar el curso ni añadir lecciones
+        # a este módulo mientras insertamos.
+        curso_id = bloquear_curso_de_modulo(cursor, module_id, MENSAJE_PUBLICADO)
+        nuevos_ids = insertar_filas(cursor, "INSERT INTO lecciones (titulo, contenido, modulo_id) VALUES (%s, %s, %s)",
+                                    [(titulo, contenido, module_id) for titulo, contenido in lecciones])
+        sumar_contenido_curso(cursor, curso_id, lecciones=len(nuevos_ids))
+        return curso_id, nuevos_ids
+
+    try:
+        curso_id, nuevos_ids = ejecutar_transaccion(crear)
+    except ErrorNegocio as e:
+        _recordar_publicado(module_id, e)
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    indice = obtener_indice()
+    indice.registrar_modulo(module_id, curso_id)
+    indice.registrar_curso(curso_id, False)
+    for leccion_id in nuevos_ids:
+        indice.registrar_leccion(leccion_id, curso_id)
+    return jsonify({"message": "Lecciones creadas exitosamente", "ids": nuevos_ids}), 201
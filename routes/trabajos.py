@@ -0,0 +1,21 @@
+from flask import Blueprint, jsonify
+from trabajos import obtener_trabajo
+
+# Creamos el Blueprint para la ruta /api/jobs
+trabajos_bp = Blueprint('trabajos_bp', __name__)
+
+
+# --- Endpoint 1: ESTADO DE UN TRABAJO EN SEGUNDO PLANO ---
+# Ruta: GET /api/jobs/<id>
+# 'estado' es pendiente, en_curso, completado o fallido (con 'error'). Con el
+# almacén 'memoria' solo lo conoce el proceso que lo encoló, y su id es un texto
+# como '4312-7' (ver trabajos.py); con 'tabla' es un número.
+@trabajos_bp.route('/<id>', methods=['GET'])
+def get_trabajo(id):
+    try:
+        trabajo = obtener_trabajo(id)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    if trabajo is None:
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    return jsonify(trabajo)
@@ -1,81 +1,221 @@
 # seed.py
-from faker import Faker
+# Generador de datos de prueba para la base de datos.
+#
+# Uso:
+#   python seed.py                          # perfil 'small' (100 instructores y 100 cursos)
+#   python seed.py --perfil huge --procesos 8 --semilla 42
+#
+# Las filas se generan por lotes (en varios procesos si se pide) y se insertan
+# a medida que llegan, haciendo commit cada cierto número de lotes. Así se pueden
+# crear millones de lecciones sin tenerlas todas en memoria.
+import argparse
+import multiprocessing
 import random
+import time
+from collections import deque
+
 from conexion import get_db_connection # Reutilizamos nuestra función de conexión
+from contadores import reconstruir
+
+# --- 1. Perfiles de tamaño ---
+PERFILES = {
+    # ~350 módulos y ~2.000 lecciones
+    'small': {'instructores': 100, 'cursos': 100, 'modulos_por_curso': (2, 5), 'lecciones_por_modulo': (3, 8)},
+    # ~70.000 módulos y ~400.000 lecciones
+    'medium': {'instructores': 2000, 'cursos': 20000, 'modulos_por_curso': (2, 5), 'lecciones_por_modulo': (3, 8)},
+    # ~1.500.000 módulos y ~10.000.000 lecciones
+    'huge': {'instructores': 20000, 'cursos': 300000, 'modulos_por_curso': (2, 8), 'lecciones_por_modulo': (3, 10)},
+}
+
+# Columnas que se insertan en cada tabla (el id se calcula aquí, no lo elige MySQL)
+COLUMNAS = {
+    'instructores': ('id', 'nombre', 'email'),
+    'cursos': ('id', 'titulo', 'descripcion', 'is_published', 'instructor_id'),
+    'modulos': ('id', 'titulo', 'curso_id'),
+    'lecciones': ('id', 'titulo', 'contenido', 'modulo_id'),
+}
+
+
+# --- 2. Generación de filas (se ejecuta en los procesos de trabajo) ---
+# Cada tarea recibe su propia semilla, así el resultado es el mismo sin
+# importar cuántos procesos se usen ni en qué orden terminen.
+_fake = None
+
+def _faker(semilla):
+    global _fake
+    if _fake is None:
+        # Inicializamos Faker para generar datos en español (una vez por proceso).
+        # Se importa aquí: tarda en cargar y solo lo necesitan los procesos que generan
+        # filas, no quien importa este módulo por sus PERFILES o COLUMNAS (ver catalogo.py).
+        from faker import Faker
+        _fake = Faker('es_ES')
+    _fake.seed_instance(semilla)
+    return _fake
+
+def _generar_instructores(tarea):
+    semilla, desde, cantidad = tarea
+    fake = _faker(semilla)
+    # El número de fila en el email garantiza que sea único sin usar fake.unique
+    return [(fake.name(), f"{fake.user_name()}.{n}@{fake.free_email_domain()}")
+            for n in range(desde, desde + cantidad)]
+
+def _generar_cursos(tarea):
+    semilla, cantidad, instructor_min, instructor_max = tarea
+    fake = _faker(semilla)
+    return [(
+        fake.catch_phrase(), # Genera una frase llamativa como título
+        fake.text(max_nb_chars=300),
+        fake.random.choice([True, False]), # Publicado o no al azar
+        fake.random.randint(instructor_min, instructor_max) # Asigna un instructor al azar
+    ) for _ in range(cantidad)]
+
+def _generar_modulos(tarea):
+    semilla, curso_desde, curso_hasta, minimo, maximo = tarea
+    fake = _faker(semilla)
+    filas = []
+    for curso_id in range(curso_desde, curso_hasta + 1):
+        for i in range(fake.random.randint(minimo, maximo)):
+            filas.append((f"Módulo {i+1}: {fake.sentence(nb_words=4)}", curso_id))
+    return filas
+
+def _generar_lecciones(tarea):
+    semilla, modulo_desde, modulo_hasta, minimo, maximo = tarea
+    fake = _faker(semilla)
+    filas = []
+    for modulo_id in range(modulo_desde, modulo_hasta + 1):
+        for i in range(fake.random.randint(minimo, maximo)):
+            filas.append((f"Lección {i+1}: {fake.sentence(nb_words=6)}", fake.text(max_nb_chars=500), modulo_id))
+    return filas
+
+
+# --- 3. Reparto de tareas ---
+def _semilla(semilla, tabla, numero_tarea):
+    return f"{semilla}-{tabla}-{numero_tarea}"
+
+def _en_paralelo(funcion, tareas, procesos):
+    """
+    Ejecuta funcion(tarea) para cada tarea y entrega los resultados en orden.
+    Solo hay unas pocas tareas en vuelo a la vez, para no acumular filas en memoria
+    si la base de datos inserta más lento de lo que se generan.
+    """
+    if procesos <= 1:
+        for tarea in tareas:
+            yield funcion(tarea)
+        return
 
-# Inicializamos Faker para generar datos en español
-fake = Faker('es_ES')
+    with multiprocessing.Pool(procesos) as pool:
+        pendientes = deque()
+        for tarea in tareas:
+            pendientes.append(pool.apply_async(funcion, (tarea,)))
+            if len(pendientes) >= procesos * 2:
+                yield pendientes.popleft().get()
+        while pendientes:
+            yield pendientes.popleft().get()
 
-def seed_database(count=100):
+def _rangos(desde, hasta, tamano):
+    """Divide [desde, hasta] en rangos consecutivos de como máximo 'tamano' elementos."""
+    inicio = desde
+    while inicio <= hasta:
+        fin = min(inicio + tamano - 1, hasta)
+        yield inicio, fin
+        inicio = fin + 1
+
+
+# --- 4. Inserción por lotes ---
+def _ultimo_id(cursor, tabla):
+    # Una sola consulta por tabla: a partir de aquí los ids se calculan en Python.
+    # (Se asume que nadie más inserta en la base mientras corre el seeding.)
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {tabla}")
+    return cursor.fetchone()[0]
+
+def _insertar(conn, cursor, tabla, lotes, commit_cada):
+    """
+    Inserta los lotes de filas a medida que llegan, asignando ids consecutivos.
+    Retorna (primer_id, ultimo_id) de las filas insertadas.
+    """
+    columnas = COLUMNAS[tabla]
+    sql = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join(['%s'] * len(columnas))})"
+    primer_id = siguiente_id = _ultimo_id(cursor, tabla) + 1
+    lotes_sin_commit = 0
+    inicio = time.perf_counter()
+
+    for filas in lotes:
+        cursor.executemany(sql, [(siguiente_id + i,) + fila for i, fila in enumerate(filas)])
+        siguiente_id += len(filas)
+        lotes_sin_commit += 1
+        if lotes_sin_commit >= commit_cada:
+            conn.commit()
+            lotes_sin_commit = 0
+    conn.commit()
+
+    total = siguiente_id - primer_id
+    segundos = time.perf_counter() - inicio
+    print(f"-> {total} filas insertadas en '{tabla}' en {segundos:.1f} s ({total / max(segundos, 1e-9):.0f} filas/s).")
+    return primer_id, siguiente_id - 1
+
+
+def seed_database(perfil='small', semilla=None, lote=1000, procesos=None, commit_cada=10):
     """
-    Puebla la base de datos con una cantidad específica de registros de prueba.
+    Puebla la base de datos con el perfil de tamaño indicado ('small', 'medium' o 'huge').
+    - semilla: hace que los datos generados sean siempre los mismos (None = aleatorio)
+    - lote: filas aproximadas por cada INSERT de varias filas
+    - procesos: procesos que generan datos con Faker (None = uno por CPU)
+    - commit_cada: número de lotes entre cada commit
     """
+    config = PERFILES[perfil]
+    if semilla is None:
+        semilla = random.randrange(2**32)
+    if procesos is None:
+        procesos = multiprocessing.cpu_count()
+
     conn = get_db_connection()
     if not conn:
         print("No se pudo conectar a la base de datos. Saliendo del script de seeding.")
         return
-        
+
     cursor = conn.cursor()
-    print("Conexión exitosa. Iniciando el proceso de seeding...")
+    print(f"Conexión exitosa. Iniciando el proceso de seeding (perfil '{perfil}', semilla {semilla}, {procesos} procesos)...")
+    inicio = time.perf_counter()
 
     try:
-        # --- 1. Generar e Insertar Instructores ---
-        instructores = []
-        for _ in range(count):
-            instructores.append((fake.name(), fake.unique.email()))
-        
-        cursor.executemany("INSERT INTO instructores (nombre, email) VALUES (%s, %s)", instructores)
-        print(f"-> {cursor.rowcount} instructores insertados.")
-
-        # --- 2. Generar e Insertar Cursos ---
-        # Primero, obtenemos los IDs de los instructores que acabamos de crear
-        cursor.execute("SELECT id FROM instructores")
-        instructor_ids = [item[0] for item in cursor.fetchall()]
-        
-        cursos = []
-        for _ in range(count):
-            cursos.append((
-                fake.catch_phrase(), # Genera una frase llamativa como título
-                fake.text(max_nb_chars=300),
-                random.choice([True, False]), # Publicado o no al azar
-                random.choice(instructor_ids) # Asigna un instructor al azar
-            ))
-        cursor.executemany("INSERT INTO cursos (titulo, descripcion, is_published, instructor_id) VALUES (%s, %s, %s, %s)", cursos)
-        print(f"-> {cursor.rowcount} cursos insertados.")
-
-        # --- 3. Generar e Insertar Módulos ---
-        cursor.execute("SELECT id FROM cursos")
-        curso_ids = [item[0] for item in cursor.fetchall()]
-
-        modulos = []
-        for curso_id in curso_ids:
-            # Crear entre 2 y 5 módulos por curso
-            for i in range(random.randint(2, 5)):
-                modulos.append((f"Módulo {i+1}: {fake.sentence(nb_words=4)}", curso_id))
-        
-        cursor.executemany("INSERT INTO modulos (titulo, curso_id) VALUES (%s, %s)", modulos)
-        print(f"-> {cursor.rowcount} módulos insertados.")
-        
-        # --- 4. Generar e Insertar Lecciones ---
-        cursor.execute("SELECT id FROM modulos")
-        modulo_ids = [item[0] for item in cursor.fetchall()]
-        
-        lecciones = []
-        for modulo_id in modulo_ids:
-            # Crear entre 3 y 8 lecciones por módulo
-            for i in range(random.randint(3, 8)):
-                lecciones.append((f"Lección {i+1}: {fake.sentence(nb_words=6)}", fake.text(max_nb_chars=500), modulo_id))
-        
-        cursor.executemany("INSERT INTO lecciones (titulo, contenido, modulo_id) VALUES (%s, %s, %s)", lecciones)
-        print(f"-> {cursor.rowcount} lecciones insertadas.")
-
-        # Confirmar todos los cambios en la base de datos
-        conn.commit()
-        print("\n¡Seeding completado exitosamente! Todos los cambios han sido guardados.")
+        # --- 1. Instructores ---
+        tareas = ((_semilla(semilla, 'instructores', n), desde, fin - desde + 1)
+                  for n, (desde, fin) in enumerate(_rangos(1, config['instructores'], lote)))
+        instructor_min, instructor_max = _insertar(
+            conn, cursor, 'instructores', _en_paralelo(_generar_instructores, tareas, procesos), commit_cada)
+
+        # --- 2. Cursos (cada uno con un instructor de los recién creados) ---
+        tareas = ((_semilla(semilla, 'cursos', n), fin - desde + 1, instructor_min, instructor_max)
+                  for n, (desde, fin) in enumerate(_rangos(1, config['cursos'], lote)))
+        curso_min, curso_max = _insertar(
+            conn, cursor, 'cursos', _en_paralelo(_generar_cursos, tareas, procesos), commit_cada)
+
+        # --- 3. Módulos (cada tarea cubre los cursos necesarios para llenar ~1 lote) ---
+        minimo, maximo = config['modulos_por_curso']
+        cursos_por_tarea = max(1, lote * 2 // (minimo + maximo))
+        tareas = ((_semilla(semilla, 'modulos', n), desde, fin, minimo, maximo)
+                  for n, (desde, fin) in enumerate(_rangos(curso_min, curso_max, cursos_por_tarea)))
+        modulo_min, modulo_max = _insertar(
+            conn, cursor, 'modulos', _en_paralelo(_generar_modulos, tareas, procesos), commit_cada)
+
+        # --- 4. Lecciones ---
+        minimo, maximo = config['lecciones_por_modulo']
+        modulos_por_tarea = max(1, lote * 2 // (minimo + maximo))
+        tareas = ((_semilla(semilla, 'lecciones', n), desde, fin, minimo, maximo)
+                  for n, (desde, fin) in enumerate(_rangos(modulo_min, modulo_max, modulos_por_tarea)))
+        _insertar(conn, cursor, 'lecciones', _en_paralelo(_generar_lecciones, tareas, procesos), commit_cada)
+
+        # --- 5. Contadores de cursos e instructores (las filas se insertaron sin pasar por las rutas) ---
+        corregidas = reconstruir(conn, lote=lote, salida=None)
+        print(f"-> Contadores calculados para {corregidas['cursos']} cursos y "
+              f"{corregidas['instructores']} instructores con contenido.")
+
+        print(f"\n¡Seeding completado exitosamente en {time.perf_counter() - inicio:.1f} s! "
+              "Todos los cambios han sido guardados.")
 
     except Exception as e:
         print(f"\nOcurrió un error durante el seeding: {e}")
-        conn.rollback() # Revertir cambios si algo sale mal
+        conn.rollback() # Revertir el último lote (los anteriores ya tienen commit)
     finally:
         # Cerrar la conexión
         cursor.close()
@@ -84,4 +224,11 @@ def seed_database(count=100):
 
 # Esto hace que el script se ejecute solo cuando lo llamas directamente
 if __name__ == '__main__':
-    seed_database()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Puebla la base de datos con datos de prueba.")
+    parser.add_argument('--perfil', choices=sorted(PERFILES), default='small', help="Tamaño del conjunto de datos")
+    parser.add_argument('--semilla', type=int, default=None, help="Semilla para generar siempre los mismos datos")
+    parser.add_argument('--lote', type=int, default=1000, help="Filas por cada INSERT de varias filas")
+    parser.add_argument('--procesos', type=int, default=None, help="Procesos generando datos (por defecto, uno por CPU)")
+    parser.add_argument('--commit-cada', type=int, default=10, help="Lotes entre cada commit")
+    args = parser.parse_args()
+    seed_database(args.perfil, args.semilla, args.lote, args.procesos, args.commit_cada)
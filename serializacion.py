@@ -0,0 +1,161 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+from flask import current_app
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson  # Opcional: sin él se usa el módulo json de la biblioteca estándar
+except ImportError:
+    orjson = None
+
+# --- 1. Proveedor JSON de la aplicación ---
+# Reemplaza al proveedor por defecto de Flask (ver create_app() en app.py):
+#   - Usa orjson si está instalado (varias veces más rápido con textos largos,
+#     como el 'contenido' de las lecciones) y si no, json de la biblioteca estándar.
+#   - Siempre compacto y sin ordenar las claves: salen en el orden de las columnas del SELECT.
+#   - Las fechas (created_at, updated_at) salen como fecha HTTP, igual que con jsonify().
+# Con orjson los acentos van en UTF-8; con json se escapan (\u00f3), que en
+# CPython es más rápido. Para el cliente es el mismo JSON.
+# Las columnas BOOLEAN llegan de la base de datos como 0/1; las convierte MapaColumnas (abajo).
+
+
+def _valor_por_defecto(obj):
+    """Tipos de las columnas que JSON no conoce."""
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode('utf-8')
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    # Sin PASSTHROUGH orjson escribiría las fechas en ISO 8601
+    _OPCIONES_ORJSON = orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps_bytes(obj):
+        return orjson.dumps(obj, default=_valor_por_defecto, option=_OPCIONES_ORJSON)
+
+    def _dumps_texto(obj):
+        return dumps_bytes(obj).decode('utf-8')
+
+    _cargar = orjson.loads
+else:
+    _dumps_texto = json.JSONEncoder(default=_valor_por_defecto, separators=(',', ':')).encode
+
+    def dumps_bytes(obj):
+        return _dumps_texto(obj).encode('ascii')
+
+    _cargar = json.loads
+
+
+class ProveedorJSONRapido(JSONProvider):
+    """Proveedor JSON para app.json: compacto y con orjson cuando está disponible."""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        # Las opciones de json.dumps (indent, sort_keys...) no aplican: el formato es siempre el mismo
+        return _dumps_texto(obj)
+
+    def dumps_bytes(self, obj):
+        return dumps_bytes(obj)
+
+    def loads(self, s, **kwargs):
+        return _cargar(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
+
+
+# --- 2. Filas de la base de datos ---
+# Columnas BOOLEAN (TINYINT(1) en MySQL) que deben salir como true/false y no como 0/1.
+COLUMNAS_BOOLEANAS = frozenset({'is_published'})
+
+
+class MapaColumnas:
+    """
+    Convierte filas de un cursor normal (tuplas) en diccionarios. Los nombres y las
+    columnas booleanas se calculan una sola vez por consulta, no en cada fila como
+    hace un cursor con dictionary=True.
+    """
+
+    def __init__(self, columnas):
+        self.columnas = tuple(columnas)
+        self._booleanas = [i for i, columna in enumerate(self.columnas) if columna in COLUMNAS_BOOLEANAS]
+
+    @classmethod
+    def de_cursor(cls, cursor):
+        return cls(cursor.column_names)
+
+    def fila(self, fila):
+        if fila is None:
+            return None
+        if self._booleanas:
+            fila = list(fila)
+            for i in self._booleanas:
+                if fila[i] is not None:
+                    fila[i] = bool(fila[i])
+        return dict(zip(self.columnas, fila))
+
+    def filas(self, filas):
+        return [self.fila(fila) for fila in filas]
+
+
+# --- 3. Ayudantes para escribir JSON por partes ---
+# Permiten enviar respuestas grandes (árbol de un curso, listados completos)
+# poco a poco con un generador, en lugar de construir todo el JSON en memoria.
+# Se usa el mismo serializador que jsonify() para que el formato sea idéntico.
+# Trabajan con bytes: pasar por str obliga a decodificar y volver a codificar
+# todo el contenido de las lecciones.
+
+
+def dumps(obj):
+    """Serializa un objeto con el proveedor JSON de la aplicación, en formato compacto como jsonify()."""
+    proveedor = current_app.json
+    if hasattr(proveedor, 'dumps_bytes'):
+        return proveedor.dumps_bytes(obj)
+    return proveedor.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def abrir_objeto(datos, clave):
+    """
+    Retorna el comienzo de un objeto JSON con 'datos' y una última 'clave' sin valor.
+    Ejemplo: abrir_objeto({"id": 1}, "modulos") -> b'{"id":1,"modulos":'
+    El que llama escribe después el valor de la clave y cierra con '}'.
+    """
+    if not datos:
+        return b'{' + dumps(clave) + b':'
+    cuerpo = dumps(datos).rstrip()
+    return cuerpo[:-1] + b',' + dumps(clave) + b':'
+
+
+def generar_filas_json(cursor, ndjson, tamano_lote=500):
+    """
+    Recorre un cursor sin buffer y genera su contenido en JSON por lotes de filas.
+    Con ndjson=True cada fila va en su propia línea; si no, se escribe un arreglo JSON.
+    El cursor se cierra al terminar.
+    """
+    mapa = MapaColumnas.de_cursor(cursor)
+    if not ndjson:
+        yield b'['
+    primera = True
+    while True:
+        filas = cursor.fetchmany(tamano_lote)
+        if not filas:
+            break
+        if ndjson:
+            yield b''.join(dumps(mapa.fila(fila)) + b'\n' for fila in filas)
+        else:
+            # Un solo dumps() por lote: el arreglo sin sus corchetes
+            lote = dumps(mapa.filas(filas))[1:-1]
+            yield lote if primera else b',' + lote
+        primera = False
+    if not ndjson:
+        yield b']'
+    cursor.close()
@@ -0,0 +1,108 @@
+# servidor.py
+# Servidor de producción para la API.
+#
+# Uso:
+#   python servidor.py
+#
+# Se configura con variables de entorno (ver configuracion.py):
+#   APP_HOST, APP_PORT        Dirección donde escuchar (por defecto 127.0.0.1:5000)
+#   WEB_WORKERS               Procesos de trabajo (por defecto, uno por CPU)
+#   WEB_THREADS               Hilos por proceso (por defecto 4)
+#   WEB_TIMEOUT               Segundos máximos por request antes de reiniciar el proceso
+#   WEB_GRACEFUL_TIMEOUT      Segundos para terminar los requests en curso al apagar
+#   DB_*, CACHE_*, SLOW_*     Base de datos, caché e instrumentación
+#   METRICS_DIR               Carpeta donde cada proceso deja sus métricas para /metrics
+#                             (por defecto, una carpeta temporal si hay varios procesos)
+#
+# En Linux/macOS usa gunicorn (varios procesos con varios hilos cada uno).
+# En Windows, donde gunicorn no funciona, usa waitress (un proceso con varios hilos).
+import os
+import signal
+import sys
+import tempfile
+
+import configuracion
+import conexion
+import metricas
+
+
+# --- 1. gunicorn: varios procesos de trabajo ---
+def _opciones_gunicorn(servidor):
+    return {
+        'bind': f"{servidor['host']}:{servidor['puerto']}",
+        'workers': servidor['workers'],
+        'threads': servidor['threads'],
+        'worker_class': 'gthread',
+        'timeout': servidor['timeout'],
+        'graceful_timeout': servidor['graceful_timeout'],
+        # La aplicación se importa en cada proceso DESPUÉS del fork: ninguna
+        # conexión a la base de datos se abre en el proceso maestro.
+        'preload_app': False,
+        'post_fork': _post_fork,
+        'worker_exit': _worker_exit,
+        'accesslog': '-',
+    }
+
+def _post_fork(server, worker):
+    # Por si algo abrió conexiones antes del fork: el proceso hijo empieza con un pool nuevo
+    conexion.configurar_pool()
+
+def _worker_exit(server, worker):
+    # Apagado ordenado: cerramos las conexiones libres del proceso que termina
+    # y dejamos escritos sus totales (siguen contando en /metrics)
+    conexion.cerrar_pool()
+    metricas.volcar()
+
+def _preparar_metricas(servidor):
+    # Cada proceso de trabajo escribe sus métricas en la carpeta y /metrics las suma
+    # todas (ver metricas.py). Los archivos de una ejecución anterior se borran.
+    if servidor['workers'] > 1 and 'METRICS_DIR' not in os.environ:
+        os.environ['METRICS_DIR'] = os.path.join(tempfile.gettempdir(), f"plataforma-metricas-{os.getpid()}")
+    if 'METRICS_DIR' in os.environ:
+        metricas.limpiar_directorio(os.environ['METRICS_DIR'])
+
+def _preparar_trabajos(servidor):
+    # Con el almacén 'memoria' cada proceso tiene su propia cola, y GET /api/jobs/<id>
+    # solo encuentra el trabajo si cae en el proceso que lo encoló: con varios procesos
+    # se usa la tabla 'trabajos', salvo que JOBS_STORE diga otra cosa (ver trabajos.py).
+    if servidor['workers'] > 1 and 'JOBS_STORE' not in os.environ:
+        os.environ['JOBS_STORE'] = 'tabla'
+
+def servir_con_gunicorn(servidor):
+    from gunicorn.app.base import BaseApplication
+
+    _preparar_metricas(servidor)
+    _preparar_trabajos(servidor)
+
+    class AplicacionGunicorn(BaseApplication):
+        def load_config(self):
+            for clave, valor in _opciones_gunicorn(servidor).items():
+                self.cfg.set(clave, valor)
+
+        def load(self):
+            from app import app
+            return app
+
+    AplicacionGunicorn().run()
+
+
+# --- 2. waitress: un proceso con varios hilos (Windows) ---
+def servir_con_waitress(servidor):
+    from waitress import serve
+    from app import app
+
+    def apagar(signum, frame):
+        conexion.cerrar_pool()
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, apagar)
+    signal.signal(signal.SIGTERM, apagar)
+    serve(app, host=servidor['host'], port=servidor['puerto'], threads=servidor['threads'])
+
+
+if __name__ == '__main__':
+    servidor = configuracion.SERVIDOR
+    if sys.platform == 'win32':
+        servir_con_waitress(servidor)
+    else:
+        servir_con_gunicorn(servidor)
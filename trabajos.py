@@ -0,0 +1,504 @@
+# trabajos.py
+# Cola de trabajos en segundo plano, ejecutados por hilos dentro de cada proceso de la aplicación.
+#
+# Uso desde el código:
+#   @tarea('precalcular_curso')              # Registra la función de un tipo de trabajo
+#   def precalcular_curso(conn, curso_id): ...
+#
+#   trabajo_id = encolar('precalcular_curso', curso_id=5)   # Retorna enseguida
+#
+# Uso desde la terminal (almacén 'tabla'):
+#   python trabajos.py estado                 # Trabajos por estado
+#   python trabajos.py purgar --dias 7        # Borra los terminados hace más de 7 días
+#
+# Cada función recibe una conexión a la primaria (se devuelve al terminar) y los
+# argumentos con que se encoló, que deben poder guardarse en JSON. Corre dentro
+# de un contexto de la aplicación (sin request), así puede usar app.json. Si
+# lanza una excepción el trabajo se repite hasta 'reintentos' veces, con una
+# espera que se duplica en cada intento; después queda 'fallido' con el error.
+#
+# Almacenes:
+#   'memoria' (por defecto con un solo proceso): los trabajos viven en el proceso
+#       que los encoló y se pierden al reiniciarlo. Sirve porque los trabajos
+#       actuales solo adelantan trabajo que las lecturas harían de todas formas.
+#       Los ids llevan el pid del proceso ('4312-7'), así no se repiten entre procesos.
+#   'tabla': tabla 'trabajos' (migraciones/0005_trabajos.sql). Los trabajos
+#       sobreviven a los reinicios y los toma cualquier proceso; GET /api/jobs/<id>
+#       responde desde cualquiera de ellos. Es el almacén por defecto cuando
+#       servidor.py arranca varios procesos (ver _preparar_trabajos en servidor.py).
+#
+# Los hilos arrancan la primera vez que se usa la cola en cada proceso (después
+# del fork de servidor.py), y en cada request si hay trabajos de antes de reiniciar.
+import argparse
+import contextlib
+import heapq
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+
+import conexion
+
+logger = logging.getLogger('plataforma.trabajos')
+
+TRABAJOS_CONFIG = {
+    'activa': True,
+    'hilos': 2,                 # Hilos ejecutando trabajos en cada proceso
+    'almacen': 'memoria',       # 'memoria' o 'tabla' (servidor.py usa 'tabla' con varios procesos)
+    'reintentos': 3,            # Reintentos tras el primer intento
+    'espera_inicial': 1.0,      # Segundos antes del primer reintento (se duplica en cada uno)
+    'espera_maxima': 60.0,
+    'plazo': 300,               # Segundos que un trabajo puede estar en curso antes de darlo por perdido ('tabla')
+    'sondeo': 1.0,              # Segundos entre búsquedas de trabajos nuevos cuando no hay avisos
+    'max_terminados': 10000,    # Trabajos terminados que se recuerdan para consultar su estado ('memoria')
+}
+
+ESTADOS = ('pendiente', 'en_curso', 'completado', 'fallido')
+
+# Tipo de trabajo -> función (ver tarea())
+TIPOS = {}
+
+
+class TipoDesconocido(Exception):
+    """El trabajo es de un tipo sin función registrada: no se reintenta."""
+
+
+def tarea(tipo):
+    """Decorador que registra la función que ejecuta los trabajos de 'tipo'."""
+    def registrar(funcion):
+        TIPOS[tipo] = funcion
+        return funcion
+    return registrar
+
+
+def _ahora(mas_segundos=0):
+    # Hora UTC sin zona, como las columnas TIMESTAMP de las conexiones (ver conexion.py)
+    return datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=mas_segundos)
+
+
+def _texto(momento):
+    return momento.strftime('%Y-%m-%d %H:%M:%S')
+
+
+# --- 1. Almacenes ---
+# Los dos tienen el mismo contrato. Un trabajo es un diccionario con las columnas
+# de la tabla 'trabajos' (id, tipo, argumentos, estado, intentos, error y fechas).
+class AlmacenMemoria:
+    """Trabajos en memoria del proceso. Los pendientes se ordenan por 'disponible_en'."""
+
+    def __init__(self, max_terminados=10000):
+        self.max_terminados = max_terminados
+        self._trabajos = {}
+        self._pendientes = []             # Montículo de (disponible_en, id)
+        self._terminados = OrderedDict()  # id -> None, del más viejo al más nuevo
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def agregar(self, tipo, argumentos):
+        ahora = _ahora()
+        with self._lock:
+            # Con el pid, el id no coincide con el de un trabajo de otro proceso
+            trabajo_id = f"{os.getpid()}-{next(self._ids)}"
+            self._trabajos[trabajo_id] = {
+                'id': trabajo_id, 'tipo': tipo, 'argumentos': argumentos, 'estado': 'pendiente',
+                'intentos': 0, 'error': None, 'creado_en': ahora, 'disponible_en': ahora,
+                'iniciado_en': None, 'terminado_en': None,
+            }
+            heapq.heappush(self._pendientes, (ahora, trabajo_id))
+        return trabajo_id
+
+    def reclamar(self, plazo):
+        with self._lock:
+            if not self._pendientes or self._pendientes[0][0] > _ahora():
+                return None
+            _, trabajo_id = heapq.heappop(self._pendientes)
+            trabajo = self._trabajos[trabajo_id]
+            trabajo.update(estado='en_curso', intentos=trabajo['intentos'] + 1, iniciado_en=_ahora())
+            return dict(trabajo)
+
+    def completar(self, trabajo_id):
+        self._terminar(trabajo_id, 'completado', None)
+
+    def fallar(self, trabajo_id, error, reintentar_en=None):
+        if reintentar_en is None:
+            self._terminar(trabajo_id, 'fallido', error)
+            return
+        disponible_en = _ahora(reintentar_en)
+        with self._lock:
+            self._trabajos[trabajo_id].update(estado='pendiente', error=error, disponible_en=disponible_en)
+            heapq.heappush(self._pendientes, (disponible_en, trabajo_id))
+
+    def obtener(self, trabajo_id):
+        with self._lock:
+            trabajo = self._trabajos.get(trabajo_id)
+            return dict(trabajo) if trabajo is not None else None
+
+    def contar(self):
+        with self._lock:
+            cuenta = dict.fromkeys(ESTADOS, 0)
+            for trabajo in self._trabajos.values():
+                cuenta[trabajo['estado']] += 1
+        return cuenta
+
+    def _terminar(self, trabajo_id, estado, error):
+        with self._lock:
+            self._trabajos[trabajo_id].update(estado=estado, error=error, terminado_en=_ahora())
+            self._terminados[trabajo_id] = None
+            # Los terminados más viejos se olvidan: su estado ya no se puede consultar
+            while len(self._terminados) > self.max_terminados:
+                viejo, _ = self._terminados.popitem(last=False)
+                del self._trabajos[viejo]
+
+
+SQL_AGREGAR = """
+    INSERT INTO trabajos (tipo, argumentos, estado, creado_en, disponible_en)
+    VALUES (%s, %s, 'pendiente', %s, %s)
+"""
+# Pendientes ya disponibles, o en curso con el plazo vencido (su proceso murió).
+# Una consulta por estado: así el orden sale del índice, sin ordenar toda la cola.
+SQL_CANDIDATOS = """
+    SELECT id, estado, disponible_en FROM trabajos
+    WHERE estado = %s AND disponible_en <= %s
+    ORDER BY disponible_en ASC
+    LIMIT %s
+"""
+# Solo uno de los procesos que ven al mismo candidato logra cambiarle el estado
+SQL_TOMAR = """
+    UPDATE trabajos SET estado = 'en_curso', intentos = intentos + 1, iniciado_en = %s, disponible_en = %s
+    WHERE id = %s AND estado = %s AND disponible_en = %s
+"""
+SQL_TERMINAR = "UPDATE trabajos SET estado = %s, error = %s, terminado_en = %s WHERE id = %s"
+SQL_REINTENTAR = "UPDATE trabajos SET estado = 'pendiente', error = %s, disponible_en = %s WHERE id = %s"
+SQL_OBTENER = "SELECT * FROM trabajos WHERE id = %s"
+SQL_CONTAR = "SELECT COUNT(*) AS cantidad FROM trabajos WHERE estado = %s"
+SQL_PURGAR = "DELETE FROM trabajos WHERE estado = %s AND terminado_en < %s"
+
+
+class AlmacenTabla:
+    """Trabajos en la tabla 'trabajos' de la primaria, compartidos por todos los procesos."""
+
+    def _ejecutar(self, funcion):
+        conn = conexion.get_db_connection(primaria=True)
+        if conn is None:
+            raise conexion.PoolAgotadoError("Sin conexión a la base de datos para la cola de trabajos")
+        cursor = conn.cursor(dictionary=True)
+        try:
+            resultado = funcion(cursor)
+            conn.commit()
+            return resultado
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def agregar(self, tipo, argumentos):
+        ahora = _texto(_ahora())
+
+        def agregar(cursor):
+            cursor.execute(SQL_AGREGAR, (tipo, json.dumps(argumentos), ahora, ahora))
+            return cursor.lastrowid
+        return self._ejecutar(agregar)
+
+    def reclamar(self, plazo):
+        def reclamar(cursor):
+            ahora = _ahora()
+            for estado in ('pendiente', 'en_curso'):
+                cursor.execute(SQL_CANDIDATOS, (estado, _texto(ahora), 5))
+                for candidato in cursor.fetchall():
+                    cursor.execute(SQL_TOMAR, (_texto(ahora), _texto(ahora + timedelta(seconds=plazo)), candidato['id'],
+                                               candidato['estado'], _texto(candidato['disponible_en'])))
+                    if cursor.rowcount == 1:
+                        cursor.execute(SQL_OBTENER, (candidato['id'],))
+                        trabajo = cursor.fetchone()
+                        trabajo['argumentos'] = json.loads(trabajo['argumentos'])
+                        return trabajo
+            return None
+        return self._ejecutar(reclamar)
+
+    def completar(self, trabajo_id):
+        self._ejecutar(lambda cursor: cursor.execute(SQL_TERMINAR, ('completado', None, _texto(_ahora()), trabajo_id)))
+
+    def fallar(self, trabajo_id, error, reintentar_en=None):
+        if reintentar_en is None:
+            self._ejecutar(lambda cursor: cursor.execute(SQL_TERMINAR, ('fallido', error, _texto(_ahora()), trabajo_id)))
+        else:
+            self._ejecutar(lambda cursor: cursor.execute(SQL_REINTENTAR,
+                                                         (error, _texto(_ahora(reintentar_en)), trabajo_id)))
+
+    def obtener(self, trabajo_id):
+        # Un id de 'memoria' ('4312-7') no se compara con la columna: MySQL lo convertiría en 4312
+        if not str(trabajo_id).isdigit():
+            return None
+
+        def obtener(cursor):
+            cursor.execute(SQL_OBTENER, (int(trabajo_id),))
+            trabajo = cursor.fetchone()
+            if trabajo is not None:
+                trabajo['argumentos'] = json.loads(trabajo['argumentos'])
+            return trabajo
+        return self._ejecutar(obtener)
+
+    def contar(self):
+        def contar(cursor):
+            cuenta = {}
+            for estado in ESTADOS:
+                cursor.execute(SQL_CONTAR, (estado,))
+                cuenta[estado] = cursor.fetchone()['cantidad']
+            return cuenta
+        return self._ejecutar(contar)
+
+
+def purgar(conn, dias):
+    """Borra los trabajos terminados hace más de 'dias' días. Retorna cuántos borró."""
+    limite = _texto(_ahora(-dias * 86400))
+    cursor = conn.cursor()
+    try:
+        borrados = 0
+        for estado in ('completado', 'fallido'):
+            cursor.execute(SQL_PURGAR, (estado, limite))
+            borrados += cursor.rowcount
+        conn.commit()
+    finally:
+        cursor.close()
+    return borrados
+
+
+# --- 2. Hilos de trabajo ---
+def _resumen_ms(valores):
+    """p50, p95 y máximo (en ms) de una lista de segundos."""
+    if not valores:
+        return {'p50': None, 'p95': None, 'max': None}
+    ordenados = sorted(valores)
+    def percentil(p):
+        return round(ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))] * 1000, 3)
+    return {'p50': percentil(0.5), 'p95': percentil(0.95), 'max': round(ordenados[-1] * 1000, 3)}
+
+
+class ColaTrabajos:
+    """Hilos que toman trabajos del almacén y los ejecutan, con reintentos y métricas."""
+
+    def __init__(self, almacen, hilos=2, reintentos=3, espera_inicial=1.0, espera_maxima=60.0,
+                 plazo=300, sondeo=1.0):
+        self.almacen = almacen
+        self.hilos = hilos
+        self.reintentos = reintentos
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.plazo = plazo
+        self.sondeo = sondeo
+        self._aviso = threading.Event()
+        self._detener = threading.Event()
+        self._hilos = []
+        self._lock = threading.Lock()
+        self._stats = {'encolados': 0, 'completados': 0, 'fallidos': 0, 'reintentos': 0,
+                       'en_curso': 0, 'errores_almacen': 0}
+        # Últimos 1000 trabajos: segundos esperando en la cola y segundos de cada intento
+        self._esperas = deque(maxlen=1000)
+        self._duraciones = deque(maxlen=1000)
+
+    def iniciar(self):
+        """Arranca los hilos si todavía no están corriendo."""
+        if self._hilos:
+            return
+        with self._lock:
+            if self._hilos:
+                return
+            for numero in range(self.hilos):
+                hilo = threading.Thread(target=self._trabajar, name=f"trabajos-{numero + 1}", daemon=True)
+                hilo.start()
+                self._hilos.append(hilo)
+
+    def detener(self, espera=5.0):
+        """Pide a los hilos que terminen después del trabajo en curso y espera hasta 'espera' segundos."""
+        self._detener.set()
+        self._aviso.set()
+        for hilo in self._hilos:
+            hilo.join(espera)
+
+    def encolar(self, tipo, argumentos):
+        trabajo_id = self.almacen.agregar(tipo, argumentos)
+        with self._lock:
+            self._stats['encolados'] += 1
+        self.iniciar()
+        self._aviso.set()
+        return trabajo_id
+
+    def estadisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+            esperas, duraciones = list(self._esperas), list(self._duraciones)
+        try:
+            stats['por_estado'] = self.almacen.contar()
+        except Exception:
+            stats['por_estado'] = None
+        stats['espera_ms'] = _resumen_ms(esperas)
+        stats['duracion_ms'] = _resumen_ms(duraciones)
+        stats['hilos'] = sum(hilo.is_alive() for hilo in self._hilos)
+        return stats
+
+    # --- Funciones internas ---
+    def _contar(self, clave, cantidad=1):
+        with self._lock:
+            self._stats[clave] += cantidad
+
+    def _trabajar(self):
+        while not self._detener.is_set():
+            try:
+                trabajo = self.almacen.reclamar(self.plazo)
+            except Exception as e:
+                self._contar('errores_almacen')
+                logger.warning("No se pudo leer la cola de trabajos: %s", e)
+                trabajo = None
+            if trabajo is None:
+                self._aviso.wait(self.sondeo)
+                self._aviso.clear()
+                continue
+            self._ejecutar(trabajo)
+
+    def _ejecutar(self, trabajo):
+        inicio = time.monotonic()
+        with self._lock:
+            self._stats['en_curso'] += 1
+            if trabajo['intentos'] == 1:
+                # Espera en la cola: desde que se encoló hasta el primer intento
+                self._esperas.append(max(0.0, (trabajo['iniciado_en'] - trabajo['creado_en']).total_seconds()))
+        try:
+            funcion = TIPOS.get(trabajo['tipo'])
+            if funcion is None:
+                raise TipoDesconocido(f"Tipo de trabajo desconocido: {trabajo['tipo']}")
+            # Al salir del contexto la conexión vuelve al pool (ver conexion.init_app)
+            with _app.app_context() if _app is not None else contextlib.nullcontext():
+                conn = conexion.get_db_connection(primaria=True)
+                if conn is None:
+                    raise conexion.PoolAgotadoError("Sin conexión a la base de datos")
+                try:
+                    funcion(conn, **trabajo['argumentos'])
+                finally:
+                    conn.close()
+            self.almacen.completar(trabajo['id'])
+            self._contar('completados')
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if trabajo['intentos'] <= self.reintentos and not isinstance(e, TipoDesconocido):
+                espera = min(self.espera_maxima, self.espera_inicial * 2 ** (trabajo['intentos'] - 1))
+                logger.warning("Trabajo %s (%s) falló, se reintenta en %.1f s: %s",
+                               trabajo['id'], trabajo['tipo'], espera, error)
+                self._contar('reintentos')
+                self._registrar_fallo(trabajo['id'], error, espera)
+            else:
+                logger.error("Trabajo %s (%s) fallido tras %s intentos: %s",
+                             trabajo['id'], trabajo['tipo'], trabajo['intentos'], error)
+                self._contar('fallidos')
+                self._registrar_fallo(trabajo['id'], error, None)
+        finally:
+            with self._lock:
+                self._stats['en_curso'] -= 1
+                self._duraciones.append(time.monotonic() - inicio)
+
+    def _registrar_fallo(self, trabajo_id, error, reintentar_en):
+        try:
+            self.almacen.fallar(trabajo_id, error, reintentar_en)
+        except Exception as e:
+            # Con la tabla, el trabajo vuelve a tomarse cuando vence su plazo
+            self._contar('errores_almacen')
+            logger.warning("No se pudo guardar el fallo del trabajo %s: %s", trabajo_id, e)
+
+
+# --- 3. Cola global ---
+_app = None  # Aplicación de Flask de init_app(): los trabajos corren en su contexto
+_cola = None
+_cola_pid = None
+_cola_lock = threading.Lock()
+
+
+def configurar_trabajos(**opciones):
+    """Cambia la configuración (ver TRABAJOS_CONFIG). Los hilos actuales terminan y se crean otros."""
+    global _cola
+    with _cola_lock:
+        TRABAJOS_CONFIG.update(opciones)
+        if _cola is not None and _cola_pid == os.getpid():
+            _cola.detener(espera=0)
+        _cola = None
+
+
+def obtener_cola():
+    """Retorna la cola de este proceso, creándola la primera vez que se usa (una por proceso, como el pool)."""
+    global _cola, _cola_pid
+    if _cola is None or _cola_pid != os.getpid():
+        with _cola_lock:
+            if _cola is None or _cola_pid != os.getpid():
+                if TRABAJOS_CONFIG['almacen'] == 'tabla':
+                    almacen = AlmacenTabla()
+                else:
+                    almacen = AlmacenMemoria(TRABAJOS_CONFIG['max_terminados'])
+                _cola = ColaTrabajos(
+                    almacen, TRABAJOS_CONFIG['hilos'], TRABAJOS_CONFIG['reintentos'],
+                    TRABAJOS_CONFIG['espera_inicial'], TRABAJOS_CONFIG['espera_maxima'],
+                    TRABAJOS_CONFIG['plazo'], TRABAJOS_CONFIG['sondeo'])
+                _cola_pid = os.getpid()
+    return _cola
+
+
+def encolar(tipo, **argumentos):
+    """
+    Agrega un trabajo y retorna su id, o None si la cola está desactivada o no se
+    pudo guardar (quien encola no depende del trabajo: solo adelanta trabajo).
+    """
+    if not TRABAJOS_CONFIG['activa']:
+        return None
+    try:
+        return obtener_cola().encolar(tipo, argumentos)
+    except Exception as e:
+        logger.warning("No se pudo encolar el trabajo %s: %s", tipo, e)
+        return None
+
+
+def obtener_trabajo(trabajo_id):
+    return obtener_cola().almacen.obtener(trabajo_id)
+
+
+def estadisticas_trabajos():
+    return obtener_cola().estadisticas()
+
+
+def _arrancar_hilos():
+    # Con la tabla puede haber trabajos de antes de reiniciar: los hilos arrancan con el primer request
+    if TRABAJOS_CONFIG['activa'] and TRABAJOS_CONFIG['almacen'] == 'tabla':
+        obtener_cola().iniciar()
+
+
+def init_app(app):
+    """Ejecuta los trabajos en el contexto de 'app' y arranca los hilos con el primer request de cada proceso."""
+    global _app
+    _app = app
+    app.before_request(_arrancar_hilos)
+
+
+if __name__ == '__main__':
+    import configuracion
+
+    parser = argparse.ArgumentParser(description="Estado y limpieza de la tabla de trabajos.")
+    parser.add_argument('comando', choices=('estado', 'purgar'))
+    parser.add_argument('--dias', type=float, default=7, help="Con 'purgar': antigüedad mínima de los terminados")
+    args = parser.parse_args()
+
+    configuracion.aplicar_entorno()
+    if args.comando == 'estado':
+        for estado, cantidad in AlmacenTabla().contar().items():
+            print(f"{estado:<12}{cantidad}")
+        sys.exit(0)
+    conn = conexion.get_db_connection()
+    if conn is None:
+        print("No se pudo conectar a la base de datos.")
+        sys.exit(1)
+    try:
+        print(f"-> {purgar(conn, args.dias)} trabajos borrados.")
+    finally:
+        conn.close()
@@ -0,0 +1,152 @@
+import logging
+import random
+import threading
+import time
+
+from conexion import get_db_connection
+
+logger = logging.getLogger('plataforma.db')
+
+# --- Unidad de trabajo para las rutas que escriben ---
+# ejecutar_transaccion(trabajo) corre trabajo(cursor) con la conexión del request
+# (ver conexion.get_db_connection) dentro de una sola transacción:
+#   - La regla de negocio se verifica con SELECT ... FOR UPDATE en la misma
+#     transacción que la escritura: nadie puede publicar el curso entre la
+#     verificación y el INSERT/UPDATE.
+#   - commit si trabajo() termina; rollback si lanza cualquier excepción, también
+#     ErrorNegocio (404/403/409...), así ninguna salida deja la transacción abierta.
+#   - Si MySQL la aborta por un deadlock (1213) o por esperar demasiado un bloqueo
+#     (1205), se repite entera tras una espera exponencial con algo de azar.
+#
+# trabajo() solo debe tocar la base de datos, porque puede ejecutarse varias
+# veces. La caché y el índice de publicación se actualizan después del commit.
+
+TRANSACCION_CONFIG = {
+    'reintentos': 3,          # Reintentos tras el primer intento
+    'espera_inicial': 0.02,   # Segundos antes del primer reintento (se duplica en cada uno)
+    'espera_maxima': 0.5,
+}
+
+# 1213: Deadlock found when trying to get lock
+# 1205: Lock wait timeout exceeded (también "database is locked" en SQLite, ver conexion_sqlite.py)
+ERRORES_REINTENTABLES = frozenset({1213, 1205})
+
+_stats = {'transacciones': 0, 'reintentos': 0, 'fallidas_por_bloqueo': 0}
+_stats_lock = threading.Lock()
+
+
+class ErrorNegocio(Exception):
+    """
+    Regla de negocio o recurso inexistente. 'status' es el código HTTP a responder.
+    Si la escritura se rechaza porque el curso está publicado, 'curso_id' dice cuál
+    (así la ruta puede anotarlo en el índice de publicación).
+    """
+
+    def __init__(self, mensaje, status=400, curso_id=None):
+        super().__init__(mensaje)
+        self.status = status
+        self.curso_id = curso_id
+
+
+class ErrorConexion(Exception):
+    """No se pudo obtener una conexión a la base de datos."""
+
+
+def es_reintentable(error):
+    return getattr(error, 'errno', None) in ERRORES_REINTENTABLES
+
+
+def _contar(clave):
+    with _stats_lock:
+        _stats[clave] += 1
+
+
+def _espera(intento):
+    espera = min(TRANSACCION_CONFIG['espera_maxima'], TRANSACCION_CONFIG['espera_inicial'] * 2 ** intento)
+    # El azar evita que dos transacciones en conflicto se vuelvan a encontrar
+    return espera * random.uniform(0.5, 1.0)
+
+
+def ejecutar_transaccion(trabajo, dictionary=True):
+    """
+    Ejecuta trabajo(cursor) en una transacción y retorna lo que retorne.
+    Lanza ErrorNegocio tal cual, ErrorConexion si no hay conexión, y cualquier otro
+    error de la base de datos tras agotar los reintentos.
+    """
+    # Siempre en la primaria, también si el request es un GET (ver conexion.py, réplicas)
+    conn = get_db_connection(primaria=True)
+    if conn is None:
+        raise ErrorConexion("Error de conexión a la base de datos")
+
+    # Una consulta anterior del mismo request pudo abrir la transacción (y su snapshot)
+    if conn.in_transaction:
+        conn.commit()
+
+    intento = 0
+    while True:
+        cursor = None
+        try:
+            conn.start_transaction()
+            cursor = conn.cursor(dictionary=dictionary)
+            resultado = trabajo(cursor)
+            conn.commit()
+            _contar('transacciones')
+            return resultado
+        except Exception as e:
+            conn.rollback()
+            if not es_reintentable(e):
+                raise
+            if intento >= TRANSACCION_CONFIG['reintentos']:
+                _contar('fallidas_por_bloqueo')
+                raise
+            logger.warning("Transacción reintentada (%s/%s): %s",
+                           intento + 1, TRANSACCION_CONFIG['reintentos'], e)
+            _contar('reintentos')
+            time.sleep(_espera(intento))
+            intento += 1
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+
+def estadisticas_transacciones():
+    with _stats_lock:
+        return dict(_stats)
+
+
+# --- Verificaciones de la regla de negocio (dentro de la transacción) ---
+# Bloquean la fila del curso hasta el commit. Retornan el id del curso.
+def bloquear_curso_editable(cursor, curso_id, mensaje):
+    cursor.execute("SELECT id, is_published FROM cursos WHERE id = %s FOR UPDATE", (curso_id,))
+    return _verificar_editable(cursor.fetchone(), "Curso no encontrado", mensaje)
+
+
+def bloquear_curso_de_modulo(cursor, modulo_id, mensaje):
+    cursor.execute("""
+        SELECT c.id, c.is_published
+        FROM modulos m
+        JOIN cursos c ON c.id = m.curso_id
+        WHERE m.id = %s
+        FOR UPDATE
+    """, (modulo_id,))
+    return _verificar_editable(cursor.fetchone(), "Módulo no encontrado", mensaje)
+
+
+def bloquear_curso_de_leccion(cursor, leccion_id, mensaje):
+    cursor.execute("""
+        SELECT c.id, c.is_published
+        FROM lecciones l
+        JOIN modulos m ON m.id = l.modulo_id
+        JOIN cursos c ON c.id = m.curso_id
+        WHERE l.id = %s
+        FOR UPDATE
+    """, (leccion_id,))
+    return _verificar_editable(cursor.fetchone(), "Lección no encontrada", mensaje)
+
+
+def _verificar_editable(curso, no_encontrado, mensaje_publicado):
+    if not curso:
+        raise ErrorNegocio(no_encontrado, 404)
+    if curso['is_published']:
+        raise ErrorNegocio(mensaje_publicado, 403, curso_id=curso['id'])
+    return curso['id']
@@ -0,0 +1,230 @@
+# verificar_consultas.py
+# Comprueba con EXPLAIN que cada consulta de la carpeta 'routes' (y de MODULOS_EXTRA) usa un índice.
+#
+# Uso:
+#   python verificar_consultas.py            # Contra la base configurada (variables DB_*)
+#   python verificar_consultas.py --sqlite   # Contra una base SQLite temporal con el esquema y las migraciones
+#
+# Las consultas se leen del código (sin ejecutarlo) buscando las llamadas a
+# execute()/executemany(). Las que se arman en tiempo de ejecución (filtros
+# opcionales, listas de columnas) no se pueden leer así: para ellas se usan los
+# ejemplos de CONSULTAS_DINAMICAS, que hay que mantener al día.
+#
+# Con MySQL conviene ejecutarlo sobre una base con datos (ver seed.py): con tablas
+# vacías el optimizador puede preferir recorrer la tabla aunque exista el índice.
+# Termina con código 1 si alguna consulta recorre una tabla completa.
+import argparse
+import ast
+import importlib
+import os
+import sys
+import tempfile
+
+import contadores
+from instrumentacion import normalizar_sql
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+CARPETA_RUTAS = os.path.join(RAIZ, 'routes')
+# Módulos fuera de 'routes' con consultas que ejecutan las rutas
+MODULOS_EXTRA = ['versiones.py', 'transacciones.py', 'contadores.py', 'trabajos.py']
+
+# Ejemplos de las consultas dinámicas, por (archivo, función). Deben cubrir cada
+# combinación de filtros que cambie el plan de ejecución.
+CONSULTAS_DINAMICAS = {
+    ('cursos.py', 'get_cursos'): [
+        """SELECT c.id, c.titulo, c.descripcion, c.is_published, c.instructor_id, i.nombre as instructor_nombre,
+                  c.modulo_count, c.leccion_count
+           FROM cursos c LEFT JOIN instructores i ON c.instructor_id = i.id
+           WHERE c.id > %s ORDER BY c.id ASC LIMIT %s""",
+        """SELECT c.id, c.titulo, c.descripcion, c.is_published, c.instructor_id, i.nombre as instructor_nombre,
+                  c.modulo_count, c.leccion_count
+           FROM cursos c LEFT JOIN instructores i ON c.instructor_id = i.id
+           WHERE c.id > %s AND c.is_published = %s ORDER BY c.id ASC LIMIT %s""",
+        """SELECT c.id, c.titulo, c.descripcion, c.is_published, c.instructor_id, i.nombre as instructor_nombre,
+                  c.modulo_count, c.leccion_count
+           FROM cursos c LEFT JOIN instructores i ON c.instructor_id = i.id
+           WHERE c.id > %s AND c.instructor_id = %s ORDER BY c.id ASC LIMIT %s""",
+    ],
+    ('instructores.py', 'get_instructores'): [
+        "SELECT * FROM instructores WHERE id > %s ORDER BY id ASC LIMIT %s",
+    ],
+    ('instructores.py', 'actualizar_instructor'): [
+        "UPDATE instructores SET nombre = %s, email = %s, revision = revision + 1, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+    ],
+    ('contadores.py', '_reconstruir_lote'): [
+        contadores.SQL_CURSOS_REALES, contadores.SQL_CORREGIR_CURSOS,
+        contadores.SQL_INSTRUCTORES_REALES, contadores.SQL_CORREGIR_INSTRUCTORES,
+    ],
+}
+
+
+# --- 1. Lectura de las consultas desde el código ---
+def _constantes_del_modulo(arbol):
+    """Cadenas definidas en el módulo o importadas de otro (from versiones import SQL_X)."""
+    constantes = {}
+    for nodo in arbol.body:
+        if (isinstance(nodo, ast.Assign) and isinstance(nodo.value, ast.Constant)
+                and isinstance(nodo.value.value, str)):
+            for destino in nodo.targets:
+                if isinstance(destino, ast.Name):
+                    constantes[destino.id] = nodo.value.value
+        elif isinstance(nodo, ast.ImportFrom) and nodo.module and nodo.level == 0:
+            modulo = importlib.import_module(nodo.module)
+            for alias in nodo.names:
+                valor = getattr(modulo, alias.name, None)
+                if isinstance(valor, str):
+                    constantes[alias.asname or alias.name] = valor
+    return constantes
+
+
+def _resolver_sql(nodo, constantes):
+    """Texto SQL del primer argumento de execute(), o None si se arma en tiempo de ejecución."""
+    if isinstance(nodo, ast.Constant) and isinstance(nodo.value, str):
+        return nodo.value
+    if isinstance(nodo, ast.Name):
+        return constantes.get(nodo.id)
+    if (isinstance(nodo, ast.Call) and isinstance(nodo.func, ast.Attribute)
+            and nodo.func.attr == 'format'):
+        # SQL_X.format(columna=...): las partes opcionales no cambian los índices usados
+        plantilla = _resolver_sql(nodo.func.value, constantes)
+        if plantilla is not None:
+            return plantilla.format(**{kw.arg: '' for kw in nodo.keywords if kw.arg})
+    if isinstance(nodo, ast.JoinedStr):
+        # f"SET {SQL_X}": se usa el valor de la constante.
+        # f"... IN ({marcadores})": cualquier otro valor se reemplaza por un parámetro.
+        partes = []
+        for parte in nodo.values:
+            if isinstance(parte, ast.Constant):
+                partes.append(parte.value)
+            elif isinstance(parte.value, ast.Name) and parte.value.id in constantes:
+                partes.append(constantes[parte.value.id])
+            else:
+                partes.append('%s')
+        return ''.join(partes)
+    return None
+
+
+def _funciones(arbol):
+    """Funciones del módulo y métodos de sus clases."""
+    for nodo in arbol.body:
+        if isinstance(nodo, ast.FunctionDef):
+            yield nodo
+        elif isinstance(nodo, ast.ClassDef):
+            yield from (metodo for metodo in nodo.body if isinstance(metodo, ast.FunctionDef))
+
+
+def extraer_consultas():
+    """Lista de (archivo, función, línea, sql) con sql=None para las consultas dinámicas."""
+    rutas = [os.path.join(CARPETA_RUTAS, archivo) for archivo in sorted(os.listdir(CARPETA_RUTAS))]
+    rutas += [os.path.join(RAIZ, archivo) for archivo in MODULOS_EXTRA]
+    consultas = []
+    for ruta in rutas:
+        archivo = os.path.basename(ruta)
+        if not archivo.endswith('.py'):
+            continue
+        with open(ruta, encoding='utf-8') as f:
+            arbol = ast.parse(f.read(), archivo)
+        constantes = _constantes_del_modulo(arbol)
+        for funcion in _funciones(arbol):
+            for nodo in ast.walk(funcion):
+                if (isinstance(nodo, ast.Call) and isinstance(nodo.func, ast.Attribute)
+                        and nodo.func.attr in ('execute', 'executemany') and nodo.args):
+                    sql = _resolver_sql(nodo.args[0], constantes)
+                    consultas.append((archivo, funcion.name, nodo.lineno, sql))
+    return sorted(consultas, key=lambda consulta: (consulta[0], consulta[2]))
+
+
+# --- 2. Planes de ejecución ---
+def _problemas_mysql(cursor, sql, params):
+    cursor.execute("EXPLAIN " + sql, params)
+    errores, avisos = [], []
+    for fila in cursor.fetchall():
+        if fila['type'] in ('ALL', 'index'):
+            errores.append(f"recorre toda la tabla {fila['table']} (type={fila['type']})")
+        if 'filesort' in (fila.get('Extra') or ''):
+            avisos.append(f"ordena las filas de {fila['table']} sin índice (filesort)")
+    return errores, avisos
+
+
+def _problemas_sqlite(cursor, sql, params):
+    cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+    errores, avisos = [], []
+    for fila in cursor.fetchall():
+        detalle = fila['detail']
+        if detalle.startswith('SCAN '):
+            errores.append(f"recorre toda la tabla: {detalle}")
+        elif detalle.startswith('USE TEMP B-TREE'):
+            avisos.append(f"ordena sin índice: {detalle}")
+    return errores, avisos
+
+
+def verificar(conn, motor, consultas):
+    """
+    Ejecuta EXPLAIN de cada consulta. Retorna una lista de
+    (ubicación, sql, errores, avisos); las consultas INSERT no se revisan.
+    """
+    problemas = _problemas_sqlite if motor == 'sqlite' else _problemas_mysql
+    resultados = []
+    dinamicas_vistas = set()
+    cursor = conn.cursor(dictionary=True)
+    for archivo, funcion, linea, sql in consultas:
+        ubicacion = f"{archivo}:{linea} {funcion}"
+        if sql is None:
+            # Varias llamadas de la misma función suelen ejecutar la misma consulta dinámica
+            if (archivo, funcion) in dinamicas_vistas:
+                continue
+            dinamicas_vistas.add((archivo, funcion))
+        ejemplos = [sql] if sql is not None else CONSULTAS_DINAMICAS.get((archivo, funcion))
+        if not ejemplos:
+            resultados.append((ubicacion, None,
+                               ["consulta dinámica sin ejemplo en CONSULTAS_DINAMICAS"], []))
+            continue
+        for ejemplo in ejemplos:
+            if normalizar_sql(ejemplo).upper().startswith('INSERT'):
+                continue
+            params = (1,) * ejemplo.count('%s')
+            errores, avisos = problemas(cursor, ejemplo, params)
+            resultados.append((ubicacion, normalizar_sql(ejemplo), errores, avisos))
+    cursor.close()
+    conn.rollback()
+    return resultados
+
+
+if __name__ == '__main__':
+    import configuracion
+    import conexion
+
+    parser = argparse.ArgumentParser(description="Verifica con EXPLAIN que las consultas usan índices.")
+    parser.add_argument('--sqlite', action='store_true',
+                        help="Usa una base SQLite temporal con el esquema y las migraciones")
+    args = parser.parse_args()
+
+    configuracion.aplicar_entorno()
+    directorio = tempfile.TemporaryDirectory()
+    if args.sqlite:
+        import conexion_sqlite
+        ruta = os.path.join(directorio.name, 'verificar.db')
+        conexion_sqlite.crear_esquema(ruta)
+        conexion.configurar_backend('sqlite', ruta=ruta)
+
+    conn = conexion.get_db_connection()
+    if conn is None:
+        print("No se pudo conectar a la base de datos.")
+        sys.exit(1)
+    try:
+        resultados = verificar(conn, conexion.BACKEND_CONFIG['tipo'], extraer_consultas())
+    finally:
+        conn.close()
+
+    fallos = 0
+    for ubicacion, sql, errores, avisos in resultados:
+        estado = 'ERROR' if errores else ('AVISO' if avisos else 'OK')
+        print(f"{estado:<6} {ubicacion}")
+        for mensaje in errores + avisos:
+            print(f"         {mensaje}")
+        if (errores or avisos) and sql:
+            print(f"         {sql}")
+        fallos += bool(errores)
+
+    print(f"\n{len(resultados)} consultas revisadas, {fallos} sin índice.")
+    sys.exit(1 if fallos else 0)
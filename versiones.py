@@ -0,0 +1,108 @@
+from flask import request, Response
+from werkzeug.http import http_date, is_resource_modified, quote_etag
+
+from compresion import quitar_codificacion
+
+# --- Peticiones condicionales (ETag / Last-Modified) ---
+# Cursos, lecciones e instructores tienen las columnas 'revision' y 'updated_at'
+# (ver migraciones/0003_versiones.sql), que las rutas actualizan en cada escritura.
+# Con ellas cada lectura lleva un ETag fuerte y Last-Modified, y si el cliente ya
+# tiene esa versión (If-None-Match / If-Modified-Since) se responde 304 sin armar
+# el cuerpo: en get_curso basta la consulta del curso, sin módulos ni lecciones.
+#
+# La revisión de un curso cubre todo su árbol: cambia también al añadir o editar
+# módulos y lecciones y al cambiar el nombre de su instructor.
+
+# Se incrementa cuando cambia el formato del JSON de las respuestas, para que los
+# ETag viejos dejen de coincidir aunque los datos sean los mismos.
+FORMATO_RESPUESTAS = 3
+
+# Un curso publicado ya no se edita: los CDN (s-maxage) lo guardan un año y los
+# clientes lo revalidan cada 5 minutos con su ETag (casi siempre reciben un 304).
+# La única excepción es cambiar el nombre del instructor; en ese caso el CDN
+# muestra el nombre anterior hasta que se purgue.
+CACHE_CONTROL_PUBLICADO = 'public, max-age=300, s-maxage=31536000'
+# Todo lo demás puede cambiar en cualquier momento: se guarda, pero se revalida siempre.
+CACHE_CONTROL_REVALIDAR = 'no-cache'
+
+SQL_NUEVA_REVISION = "revision = revision + 1, updated_at = CURRENT_TIMESTAMP"
+
+
+# --- 1. Validadores de una respuesta ---
+def etag_curso(curso, variante):
+    return f"curso-{curso['id']}-r{curso['revision']}-{variante}-f{FORMATO_RESPUESTAS}"
+
+
+def etag_fila(tabla, fila):
+    return f"{tabla}-{fila['id']}-r{fila['revision']}-f{FORMATO_RESPUESTAS}"
+
+
+def cabeceras_validacion(etag, modificado, cache_control=CACHE_CONTROL_REVALIDAR):
+    """Cabeceras ETag, Last-Modified y Cache-Control de una respuesta."""
+    cabeceras = {'ETag': quote_etag(etag), 'Cache-Control': cache_control}
+    if modificado is not None:
+        cabeceras['Last-Modified'] = http_date(modificado)
+    return cabeceras
+
+
+def _environ_condicional():
+    """environ del request con las ETag de If-None-Match sin el sufijo de compresión ('-gzip', '-br')."""
+    environ = request.environ
+    if environ.get('HTTP_IF_NONE_MATCH'):
+        environ = {**environ, 'HTTP_IF_NONE_MATCH': quitar_codificacion(environ['HTTP_IF_NONE_MATCH'])}
+    return environ
+
+
+def no_modificado(cabeceras):
+    """True si el cliente ya tiene la versión descrita por 'cabeceras' (If-None-Match / If-Modified-Since)."""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    return not is_resource_modified(_environ_condicional(), etag=cabeceras['ETag'],
+                                    last_modified=cabeceras.get('Last-Modified'))
+
+
+def respuesta_304(cabeceras):
+    return Response(status=304, headers=cabeceras)
+
+
+def respuesta_condicional(respuesta):
+    """
+    Para los listados: ETag calculado con el cuerpo de la respuesta. No evita la
+    consulta, pero si el cliente ya tiene esa página no se vuelve a enviar.
+    """
+    respuesta.headers['Cache-Control'] = CACHE_CONTROL_REVALIDAR
+    respuesta.add_etag()
+    return respuesta.make_conditional(_environ_condicional())
+
+
+# --- 2. Nuevas revisiones (las llaman las rutas que escriben) ---
+def nueva_revision_curso(cursor, curso_id):
+    cursor.execute(f"UPDATE cursos SET {SQL_NUEVA_REVISION} WHERE id = %s", (curso_id,))
+
+
+def nueva_revision_cursos_de_instructor(cursor, instructor_id):
+    # El nombre del instructor va dentro del árbol de cada uno de sus cursos
+    cursor.execute(f"UPDATE cursos SET {SQL_NUEVA_REVISION} WHERE instructor_id = %s", (instructor_id,))
+
+
+# --- 3. Generación del catálogo ---
+# Importar un catálogo (ver catalogo.py) vuelve a usar los mismos ids con otros datos,
+# así que la revisión de un curso no alcanza para saber si un árbol guardado sigue
+# siendo suyo. La importación incrementa la generación (migraciones/0006): la caché
+# de árboles guarda "generación + revisión" de cada entrada, y el índice de
+# publicación se vacía cuando ve una generación distinta (ver indice_publicacion.py).
+SQL_GENERACION = "SELECT generacion FROM generacion_catalogo WHERE id = 1"
+SQL_NUEVA_GENERACION = "UPDATE generacion_catalogo SET generacion = generacion + 1 WHERE id = 1"
+
+
+def leer_generacion(conn):
+    cursor = conn.cursor()
+    cursor.execute(SQL_GENERACION)
+    fila = cursor.fetchone()
+    cursor.close()
+    return fila[0] if fila else None
+
+
+def version_arbol(generacion, revision):
+    """Lo que guarda la caché con cada árbol: cambia con la revisión del curso y con cada importación."""
+    return f"g{generacion}-r{revision}"